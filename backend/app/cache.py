@@ -0,0 +1,171 @@
+"""
+Кэш готовых JSON ответов вместе с их сжатыми версиями.
+
+Зачем это нужно?
+---------------
+Таблицу лидеров запрашивают намного чаще, чем она меняется.
+Без кэша на каждый запрос мы:
+1. Ходим в базу данных
+2. Сериализуем Pydantic модели в JSON
+3. Сжимаем JSON (gzip/brotli — это заметная нагрузка на CPU)
+
+С кэшем всё это делается ОДИН раз на "версию" таблицы лидеров.
+Сжатые байты хранятся рядом с исходным JSON и отдаются как есть,
+пока кэш не будет сброшен (invalidate) новым результатом игры.
+
+Раз сжатие делается один раз, можно позволить себе уровень сжатия
+выше, чем в middleware (gzip 9, brotli 8) — ответ получается меньше.
+
+Ограничения
+-----------
+Кэш живёт в памяти одного процесса. При нескольких воркерах uvicorn
+сброс происходит только в том воркере, который принял результат,
+поэтому у записей есть TTL — он ограничивает "устаревание" в остальных.
+"""
+
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+
+from fastapi import Response
+
+from .compression import compress, negotiate_encoding
+
+import sys
+sys.path.insert(0, '..')
+from settings import settings
+
+
+class CachedBody:
+    """
+    Закэшированный JSON ответ.
+
+    Хранит исходные байты и лениво сжатые варианты:
+    {"gzip": b"...", "br": b"..."}. Каждый вариант сжимается
+    не больше одного раза за жизнь записи.
+    """
+
+    def __init__(self, body: bytes, created_at: float) -> None:
+        self.body = body
+        self.created_at = created_at
+        self.variants: dict[str, bytes] = {}
+
+    def encoded(self, encoding: str) -> bytes:
+        """Получить сжатую версию тела (сжимаем при первом обращении)."""
+        variant = self.variants.get(encoding)
+        if variant is None:
+            level = (
+                settings.compression.cached_brotli_quality
+                if encoding == "br"
+                else settings.compression.cached_gzip_level
+            )
+            variant = compress(self.body, encoding, level)
+            self.variants[encoding] = variant
+        return variant
+
+    def to_response(self, accept_encoding: str | None) -> Response:
+        """
+        Собрать HTTP ответ под конкретного клиента.
+
+        Если клиент поддерживает сжатие и ответ достаточно большой —
+        отдаём заранее сжатые байты с заголовком Content-Encoding.
+        CompressionMiddleware увидит этот заголовок и не будет сжимать повторно.
+        """
+        headers = {"Vary": "Accept-Encoding"}
+        body = self.body
+
+        encoding = negotiate_encoding(accept_encoding) if settings.compression.enabled else None
+        if encoding is not None and len(body) >= settings.compression.minimum_size:
+            body = self.encoded(encoding)
+            headers["Content-Encoding"] = encoding
+
+        return Response(content=body, media_type="application/json", headers=headers)
+
+
+class ResponseCache:
+    """
+    LRU кэш JSON ответов с версионированием.
+
+    Версия (version) увеличивается при каждом invalidate().
+    Запрос запоминает версию ДО похода в базу и передаёт её в put():
+    если за это время кто-то сбросил кэш, устаревший ответ не сохранится.
+
+    Пример использования:
+        version = cache.version
+        cached = cache.get(key)
+        if cached is None:
+            body = (await build_response()).model_dump_json().encode()
+            cached = cache.put(key, body, version)
+        return cached.to_response(request.headers.get("accept-encoding"))
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 30.0, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.version = 0
+        self._entries: OrderedDict[Hashable, CachedBody] = OrderedDict()
+
+    def get(self, key: Hashable) -> CachedBody | None:
+        """Найти запись в кэше (None если нет или устарела)."""
+        if not settings.cache.enabled or not self.enabled:
+            return None
+
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        if self.ttl_seconds and time.monotonic() - entry.created_at > self.ttl_seconds:
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: Hashable, body: bytes, version: int) -> CachedBody:
+        """
+        Сохранить ответ в кэш.
+
+        Args:
+            key: Ключ (например, ("leaderboard", 10))
+            body: Готовый JSON в байтах
+            version: Версия кэша, прочитанная ДО построения ответа
+
+        Returns:
+            Запись кэша (даже если она не сохранилась из-за смены версии)
+        """
+        entry = CachedBody(body, time.monotonic())
+        if not settings.cache.enabled or not self.enabled or version != self.version:
+            return entry
+
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self) -> None:
+        """Сбросить весь кэш (вызывается при изменении данных)."""
+        self.version += 1
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# === Кэш таблицы лидеров ===
+# Сбрасывается при сохранении результата и очистке истории
+leaderboard_cache = ResponseCache(
+    max_entries=settings.cache.max_entries,
+    ttl_seconds=settings.cache.ttl_seconds,
+)
+
+
+# === Кэш графиков прогресса (/api/game/progress) ===
+# Не сбрасывается целиком: в ключе — число игр игрока и время последней игры,
+# поэтому новая игра (или очистка истории) сама даёт новый ключ
+progress_cache = ResponseCache(
+    max_entries=settings.cache.progress_max_entries,
+    ttl_seconds=settings.cache.ttl_seconds,
+    enabled=settings.cache.progress_enabled,
+)
@@ -0,0 +1,358 @@
+"""
+Промо-кампании: отдельная таблица результатов на каждую кампанию.
+
+Зачем?
+-----
+Игра крутит промо-кампании (см. getSecretPhrase во frontend), и раньше все
+результаты лежали в одной таблице game_results с одной таблицей лидеров.
+
+Теперь у результата есть кампания, а хранилище разбито по кампаниям:
+- default (по умолчанию)   -> game_results (исходная таблица, ничего не мигрируем)
+- promo2025                -> game_results__promo2025
+- ...
+
+Рядом с таблицей результатов у кампании лежат таблица рекордов игроков
+и гистограмма рекордов (player_bests / player_score_counts с тем же
+суффиксом __<campaign>, см. player_bests.py).
+
+Что это даёт?
+------------
+- Запрос таблицы лидеров кампании читает только её таблицу и её индекс —
+  размер других кампаний на него не влияет
+- Закончившуюся кампанию можно отключить за одну DDL операцию:
+  таблица переименовывается в архивную (или удаляется) — без DELETE миллионов строк
+
+Почему не декларативные партиции PostgreSQL?
+-------------------------------------------
+В секционированной таблице первичный ключ обязан включать ключ секции
+(id, campaign), а в SQLite автоинкремент работает только для одиночного
+INTEGER PRIMARY KEY. Плюс пришлось бы мигрировать существующую game_results.
+Отдельные таблицы работают одинаково на обеих базах и дают то же самое:
+каждая кампания — своя "партиция".
+
+Модели таблиц кампаний создаются на лету из GameResultMixin (см. models.py),
+поэтому запросы в роутерах остаются обычными ORM запросами.
+"""
+
+import asyncio
+import re
+import time
+from collections.abc import AsyncIterator
+from datetime import datetime, timezone
+
+from fastapi import HTTPException, Query, status
+from sqlalchemy import inspect, select, text
+from sqlalchemy.exc import DBAPIError
+
+from .cache import leaderboard_cache
+from .database import Base, shards
+from .models import (
+    DEFAULT_CAMPAIGN,
+    GameResult,
+    GameResultMixin,
+    PlayerBest,
+    PlayerBestMixin,
+    PlayerScoreCount,
+    PlayerScoreCountMixin,
+)
+from .player_bests import rebuild_bests, rebuild_counts
+
+import sys
+sys.path.insert(0, '..')
+from settings import settings
+
+
+# Только латиница в нижнем регистре, цифры и "_" — id попадает в имя таблицы
+CAMPAIGN_PATTERN = r"^[a-z0-9_]{1,32}$"
+_CAMPAIGN_RE = re.compile(CAMPAIGN_PATTERN)
+
+TABLE_PREFIX = "game_results__"
+
+
+class CampaignError(Exception):
+    """Кампанию нельзя создать или отключить."""
+
+
+# Модели по id кампании (создаются один раз на процесс)
+_models: dict[str, type[GameResultMixin]] = {DEFAULT_CAMPAIGN: GameResult}
+_best_models: dict[str, type[PlayerBestMixin]] = {DEFAULT_CAMPAIGN: PlayerBest}
+_count_models: dict[str, type[PlayerScoreCountMixin]] = {DEFAULT_CAMPAIGN: PlayerScoreCount}
+
+# Кампании, таблицы которых есть в базе.
+# Это кэш: кампанию могут создать или отключить другой воркер или scripts/campaigns.py,
+# поэтому незнакомая кампания перепроверяется по базе (не чаще refresh_seconds),
+# а "пропавшая" таблица сразу обновляет список (см. get_campaign_model)
+_active: set[str] = {DEFAULT_CAMPAIGN}
+_refreshed_at = 0.0
+
+_create_lock = asyncio.Lock()
+
+
+def table_name(campaign: str) -> str:
+    """Имя таблицы результатов кампании."""
+    if campaign == DEFAULT_CAMPAIGN:
+        return GameResult.__tablename__
+    return f"{TABLE_PREFIX}{campaign}"
+
+
+def campaign_model(campaign: str) -> type[GameResultMixin]:
+    """
+    ORM модель таблицы кампании (без обращения к базе).
+
+    Для новой кампании создаётся класс GameResult_<campaign>
+    с колонками и индексами из GameResultMixin.
+    """
+    model = _models.get(campaign)
+    if model is None:
+        if not _CAMPAIGN_RE.match(campaign):
+            raise CampaignError(f"Недопустимый id кампании: {campaign!r}")
+        model = type(
+            f"GameResult_{campaign}",
+            (GameResultMixin, Base),
+            {"__tablename__": table_name(campaign), "campaign": campaign},
+        )
+        _models[campaign] = model
+    return model
+
+
+def _companion_model(registry: dict, mixin: type, base_name: str, campaign: str) -> type:
+    """Модель таблицы кампании рядом с результатами (рекорды, гистограмма)."""
+    model = registry.get(campaign)
+    if model is None:
+        campaign_model(campaign)  # проверка id
+        model = type(
+            f"{mixin.__name__.removesuffix('Mixin')}_{campaign}",
+            (mixin, Base),
+            {"__tablename__": f"{base_name}__{campaign}", "campaign": campaign},
+        )
+        registry[campaign] = model
+    return model
+
+
+def best_model(campaign: str) -> type[PlayerBestMixin]:
+    """ORM модель таблицы рекордов кампании."""
+    return _companion_model(_best_models, PlayerBestMixin, PlayerBest.__tablename__, campaign)
+
+
+def count_model(campaign: str) -> type[PlayerScoreCountMixin]:
+    """ORM модель гистограммы рекордов кампании."""
+    return _companion_model(_count_models, PlayerScoreCountMixin, PlayerScoreCount.__tablename__, campaign)
+
+
+def _tables(campaign: str) -> list:
+    """Таблицы кампании: результаты, рекорды и гистограмма рекордов."""
+    return [
+        campaign_model(campaign).__table__,
+        best_model(campaign).__table__,
+        count_model(campaign).__table__,
+    ]
+
+
+def active_campaigns() -> list[str]:
+    """Кампании, у которых есть таблица (default — первая)."""
+    return sorted(_active, key=lambda campaign: (campaign != DEFAULT_CAMPAIGN, campaign))
+
+
+async def _table_campaigns(shard) -> set[str]:
+    """Кампании, таблицы результатов которых есть в базе шарда."""
+    async with shard.engine.connect() as conn:
+        names = await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_table_names())
+    campaigns = set()
+    for name in names:
+        campaign = name.removeprefix(TABLE_PREFIX)
+        if name.startswith(TABLE_PREFIX) and _CAMPAIGN_RE.match(campaign):
+            campaign_model(campaign)
+            campaigns.add(campaign)
+    return campaigns
+
+
+async def _create_tables(shard, campaigns: set[str]) -> None:
+    """Создать недостающие таблицы и индексы кампаний в шарде."""
+    async with shard.engine.begin() as conn:
+        for campaign in campaigns:
+            for table in _tables(campaign):
+                await conn.run_sync(table.create, checkfirst=True)
+                for index in table.indexes:
+                    await conn.run_sync(index.create, checkfirst=True)
+
+
+async def _backfill_bests(shard, campaigns: set[str]) -> None:
+    """Таблица рекордов пустая, а результаты есть — значит, она только что появилась: заполнить."""
+    async with shard.session_maker() as session:
+        for campaign in campaigns:
+            results, bests, counts = campaign_model(campaign), best_model(campaign), count_model(campaign)
+            has_results = await session.scalar(select(results.id).limit(1))
+            has_bests = await session.scalar(select(bests.player_name).limit(1))
+            has_counts = await session.scalar(select(counts.best_score).limit(1))
+            if has_results is not None and has_bests is None:
+                await session.run_sync(rebuild_bests, results, bests, counts)
+            elif has_bests is not None and has_counts is None:
+                await session.run_sync(rebuild_counts, bests, counts)
+        await session.commit()
+
+
+async def load_campaigns() -> None:
+    """
+    Найти таблицы кампаний в базе и создать недостающие таблицы и индексы.
+
+    Вызывается при старте приложения после create_db_and_tables().
+    Индексы создаются и для старой game_results — в базах,
+    созданных до появления индексов, их ещё нет.
+    Если таблиц рекордов ещё не было — они заполняются по результатам.
+    
+    С шардированием кампания, найденная в любом шарде, создаётся во всех.
+    """
+    global _refreshed_at
+    for shard in shards:
+        _active.update(await _table_campaigns(shard))
+    _refreshed_at = time.monotonic()
+
+    for shard in shards:
+        await _create_tables(shard, _active)
+        await _backfill_bests(shard, _active)
+
+
+async def refresh_campaigns(force: bool = False) -> None:
+    """
+    Перечитать список кампаний из базы (первого шарда — таблицы есть во всех).
+
+    Без force — не чаще раза в settings.campaigns.refresh_seconds: незнакомые
+    id в запросах не должны превращаться в запрос к схеме базы на каждый запрос.
+    """
+    global _refreshed_at
+    if not force and time.monotonic() - _refreshed_at < settings.campaigns.refresh_seconds:
+        return
+    found = await _table_campaigns(shards[0])
+    _refreshed_at = time.monotonic()
+    if found | {DEFAULT_CAMPAIGN} != _active:
+        _active.intersection_update(found | {DEFAULT_CAMPAIGN})
+        _active.update(found)
+        leaderboard_cache.invalidate()
+
+
+def missing_table(exc: Exception) -> bool:
+    """Ошибка базы "таблицы нет" (кампанию отключили, а этот процесс ещё не знает)."""
+    if not isinstance(exc, DBAPIError):
+        return False
+    orig = exc.orig
+    # PostgreSQL: 42P01 undefined_table; SQLite: текст ошибки
+    code = getattr(orig, "sqlstate", None) or getattr(orig, "pgcode", None)
+    return code == "42P01" or "no such table" in str(orig)
+
+
+async def create_campaign(campaign: str) -> type[GameResultMixin]:
+    """
+    Создать таблицы кампании во всех шардах (scripts/campaigns.py create).
+
+    Raises:
+        CampaignError: недопустимый id или достигнут лимит кампаний
+    """
+    async with _create_lock:
+        await refresh_campaigns(force=True)
+        if campaign in _active:
+            return _models[campaign]
+        if len(_active) >= settings.campaigns.max_campaigns:
+            raise CampaignError(f"Достигнут лимит кампаний ({settings.campaigns.max_campaigns})")
+
+        model = campaign_model(campaign)
+        for shard in shards:
+            async with shard.engine.begin() as conn:
+                for table in _tables(campaign):
+                    await conn.run_sync(table.create, checkfirst=True)
+                    for index in table.indexes:
+                        await conn.run_sync(index.create, checkfirst=True)
+        _active.add(campaign)
+        return model
+
+
+async def ensure_campaign(campaign: str) -> type[GameResultMixin]:
+    """
+    Модель кампании для записи результата.
+
+    Кампании создаются заранее (scripts/campaigns.py create): иначе любой
+    POST с новым campaign создавал бы таблицы и мог занять все max_campaigns.
+    С CAMPAIGN_AUTO_CREATE=true таблица создаётся при первом результате.
+
+    Raises:
+        CampaignError: если кампании нет, а создавать новые нельзя
+    """
+    if campaign in _active:
+        return _models[campaign]
+
+    # Может быть, её создали в другом воркере
+    await refresh_campaigns()
+    if campaign in _active:
+        return _models[campaign]
+    if not settings.campaigns.auto_create:
+        raise CampaignError(f"Кампания '{campaign}' не найдена")
+    return await create_campaign(campaign)
+
+
+async def detach_campaign(campaign: str, drop: bool = False) -> str | None:
+    """
+    Отключить закончившуюся кампанию.
+
+    Индексы удаляются, таблицы переименовываются в архивные
+    game_results_archive__<campaign>__<время> (и так же player_bests...)
+    или удаляются при drop=True. Данные не копируются — это DDL операции.
+
+    Returns:
+        Имя архивной таблицы результатов (None при drop=True)
+    """
+    if campaign == DEFAULT_CAMPAIGN:
+        raise CampaignError("Кампанию по умолчанию отключить нельзя")
+    if campaign not in _active:
+        raise CampaignError(f"Кампания '{campaign}' не найдена")
+
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+    tables = _tables(campaign)
+    # game_results__promo -> game_results_archive__promo__20250120153000
+    archives = [f"{table.name.removesuffix(f'__{campaign}')}_archive__{campaign}__{stamp}" for table in tables]
+    for shard in shards:
+        async with shard.engine.begin() as conn:
+            for table, archive in zip(tables, archives):
+                if drop:
+                    await conn.run_sync(table.drop, checkfirst=True)
+                    continue
+                # Имена индексов общие для схемы — удаляем, чтобы кампанию можно было завести заново
+                for index in table.indexes:
+                    await conn.run_sync(index.drop, checkfirst=True)
+                quote = conn.dialect.identifier_preparer.quote
+                await conn.execute(text(f"ALTER TABLE {quote(table.name)} RENAME TO {quote(archive)}"))
+
+    _active.discard(campaign)
+    leaderboard_cache.invalidate()
+    return None if drop else archives[0]
+
+
+async def get_campaign_model(
+    campaign: str = Query(
+        DEFAULT_CAMPAIGN,
+        pattern=CAMPAIGN_PATTERN,
+        description="Промо-кампания (по умолчанию — default)",
+    ),
+) -> AsyncIterator[type[GameResultMixin]]:
+    """
+    Dependency для FastAPI — модель таблицы кампании из ?campaign=...
+
+    Для чтения: неизвестная кампания — 404, таблицу не создаём.
+    Если таблицы кампании уже нет (её отключили из другого процесса),
+    запрос тоже отвечает 404, а список кампаний перечитывается.
+    """
+    if campaign not in _active:
+        await refresh_campaigns()
+    if campaign not in _active:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Кампания '{campaign}' не найдена",
+        )
+    try:
+        yield _models[campaign]
+    except DBAPIError as exc:
+        if campaign == DEFAULT_CAMPAIGN or not missing_table(exc):
+            raise
+        await refresh_campaigns(force=True)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Кампания '{campaign}' не найдена",
+        )
@@ -0,0 +1,213 @@
+"""
+Сжатие HTTP ответов (gzip и brotli).
+
+Зачем это нужно?
+---------------
+Таблица лидеров и история игр — это JSON, который отлично сжимается
+(много повторяющихся ключей). Игроки с мобильного интернета (3G) получают
+ответ в 5–10 раз быстрее, если он сжат.
+
+Как это работает?
+----------------
+1. Клиент присылает заголовок Accept-Encoding (например, "gzip, br")
+2. Выбираем лучший поддерживаемый алгоритм (content negotiation)
+3. Если ответ больше порога (minimum_size) — сжимаем его
+4. Добавляем заголовки Content-Encoding и Vary: Accept-Encoding
+
+Маленькие ответы не сжимаем: заголовки gzip/brotli съедят всю выгоду,
+а CPU потратим зря.
+
+Ответы, которые уже сжаты (например, из кэша — см. cache.py),
+middleware пропускает как есть — повторно ничего не сжимается.
+"""
+
+import gzip
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli — опциональная зависимость, без неё работаем только с gzip
+    brotli = None
+
+
+# Алгоритмы в порядке предпочтения (при равном q выбираем первый)
+SUPPORTED_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+# Какие типы контента имеет смысл сжимать
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "text/",
+    "application/javascript",
+)
+
+
+def parse_accept_encoding(header: str | None) -> dict[str, float]:
+    """
+    Разобрать заголовок Accept-Encoding.
+
+    Пример:
+        "gzip;q=0.8, br" -> {"gzip": 0.8, "br": 1.0}
+
+    Returns:
+        Словарь "алгоритм -> вес (q)"
+    """
+    result: dict[str, float] = {}
+    if not header:
+        return result
+
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        result[name] = q
+
+    return result
+
+
+def negotiate_encoding(accept_encoding: str | None) -> str | None:
+    """
+    Выбрать алгоритм сжатия для клиента.
+
+    Учитываем веса q: "br;q=0" означает "brotli НЕ присылать".
+    Звёздочка "*" разрешает любой алгоритм, который не указан явно.
+
+    Returns:
+        "br", "gzip" или None (клиент не поддерживает сжатие)
+    """
+    accepted = parse_accept_encoding(accept_encoding)
+    if not accepted:
+        return None
+
+    wildcard = accepted.get("*", 0.0)
+    best: str | None = None
+    best_q = 0.0
+
+    for encoding in SUPPORTED_ENCODINGS:
+        q = accepted.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+
+    return best
+
+
+def compress(body: bytes, encoding: str, level: int) -> bytes:
+    """
+    Сжать тело ответа выбранным алгоритмом.
+
+    Args:
+        body: Исходные байты
+        encoding: "gzip" или "br"
+        level: Уровень сжатия (gzip: 1–9, brotli: 0–11)
+
+    Returns:
+        Сжатые байты
+    """
+    if encoding == "br":
+        return brotli.compress(body, quality=level)
+    # mtime=0 — одинаковый вход даёт одинаковый выход (удобно для кэша и ETag)
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+def is_compressible(content_type: str | None) -> bool:
+    """Проверить, имеет ли смысл сжимать такой Content-Type."""
+    if not content_type:
+        return False
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware для сжатия ответов gzip/brotli.
+
+    Почему не GZipMiddleware из Starlette?
+    -------------------------------------
+    Он умеет только gzip. Brotli на JSON даёт ещё 15–25% экономии,
+    а современные браузеры его поддерживают.
+
+    Ответ буферизуется целиком: наши эндпоинты возвращают небольшой JSON,
+    стриминговых ответов нет.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 500,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.levels = {"gzip": gzip_level, "br": brotli_quality}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(
+            send,
+            encoding=encoding,
+            level=self.levels[encoding],
+            minimum_size=self.minimum_size,
+        )
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """Перехватывает сообщения ответа и сжимает тело перед отправкой."""
+
+    def __init__(self, send: Send, encoding: str, level: int, minimum_size: int) -> None:
+        self._send = send
+        self.encoding = encoding
+        self.level = level
+        self.minimum_size = minimum_size
+        self.start_message: Message | None = None
+        self.passthrough = False
+        self.chunks: list[bytes] = []
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            # Уже сжатый ответ (например, из кэша) или не-текстовый контент — не трогаем
+            if "content-encoding" in headers or not is_compressible(headers.get("content-type")):
+                self.passthrough = True
+                await self._send(message)
+                return
+            self.start_message = message
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+
+        self.chunks.append(message.get("body", b""))
+        if message.get("more_body", False):
+            return
+
+        body = b"".join(self.chunks)
+        headers = MutableHeaders(raw=self.start_message["headers"])
+        headers.add_vary_header("Accept-Encoding")
+
+        if len(body) >= self.minimum_size:
+            body = compress(body, self.encoding, self.level)
+            headers["Content-Encoding"] = self.encoding
+            headers["Content-Length"] = str(len(body))
+
+        await self._send(self.start_message)
+        await self._send({"type": "http.response.body", "body": body})
@@ -6,6 +6,7 @@
 1. Создаём "движок" (engine) для подключения к SQLite
 2. Создаём фабрику сессий — через сессии мы общаемся с БД
 3. Определяем базовый класс для моделей
+4. Шардирование (по желанию): несколько баз, каждый игрок — ровно в одной
 
 Почему SQLite?
 --------------
@@ -21,20 +22,46 @@ FastAPI — асинхронный фреймворк. Если использо
 Асинхронный драйвер позволяет обрабатывать другие запросы пока ждём БД.
 """
 
+import asyncio
+import logging
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from collections.abc import Callable
+from contextlib import AsyncExitStack
+from typing import Any, TypeVar
+
+from sqlalchemy import create_engine, event, make_url
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
-from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.orm import DeclarativeBase, Session
+from sqlalchemy.pool import QueuePool
 
 import sys
 sys.path.insert(0, '..')
 from settings import settings
 
 
+def _create_engine(url: str):
+    """Асинхронный движок (+ лог медленных запросов, если включён)."""
+    # echo=True — выводит SQL запросы в консоль (полезно для отладки)
+    new_engine = create_async_engine(
+        url,
+        echo=settings.debug,  # Показывать SQL запросы только в режиме отладки
+    )
+    
+    # Лог медленных запросов подключаем только если задан порог (см. profiling.py)
+    if settings.profiling.slow_query_ms > 0:
+        from .profiling import install_slow_query_log
+        install_slow_query_log(
+            new_engine.sync_engine,
+            threshold_ms=settings.profiling.slow_query_ms,
+            explain=settings.profiling.slow_query_explain,
+        )
+    return new_engine
+
+
 # === Создаём асинхронный движок для SQLite ===
-# echo=True — выводит SQL запросы в консоль (полезно для отладки)
-engine = create_async_engine(
-    settings.db.url,
-    echo=settings.debug,  # Показывать SQL запросы только в режиме отладки
-)
+# Без шардирования это единственная база; с шардированием — первый шард (см. ниже)
+engine = _create_engine(settings.db.shard_urls[0] if settings.db.shard_urls else settings.db.url)
 
 
 # === Фабрика сессий ===
@@ -61,16 +88,298 @@ class Base(DeclarativeBase):
     pass
 
 
+# === Запись в SQLite через одну "полосу" с групповым коммитом ===
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Задача записи: получает (синхронную) сессию, делает add/flush/execute, НЕ делает commit.
+# Синхронная — чтобы вся пачка выполнялась в одном run_sync (см. WriteLane._commit)
+WriteJob = Callable[[Session], T]
+
+
+def _is_file_sqlite(url: str) -> bool:
+    return url.startswith("sqlite") and ":memory:" not in url
+
+
+class WriteLane:
+    """
+    Все записи в SQLite — через одно соединение и пачками.
+    
+    Проблема
+    --------
+    SQLite разрешает только ОДНОГО писателя. Когда много запросов
+    одновременно сохраняют результаты, каждая транзакция ждёт блокировку
+    (или падает с "database is locked"), а каждый COMMIT — это отдельная
+    синхронизация файла на диск (fsync). Под нагрузкой хвост задержек растёт.
+    
+    Решение (group commit)
+    ----------------------
+    1. Записи не выполняются сразу, а попадают в asyncio.Queue
+    2. Один фоновый "писатель" забирает из очереди всё, что накопилось.
+       Если в очереди была не одна запись — ещё до batch_ms ждёт новых;
+       одиночная запись коммитится сразу, без ожидания
+    3. Вся пачка выполняется в ОДНОЙ транзакции (BEGIN IMMEDIATE ... COMMIT):
+       одна блокировка и один fsync на десятки записей
+    4. Задачи синхронные, и пачка целиком выполняется в отдельном потоке
+       обычным драйвером sqlite3: запросы пачки не ходят через event loop
+       (как было бы с aiosqlite — переключение на каждый запрос)
+    5. Каждая запись — в своём SAVEPOINT: ошибка одной не откатывает остальные
+    6. Вызывающий получает результат только после COMMIT
+    
+    Цифры — scripts/bench_write_lane.py: в разы больше записей в секунду,
+    и ни одного "database is locked" при сотнях одновременных писателей.
+    Выключается DB_WRITE_LANE=false.
+    
+    Чтения по-прежнему идут через обычный пул сессий (get_async_session);
+    в режиме WAL они не блокируются писателем.
+    """
+    
+    def __init__(self, url: str, batch_ms: float = 2.0, batch_max: int = 256, wal: bool = True) -> None:
+        self.batch_seconds = batch_ms / 1000
+        self.batch_max = batch_max
+        # Отдельный СИНХРОННЫЙ движок (драйвер sqlite3) с ОДНИМ соединением —
+        # это и есть единственный писатель. Он работает в своём потоке (_thread),
+        # поэтому запросы пачки не ходят через event loop.
+        # poolclass явно: пул по умолчанию зависит от версии SQLAlchemy
+        self.engine = create_engine(
+            make_url(url).set(drivername="sqlite"),
+            poolclass=QueuePool,
+            pool_size=1,
+            max_overflow=0,
+        )
+        # Один поток: соединение sqlite3 живёт и используется в одном и том же потоке
+        self._thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="write-lane")
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: asyncio.Task | None = None
+        
+        # Метрики
+        self.batches = 0
+        self.jobs = 0
+        self.max_batch = 0
+        
+        @event.listens_for(self.engine, "connect")
+        def _on_connect(dbapi_connection, connection_record):
+            # Транзакциями управляем сами (см. _on_begin), а не драйвер sqlite3
+            dbapi_connection.isolation_level = None
+            cursor = dbapi_connection.cursor()
+            if wal:
+                cursor.execute("PRAGMA journal_mode=WAL")
+                # В режиме WAL это безопасно: после сбоя теряется максимум последний коммит
+                cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute("PRAGMA busy_timeout=5000")
+            cursor.close()
+        
+        @event.listens_for(self.engine, "begin")
+        def _on_begin(connection):
+            # Берём блокировку записи сразу, а не при первом INSERT
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+    
+    def start(self) -> None:
+        """Запустить писателя (вызывается при старте приложения или при первой записи)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        """Дописать очередь и остановить писателя."""
+        if self._task is not None and not self._task.done():
+            await self._queue.put(None)
+            await self._task
+        self._task = None
+        await asyncio.get_running_loop().run_in_executor(self._thread, self.engine.dispose)
+    
+    async def run(self, job: WriteJob[T]) -> T:
+        """
+        Выполнить запись в общей транзакции и дождаться COMMIT.
+        
+        Returns:
+            То, что вернула job(session)
+        
+        Raises:
+            Исключение из job или ошибку COMMIT
+        
+        job выполняется в потоке писателя — только работа с сессией,
+        без обращений к объектам event loop.
+        """
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((job, future))
+        return await future
+    
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            
+            # Добираем пачку: всё, что уже в очереди, и то, что придёт за batch_ms.
+            # Одиночную запись не задерживаем — ждать имеет смысл, только когда писателей много
+            deadline = loop.time() + self.batch_seconds
+            while len(batch) < self.batch_max:
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if len(batch) == 1 or timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            
+            await self._commit(batch)
+    
+    async def _commit(self, batch: list[tuple[WriteJob, asyncio.Future]]) -> None:
+        """Выполнить пачку в одной транзакции и разбудить ожидающих."""
+        try:
+            outcomes = await asyncio.get_running_loop().run_in_executor(self._thread, self._run_batch, batch)
+        except Exception as exc:
+            logger.exception("Write lane: пачка из %d записей не записана", len(batch))
+            self._fail(batch, exc)
+            return
+        
+        self.batches += 1
+        self.jobs += len(batch)
+        self.max_batch = max(self.max_batch, len(batch))
+        self._resolve(outcomes)
+    
+    def _run_batch(
+        self,
+        batch: list[tuple[WriteJob, asyncio.Future]],
+    ) -> list[tuple[asyncio.Future, Any, Exception | None]]:
+        """Задачи пачки, каждая в своём SAVEPOINT, и COMMIT (выполняется в потоке писателя)."""
+        with Session(self.engine, expire_on_commit=False) as session:
+            outcomes = self._run_jobs(session, batch)
+            session.commit()
+        return outcomes
+    
+    @staticmethod
+    def _run_jobs(
+        session: Session,
+        batch: list[tuple[WriteJob, asyncio.Future]],
+    ) -> list[tuple[asyncio.Future, Any, Exception | None]]:
+        """Задачи пачки, каждая в своём SAVEPOINT."""
+        outcomes = []
+        for job, future in batch:
+            if future.cancelled():
+                continue
+            try:
+                with session.begin_nested():
+                    outcomes.append((future, job(session), None))
+            except Exception as exc:
+                outcomes.append((future, None, exc))
+        return outcomes
+    
+    @staticmethod
+    def _fail(batch: list[tuple[WriteJob, asyncio.Future]], exc: Exception) -> None:
+        """Пачка не записана — ошибка для всех ожидающих."""
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(exc)
+    
+    @staticmethod
+    def _resolve(outcomes: list[tuple[asyncio.Future, Any, Exception | None]]) -> None:
+        """После COMMIT — каждому ожидающему его результат или ошибку."""
+        for future, result, exc in outcomes:
+            if future.done():
+                continue
+            if exc is not None:
+                future.set_exception(exc)
+            else:
+                future.set_result(result)
+    
+    def stats(self) -> dict:
+        """Метрики для мониторинга."""
+        return {
+            "queued": self._queue.qsize(),
+            "batches": self.batches,
+            "jobs": self.jobs,
+            "avg_batch": round(self.jobs / self.batches, 1) if self.batches else 0.0,
+            "max_batch": self.max_batch,
+        }
+
+
+# === Шарды: игроки разложены по нескольким базам ===
+
+class Shard:
+    """
+    Одна база данных с частью игроков.
+    
+    Без шардирования шард один — это обычная база (engine выше).
+    С шардированием (DB_SHARD_URLS) у каждого шарда свой движок,
+    своя фабрика сессий и своя полоса записи (для SQLite).
+    
+    В каждом шарде — ВСЕ таблицы (результаты, рекорды, гистограмма рекордов,
+    таблицы кампаний), но строки только "своих" игроков.
+    """
+    
+    def __init__(self, index: int, url: str) -> None:
+        self.index = index
+        self.url = url
+        if index == 0:
+            self.engine = engine
+            self.session_maker = async_session_maker
+        else:
+            self.engine = _create_engine(url)
+            self.session_maker = async_sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+        
+        # Полоса записи есть только у SQLite в файле (PostgreSQL сам справляется с параллельной записью)
+        self.write_lane: WriteLane | None = None
+        if settings.db.write_lane and _is_file_sqlite(url):
+            self.write_lane = WriteLane(
+                url,
+                batch_ms=settings.db.write_batch_ms,
+                batch_max=settings.db.write_batch_max,
+                wal=settings.db.sqlite_wal,
+            )
+            if settings.profiling.slow_query_ms > 0:
+                from .profiling import install_slow_query_log
+                install_slow_query_log(
+                    self.write_lane.engine,
+                    threshold_ms=settings.profiling.slow_query_ms,
+                    explain=settings.profiling.slow_query_explain,
+                )
+    
+    def __repr__(self) -> str:
+        return f"<Shard({self.index}, {self.engine.url!r})>"
+
+
+shards: list[Shard] = [
+    Shard(index, url)
+    for index, url in enumerate(settings.db.shard_urls or [settings.db.url])
+]
+
+
+def shard_for(player_name: str) -> Shard:
+    """
+    Шард игрока — по стабильному хэшу имени.
+    
+    crc32, а не hash(): встроенный hash() строк меняется от запуска к запуску.
+    Число шардов менять нельзя без переноса данных — игроки "переедут".
+    """
+    return shards[zlib.crc32(player_name.encode("utf-8")) % len(shards)]
+
+
 async def create_db_and_tables() -> None:
     """
     Создать базу данных и все таблицы.
     
     Эта функция вызывается при старте приложения.
     Если таблицы уже существуют — ничего не произойдёт.
+    С шардированием таблицы создаются в каждом шарде.
     """
-    async with engine.begin() as conn:
-        # Создаём все таблицы, которые описаны в моделях
-        await conn.run_sync(Base.metadata.create_all)
+    for shard in shards:
+        async with shard.engine.begin() as conn:
+            # Создаём все таблицы, которые описаны в моделях
+            await conn.run_sync(Base.metadata.create_all)
 
 
 async def get_async_session() -> AsyncSession:
@@ -87,6 +396,84 @@ async def get_async_session() -> AsyncSession:
         async def get_items(session: AsyncSession = Depends(get_async_session)):
             # session уже готова к использованию
             ...
+    
+    С шардированием это сессия первого шарда — для данных игрока
+    используйте get_player_session, для всех игроков — get_shard_sessions.
     """
     async with async_session_maker() as session:
         yield session
+
+
+async def get_player_session(player_name: str = "Player") -> AsyncSession:
+    """
+    Dependency для FastAPI — сессия шарда игрока из ?player_name=...
+    
+    Эндпоинты по одному игроку (статистика, история) читают ровно один шард.
+    """
+    async with shard_for(player_name).session_maker() as session:
+        yield session
+
+
+async def get_shard_sessions() -> list[AsyncSession]:
+    """
+    Dependency для FastAPI — по сессии на каждый шард (порядок как в shards).
+    
+    Для запросов по всем игрокам (таблица лидеров): запрос отправляется
+    во все шарды одновременно, результаты сливаются (scatter-gather).
+    """
+    async with AsyncExitStack() as stack:
+        yield [
+            await stack.enter_async_context(shard.session_maker())
+            for shard in shards
+        ]
+
+
+async def run_write(job: WriteJob[T], shard: Shard | None = None) -> T:
+    """
+    Выполнить запись в базу и закоммитить.
+    
+    SQLite — через WriteLane (пачкой вместе с другими записями),
+    остальные базы — в своей сессии, как обычно.
+    
+    Args:
+        job: Задача записи (получает синхронную сессию, commit не делает)
+        shard: Шард (для данных игрока — shard_for(player_name));
+            по умолчанию первый
+    
+    Пример:
+        def save(session: Session) -> GameResult:
+            game = GameResult(score=42, duration=10)
+            session.add(game)
+            session.flush()
+            return game
+        
+        game = await run_write(save, shard_for("Anna"))
+    """
+    shard = shard or shards[0]
+    if shard.write_lane is not None:
+        return await shard.write_lane.run(job)
+    async with shard.session_maker() as session:
+        result = await session.run_sync(job)
+        await session.commit()
+        return result
+
+
+def write_lanes() -> list[WriteLane]:
+    """Полосы записи всех шардов (пусто, если SQLite не используется)."""
+    return [shard.write_lane for shard in shards if shard.write_lane is not None]
+
+
+def write_lane_stats() -> dict | None:
+    """Метрики полос записи (по всем шардам) для /api/health."""
+    lanes = write_lanes()
+    if not lanes:
+        return None
+    batches = sum(lane.batches for lane in lanes)
+    jobs = sum(lane.jobs for lane in lanes)
+    return {
+        "queued": sum(lane.stats()["queued"] for lane in lanes),
+        "batches": batches,
+        "jobs": jobs,
+        "avg_batch": round(jobs / batches, 1) if batches else 0.0,
+        "max_batch": max(lane.max_batch for lane in lanes),
+    }
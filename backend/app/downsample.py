@@ -0,0 +1,186 @@
+"""
+Прореживание временного ряда для графика прогресса (см. /api/game/progress).
+
+Зачем?
+-----
+У активного игрока десятки тысяч игр, а на графике шириной 600 пикселей
+помещается пара сотен точек. Отдавать все игры — это мегабайты JSON
+и тормозящий график; брать каждую N-ю игру — теряются рекорды и провалы.
+
+Два способа (оба — за ОДИН проход по играм в порядке времени,
+в памяти не больше пары "корзин", а не вся история):
+
+1. LTTB (Largest-Triangle-Three-Buckets, Sveinn Steinarsson, 2013)
+   Игры делятся на корзины, из каждой берётся одна точка — та, что
+   образует самый большой треугольник с уже выбранной точкой слева
+   и средней точкой следующей корзины. Форма графика сохраняется лучше всего.
+   Первая и последняя игра попадают в график всегда.
+
+2. min/max
+   Из каждой корзины берутся самая низкая и самая высокая игра
+   (в порядке времени). Проще и гарантированно сохраняет все пики.
+
+Точка — пара (x, y): x — время игры в секундах, y — очки
+(подойдёт и строка результата запроса из двух колонок).
+
+Пример:
+    sampler = LTTB(total=50_000, threshold=200)
+    for chunk in chunks:          # в порядке времени
+        sampler.extend(chunk)
+    chart = sampler.finish()      # ~200 точек
+"""
+
+from collections.abc import Iterable, Sequence
+
+Point = Sequence[float]
+
+
+class LTTB:
+    """
+    Потоковый LTTB.
+
+    Обычный LTTB видит весь массив сразу. Здесь точки приходят по одной,
+    поэтому точка корзины выбирается, когда заполнится СЛЕДУЮЩАЯ корзина
+    (нужно её среднее). В памяти — текущая и следующая корзины.
+
+    total — ожидаемое число точек (COUNT перед проходом): по нему считаются
+    границы корзин. Если точек придёт больше или меньше (игры добавились
+    во время прохода), график просто получится чуть длиннее или короче.
+    """
+
+    def __init__(self, total: int, threshold: int) -> None:
+        self.threshold = max(threshold, 3)
+        self.keep_all = total <= self.threshold
+        # Первая и последняя точки — отдельно, остальные total - 2 делятся на threshold - 2 корзин
+        self.every = (total - 2) / (self.threshold - 2) if not self.keep_all else 1.0
+        self.selected: list[Point] = []
+        self._index = 0
+        self._held: Point | None = None       # последняя пришедшая точка (может оказаться финальной)
+        self._pending: list[Point] = []       # корзина, из которой ещё не выбрали точку
+        self._filling: list[Point] = []       # корзина, которая заполняется сейчас
+        self._bucket = 0
+        self._bucket_end = int(self.every) + 1
+
+    def add(self, point: Point) -> None:
+        """Добавить следующую точку (в порядке x)."""
+        if self._held is not None:
+            self._place(self._held)
+        self._held = point
+
+    def extend(self, points: Iterable[Point]) -> None:
+        """Добавить следующие точки (в порядке x)."""
+        for point in points:
+            self.add(point)
+
+    def _place(self, point: Point) -> None:
+        index = self._index
+        self._index += 1
+        if index == 0 or self.keep_all:
+            self.selected.append(point)
+            return
+
+        # Последняя корзина забирает всё до конца (и округление границ, и игры "сверх" total)
+        if index >= self._bucket_end and self._bucket < self.threshold - 3:
+            # Корзина заполнена — теперь можно выбрать точку из предыдущей
+            if self._pending:
+                self._select(self._pending, _average(self._filling))
+            self._pending, self._filling = self._filling, []
+            self._bucket += 1
+            self._bucket_end = int((self._bucket + 1) * self.every) + 1
+        self._filling.append(point)
+
+    def _select(self, bucket: list[Point], next_point: Point) -> None:
+        """Точка корзины с наибольшим треугольником (выбранная слева, точка, среднее справа)."""
+        ax, ay = self.selected[-1][0], self.selected[-1][1]
+        cx, cy = next_point[0], next_point[1]
+        best = bucket[0]
+        best_area = -1.0
+        for point in bucket:
+            # Удвоенная площадь треугольника (сравниваем — константа не важна)
+            area = abs((ax - cx) * (point[1] - ay) - (ax - point[0]) * (cy - ay))
+            if area > best_area:
+                best, best_area = point, area
+        self.selected.append(best)
+
+    def finish(self) -> list[Point]:
+        """Закончить проход и получить выбранные точки."""
+        last = self._held
+        self._held = None
+        if last is None:
+            return self.selected
+        if self.keep_all or self._index == 0:
+            self.selected.append(last)
+            return self.selected
+
+        # Последние корзины: следующая "средняя точка" для последней — сама последняя игра
+        if self._pending:
+            self._select(self._pending, _average(self._filling) if self._filling else last)
+        if self._filling:
+            self._select(self._filling, last)
+        self._pending = self._filling = []
+        self.selected.append(last)
+        return self.selected
+
+
+class MinMax:
+    """
+    Потоковое прореживание min/max: из каждой корзины — минимум и максимум.
+
+    threshold точек = threshold // 2 корзин по две точки.
+    """
+
+    def __init__(self, total: int, threshold: int) -> None:
+        buckets = max(threshold // 2, 1)
+        self.keep_all = total <= threshold
+        self.every = max(total / buckets, 1.0)
+        self.selected: list[Point] = []
+        self._index = 0
+        self._bucket_end = self.every
+        self._low: tuple[int, Point] | None = None
+        self._high: tuple[int, Point] | None = None
+
+    def add(self, point: Point) -> None:
+        """Добавить следующую точку (в порядке x)."""
+        index = self._index
+        self._index += 1
+        if self.keep_all:
+            self.selected.append(point)
+            return
+
+        if index >= self._bucket_end:
+            self._flush()
+            while index >= self._bucket_end:
+                self._bucket_end += self.every
+        if self._low is None or point[1] < self._low[1][1]:
+            self._low = (index, point)
+        if self._high is None or point[1] > self._high[1][1]:
+            self._high = (index, point)
+
+    def extend(self, points: Iterable[Point]) -> None:
+        """Добавить следующие точки (в порядке x)."""
+        for point in points:
+            self.add(point)
+
+    def _flush(self) -> None:
+        if self._low is None:
+            return
+        # В порядке времени; одна и та же игра (корзина из одной точки) — один раз
+        for _, point in sorted({self._low[0]: self._low, self._high[0]: self._high}.values(), key=lambda item: item[0]):
+            self.selected.append(point)
+        self._low = self._high = None
+
+    def finish(self) -> list[Point]:
+        """Закончить проход и получить выбранные точки."""
+        self._flush()
+        return self.selected
+
+
+def _average(bucket: list[Point]) -> tuple[float, float]:
+    count = len(bucket)
+    return sum(point[0] for point in bucket) / count, sum(point[1] for point in bucket) / count
+
+
+SAMPLERS = {
+    "lttb": LTTB,
+    "minmax": MinMax,
+}
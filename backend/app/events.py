@@ -0,0 +1,414 @@
+"""
+Журнал событий: принятые результаты игр для аналитики и маркетинга.
+
+Проблема
+--------
+Отчёты аналитики и рассылки читали game_results напрямую — тяжёлые
+выборки по всей таблице шли в ту же базу, что и живые игроки.
+
+Решение
+-------
+Каждый принятый результат (POST /api/game/result и игры в комнатах)
+дописывается ещё и в локальный журнал событий — только в конец, ничего
+не меняется на месте. Потребители читают его через /api/events
+со своей скоростью, а OLTP таблицы их вообще не видят.
+
+Смещения (offset)
+-----------------
+У каждого события — порядковый номер в журнале: 0, 1, 2, ...
+Потребитель запоминает, до какого номера дочитал ("закоммиченное
+смещение" — номер СЛЕДУЮЩЕГО события), и продолжает с него.
+Смещения можно хранить у себя или в журнале (ConsumerOffsets).
+
+Формат на диске
+---------------
+Журнал — каталог сегментов: 00000000000000000000.log, 00000000000000052311.log, ...
+Имя сегмента — смещение его первого события. Запись:
+
+    [длина: 4 байта][crc32: 4 байта][JSON события]
+
+Когда активный сегмент дорастает до segment_bytes, он "запечатывается"
+и начинается новый. Старые сегменты удаляются целиком (retention):
+по суммарному размеру и по возрасту последнего события в сегменте.
+Активный сегмент не удаляется никогда.
+
+Чтобы не читать сегмент с начала ради события в его середине, в памяти
+держится разреженный индекс: позиция каждого INDEX_INTERVAL-го события.
+
+Оборванная запись (процесс упал во время write) ловится по длине и crc32
+и отрезается при старте.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import struct
+import time
+import zlib
+from bisect import bisect_right
+from datetime import datetime, timezone
+from pathlib import Path
+
+import sys
+sys.path.insert(0, '..')
+from settings import settings
+
+
+logger = logging.getLogger(__name__)
+
+# Длина и crc32 JSON события (big-endian)
+HEADER = struct.Struct(">II")
+
+# Каждое какое событие попадает в разреженный индекс сегмента
+INDEX_INTERVAL = 256
+
+SEGMENT_NAME = re.compile(r"^(\d{20})\.log$")
+
+
+def _json_default(value):
+    # played_at из базы — datetime
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+
+class OffsetOutOfRange(Exception):
+    """Запрошенное смещение уже удалено (retention) или ещё не существует."""
+
+
+class _Segment:
+    """Один файл журнала: события с base по base + count - 1."""
+
+    def __init__(self, directory: Path, base: int, size: int = 0) -> None:
+        self.base = base
+        self.path = directory / f"{base:020d}.log"
+        self.size = size
+        # (смещение, позиция в файле) каждого INDEX_INTERVAL-го события;
+        # None — ещё не построен (запечатанный сегмент, который никто не читал)
+        self.index: list[tuple[int, int]] | None = None
+
+
+def _scan(path: Path, base: int, verify: bool) -> tuple[int, int, list[tuple[int, int]]]:
+    """
+    Пройти сегмент по заголовкам.
+
+    Returns:
+        (событий, конец последней целой записи, разреженный индекс)
+    """
+    count = 0
+    position = 0
+    index = []
+    with open(path, "rb") as segment:
+        while True:
+            header = segment.read(HEADER.size)
+            if len(header) < HEADER.size:
+                break
+            length, crc = HEADER.unpack(header)
+            if verify:
+                payload = segment.read(length)
+                if len(payload) < length or zlib.crc32(payload) != crc:
+                    break
+            else:
+                segment.seek(length, os.SEEK_CUR)
+            if count % INDEX_INTERVAL == 0:
+                index.append((base + count, position))
+            position += HEADER.size + length
+            count += 1
+    return count, position, index
+
+
+class EventLog:
+    """
+    Журнал событий из сегментов.
+
+    Пример:
+        log = EventLog("./events")
+        log.open()                                 # восстановление после сбоя
+        offset = await log.append({"type": "game_result", ...})
+        events = log.read(from_offset=0, limit=100)  # [(смещение, JSON байты), ...]
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_bytes: int = 16 * 1024 * 1024,
+        retention_bytes: int = 0,
+        retention_seconds: float = 0.0,
+        fsync: bool = False,
+    ) -> None:
+        self.directory = Path(directory)
+        self.segment_bytes = segment_bytes
+        self.retention_bytes = retention_bytes
+        self.retention_seconds = retention_seconds
+        self.fsync = fsync
+
+        self._lock = asyncio.Lock()
+        self._file = None
+        # Читатели берут "снимок" списка — при ротации и удалении список заменяется, а не меняется
+        self._segments: list[_Segment] = []
+        self._end = 0          # Смещение следующего события
+        self._bytes = 0        # Суммарный размер сегментов
+        self._retention_checked = 0.0
+
+        # Метрики
+        self.appended = 0
+        self.errors = 0
+        self.deleted_segments = 0
+
+    # === Файлы ===
+
+    def open(self) -> None:
+        """Открыть журнал: найти сегменты, отрезать оборванный хвост последнего."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        segments = []
+        for path in self.directory.iterdir():
+            match = SEGMENT_NAME.match(path.name)
+            if match:
+                segments.append(_Segment(self.directory, int(match.group(1)), path.stat().st_size))
+        segments.sort(key=lambda segment: segment.base)
+        if not segments:
+            segments.append(_Segment(self.directory, 0))
+            segments[0].path.touch()
+
+        active = segments[-1]
+        count, good_end, index = _scan(active.path, active.base, verify=True)
+        if good_end < active.size:
+            logger.warning("Журнал событий: отрезан повреждённый хвост (%d байт)", active.size - good_end)
+            with open(active.path, "r+b") as segment:
+                segment.truncate(good_end)
+                os.fsync(segment.fileno())
+        active.size = good_end
+        active.index = index
+
+        self._segments = segments
+        self._end = active.base + count
+        self._bytes = sum(segment.size for segment in segments)
+        self._file = open(active.path, "ab")
+        self._retention()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+
+    @property
+    def start_offset(self) -> int:
+        """Смещение самого старого события, которое ещё хранится."""
+        return self._segments[0].base if self._segments else 0
+
+    @property
+    def end_offset(self) -> int:
+        """Смещение, которое получит следующее событие."""
+        return self._end
+
+    # === Запись ===
+
+    async def append(self, event: dict) -> int:
+        """
+        Дописать событие в журнал.
+
+        Returns:
+            Смещение события
+        """
+        payload = json.dumps(event, ensure_ascii=False, separators=(",", ":"), default=_json_default).encode()
+        record = HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+        async with self._lock:
+            offset = await asyncio.to_thread(self._append, record)
+        self.appended += 1
+        return offset
+
+    def _append(self, record: bytes) -> int:
+        active = self._segments[-1]
+        if active.size and active.size + len(record) > self.segment_bytes:
+            active = self._roll()
+
+        offset = self._end
+        self._file.write(record)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        if (offset - active.base) % INDEX_INTERVAL == 0:
+            active.index.append((offset, active.size))
+        active.size += len(record)
+        self._bytes += len(record)
+        # Смещение сдвигаем ПОСЛЕ записи: читатель не увидит недописанное событие
+        self._end = offset + 1
+
+        # Удаление по возрасту — не чаще раза в минуту, а не только при ротации
+        if time.monotonic() - self._retention_checked > 60:
+            self._retention()
+        return offset
+
+    def _roll(self) -> _Segment:
+        """Запечатать активный сегмент и начать новый."""
+        self.close()
+        segment = _Segment(self.directory, self._end)
+        segment.index = []
+        self._file = open(segment.path, "ab")
+        self._segments = [*self._segments, segment]
+        self._retention()
+        return segment
+
+    def _retention(self) -> None:
+        """Удалить старые запечатанные сегменты (по размеру и возрасту)."""
+        self._retention_checked = time.monotonic()
+        now = time.time()
+        while len(self._segments) > 1:
+            oldest = self._segments[0]
+            too_big = self.retention_bytes and self._bytes > self.retention_bytes
+            # mtime запечатанного сегмента — время его последнего события
+            too_old = self.retention_seconds and now - oldest.path.stat().st_mtime > self.retention_seconds
+            if not (too_big or too_old):
+                break
+            self._segments = self._segments[1:]
+            self._bytes -= oldest.size
+            oldest.path.unlink(missing_ok=True)
+            self.deleted_segments += 1
+            logger.info("Журнал событий: удалён сегмент %s", oldest.path.name)
+
+    # === Чтение ===
+
+    def read(self, from_offset: int, limit: int, max_bytes: int = 1024 * 1024) -> list[tuple[int, bytes]]:
+        """
+        Прочитать до limit событий начиная с from_offset (блокирующе — вызывать в потоке).
+
+        max_bytes ограничивает ответ по размеру (но хотя бы одно событие вернётся всегда).
+
+        Returns:
+            [(смещение, JSON события), ...] — пусто, если новых событий нет
+
+        Raises:
+            OffsetOutOfRange: from_offset меньше start_offset или больше end_offset
+        """
+        # Снимок: события до end уже целиком на диске
+        segments = self._segments
+        end = self._end
+        if from_offset < segments[0].base or from_offset > end:
+            raise OffsetOutOfRange(f"смещение {from_offset} вне журнала [{segments[0].base}, {end}]")
+
+        events: list[tuple[int, bytes]] = []
+        size = 0
+        offset = from_offset
+        number = bisect_right([segment.base for segment in segments], offset) - 1
+        while offset < end and len(events) < limit and size < max_bytes and number < len(segments):
+            segment = segments[number]
+            segment_end = segments[number + 1].base if number + 1 < len(segments) else end
+            try:
+                with open(segment.path, "rb") as file:
+                    indexed, position = self._seek(segment, offset)
+                    file.seek(position)
+                    skip = offset - indexed
+                    while offset < segment_end and len(events) < limit and size < max_bytes:
+                        length, crc = HEADER.unpack(file.read(HEADER.size))
+                        if skip:
+                            file.seek(length, os.SEEK_CUR)
+                            skip -= 1
+                            continue
+                        payload = file.read(length)
+                        if zlib.crc32(payload) != crc:
+                            raise OSError(f"журнал событий повреждён: {segment.path.name}, смещение {offset}")
+                        events.append((offset, payload))
+                        size += len(payload)
+                        offset += 1
+            except FileNotFoundError:
+                # Сегмент удалили (retention), пока мы его читали
+                if not events:
+                    raise OffsetOutOfRange(f"смещение {offset} удалено")
+                break
+            number += 1
+        return events
+
+    def _seek(self, segment: _Segment, offset: int) -> tuple[int, int]:
+        """Ближайшее проиндексированное событие не дальше offset: (смещение, позиция в файле)."""
+        if segment.index is None:
+            segment.index = _scan(segment.path, segment.base, verify=False)[2]
+        index = segment.index
+        found = bisect_right(index, (offset, float("inf"))) - 1
+        return index[found] if found >= 0 else (segment.base, 0)
+
+    def stats(self) -> dict:
+        """Размер журнала — для /api/health."""
+        return {
+            "start_offset": self.start_offset,
+            "end_offset": self.end_offset,
+            "segments": len(self._segments),
+            "bytes": self._bytes,
+            "appended": self.appended,
+            "errors": self.errors,
+            "deleted_segments": self.deleted_segments,
+        }
+
+
+class ConsumerOffsets:
+    """
+    Закоммиченные смещения потребителей: {имя: смещение следующего события}.
+
+    Хранятся в одном JSON файле рядом с сегментами; файл заменяется
+    атомарно (временный файл + rename), как позиция в spool.py.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.path = Path(directory) / "consumers.json"
+        self._offsets: dict[str, dict] = {}
+
+    def open(self) -> None:
+        try:
+            self._offsets = json.loads(self.path.read_text())
+        except (FileNotFoundError, ValueError):
+            self._offsets = {}
+
+    def get(self, consumer: str) -> dict | None:
+        """{"offset": ..., "committed_at": ...} или None, если потребитель ничего не коммитил."""
+        return self._offsets.get(consumer)
+
+    def commit(self, consumer: str, offset: int) -> dict:
+        entry = {"offset": offset, "committed_at": datetime.now(timezone.utc).isoformat()}
+        offsets = {**self._offsets, consumer: entry}
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w") as file:
+            json.dump(offsets, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp, self.path)
+        self._offsets = offsets
+        return entry
+
+
+async def publish_result(campaign: str, data: dict, result_id: int | None = None, spooled: bool = False) -> None:
+    """
+    Записать принятый результат в журнал событий.
+
+    Ошибка журнала не должна ломать сохранение игры: результат уже
+    в базе (или в spool) — только логируем.
+    """
+    if event_log is None:
+        return
+    event = {
+        "type": "game_result",
+        "accepted_at": datetime.now(timezone.utc).isoformat(),
+        "campaign": campaign,
+        "id": result_id,
+        "spooled": spooled,
+        **data,
+    }
+    try:
+        await event_log.append(event)
+    except OSError:
+        event_log.errors += 1
+        logger.exception("Журнал событий: событие не записано")
+
+
+# Общий журнал событий приложения (None — выключен через EVENTS_ENABLED=false)
+event_log: EventLog | None = None
+consumer_offsets: ConsumerOffsets | None = None
+if settings.events.enabled:
+    event_log = EventLog(
+        settings.events.dir,
+        segment_bytes=settings.events.segment_bytes,
+        retention_bytes=settings.events.retention_bytes,
+        retention_seconds=settings.events.retention_hours * 3600,
+        fsync=settings.events.fsync,
+    )
+    consumer_offsets = ConsumerOffsets(settings.events.dir)
@@ -0,0 +1,373 @@
+"""
+Ядро игровой логики "Змейки" для backend.
+
+Здесь два уровня:
+- Board и Snake — компактное поле и змейка (используются комнатами, см. rooms.py)
+- SnakeGame — одиночная игра по тем же правилам, что и useGame.js
+  (еда, бонусы с фазами, ускорение, победа по длине секретной фразы).
+  Нужна для симуляции и проверки результатов на сервере.
+
+Зачем это нужно?
+---------------
+Во frontend (useGame.js) змейка хранится как массив клеток, а проверки
+"занята ли клетка" делаются перебором: snake.some(...). Для одной игры
+в браузере это нормально, но сервер крутит сотни игр одновременно.
+
+Здесь поле хранится компактно:
+- cells — bytearray на width × height клеток: что лежит в клетке (пусто/еда/змея)
+- _free — массив свободных клеток, _slot — где клетка лежит в этом массиве
+
+Что это даёт?
+------------
+- "Занята ли клетка?" — одно чтение из bytearray, O(1)
+- "Случайная свободная клетка" (спавн еды) — случайный индекс в _free, O(1)
+- Занять/освободить клетку — swap-remove в _free, O(1)
+
+Клетка кодируется одним числом: cell = y * width + x.
+
+Константы повторяют useGame.js — правила должны совпадать.
+Совпадение проверяется скриптом scripts/check_parity.py на записанных
+из браузера играх.
+"""
+
+import random
+from array import array
+from collections import deque
+
+
+# === Константы игры (как в frontend/src/hooks/useGame.js) ===
+GRID_SIZE = 20
+INITIAL_SPEED = 150   # мс на тик в начале игры
+MIN_SPEED = 50        # мс на тик — быстрее не бывает
+SPEED_INCREMENT = 5   # ускорение за каждые 5 очков
+INITIAL_LENGTH = 3
+BONUS_SOLID_DURATION = 5000     # Фаза 1: 5 сек (5 очков)
+BONUS_BLINKING_DURATION = 5000  # Фаза 2: 5 сек (3 очка)
+BONUS_SPAWN_INTERVAL = 2        # Бонус появляется каждые N съеденной еды
+
+# Фазы бонуса
+BONUS_SOLID = "solid"
+BONUS_BLINKING = "blinking"
+
+# Статусы игры (значения как GAME_STATUS во frontend)
+PLAYING = "playing"
+GAME_OVER = "gameOver"
+VICTORY = "victory"
+
+# Направления: (dx, dy)
+DIRECTIONS = {
+    "U": (0, -1),
+    "D": (0, 1),
+    "L": (-1, 0),
+    "R": (1, 0),
+}
+
+OPPOSITE = {"U": "D", "D": "U", "L": "R", "R": "L"}
+
+# Что лежит в клетке
+EMPTY = 0
+FOOD = 1
+BONUS = 2
+BODY = 3
+
+
+def secret_phrase(player_name: str) -> str:
+    """Секретная фраза — копия getSecretPhrase() из useGame.js."""
+    return f"{player_name or 'Player'}, лови -20% в Я.Путешествиях! Код: PF-VIGODA-AH37X"
+
+
+def tick_interval_ms(score: int) -> int:
+    """
+    Интервал между тиками для текущего счёта (та же формула, что и во frontend).
+
+    150 мс в начале, минус 5 мс за каждые 5 очков, но не меньше 50 мс.
+    """
+    return max(MIN_SPEED, INITIAL_SPEED - (score // 5) * SPEED_INCREMENT)
+
+
+class Board:
+    """
+    Игровое поле с индексом занятости и списком свободных клеток.
+
+    Все операции — O(1), независимо от размера поля и длины змеек.
+    """
+
+    __slots__ = ("width", "height", "size", "cells", "_free", "_slot")
+
+    def __init__(self, width: int = GRID_SIZE, height: int | None = None) -> None:
+        self.width = width
+        self.height = height or width
+        self.size = self.width * self.height
+        self.cells = bytearray(self.size)
+        # Все клетки изначально свободны: _free[i] = i, _slot[cell] = cell
+        self._free = array("i", range(self.size))
+        self._slot = array("i", range(self.size))
+
+    def cell(self, x: int, y: int) -> int:
+        """Координаты -> номер клетки."""
+        return y * self.width + x
+
+    def xy(self, cell: int) -> tuple[int, int]:
+        """Номер клетки -> координаты (x, y)."""
+        return cell % self.width, cell // self.width
+
+    def step(self, cell: int, direction: str) -> int | None:
+        """
+        Соседняя клетка в направлении direction.
+
+        Returns:
+            Номер клетки или None, если шаг выводит за край поля (стена)
+        """
+        dx, dy = DIRECTIONS[direction]
+        x = cell % self.width + dx
+        y = cell // self.width + dy
+        if x < 0 or x >= self.width or y < 0 or y >= self.height:
+            return None
+        return y * self.width + x
+
+    def is_free(self, cell: int) -> bool:
+        return self.cells[cell] == EMPTY
+
+    def set(self, cell: int, value: int) -> None:
+        """Положить в клетку value (EMPTY освобождает клетку)."""
+        if value == EMPTY:
+            self._release(cell)
+        elif self.cells[cell] == EMPTY:
+            self._take(cell)
+        self.cells[cell] = value
+
+    def _take(self, cell: int) -> None:
+        # swap-remove: на место клетки ставим последнюю свободную
+        index = self._slot[cell]
+        last = self._free[-1]
+        self._free[index] = last
+        self._slot[last] = index
+        self._free.pop()
+        self._slot[cell] = -1
+
+    def _release(self, cell: int) -> None:
+        if self._slot[cell] != -1:
+            return
+        self._slot[cell] = len(self._free)
+        self._free.append(cell)
+
+    @property
+    def free_count(self) -> int:
+        return len(self._free)
+
+    def random_free(self, rng: random.Random) -> int | None:
+        """
+        Случайная свободная клетка (равномерно), O(1).
+
+        Returns:
+            Номер клетки или None, если поле заполнено
+        """
+        if not self._free:
+            return None
+        return self._free[rng.randrange(len(self._free))]
+
+
+class Snake:
+    """
+    Змейка на поле.
+
+    body — очередь клеток, голова в body[0].
+    growth — на сколько клеток змейка ещё вырастет (хвост не убирается).
+    """
+
+    __slots__ = (
+        "body", "direction", "pending", "growth", "alive",
+        "score", "food_eaten", "bonuses_eaten", "max_length",
+    )
+
+    def __init__(self, cells: list[int], direction: str = "R") -> None:
+        self.body: deque[int] = deque(cells)
+        self.direction = direction
+        self.pending = direction
+        self.growth = 0
+        self.alive = True
+        self.score = 0
+        self.food_eaten = 0
+        self.bonuses_eaten = 0
+        self.max_length = len(cells)
+
+    @property
+    def head(self) -> int:
+        return self.body[0]
+
+    def turn(self, direction: str) -> None:
+        """
+        Запомнить новое направление (применится на следующем тике).
+
+        Разворот на 180° запрещён — как changeDirection во frontend.
+        Сравниваем с направлением, в котором змейка РЕАЛЬНО двигалась,
+        поэтому два быстрых нажатия не развернут её в себя.
+        """
+        if direction in DIRECTIONS and direction != OPPOSITE[self.direction]:
+            self.pending = direction
+
+
+class SnakeGame:
+    """
+    Одиночная игра "Змейка" по правилам useGame.js.
+
+    Отличия от frontend — только в структурах данных:
+    - спавн еды/бонуса — случайная СВОБОДНАЯ клетка за O(1)
+      (во frontend — случайные попытки, максимум 1000)
+    - столкновение с собой — чтение клетки поля за O(1)
+      (во frontend — snake.some(...) по всему телу)
+
+    Время для бонусов идёт по "игровым часам": advance(ms).
+    tick() = step() + advance(интервал тика) — как setInterval во frontend.
+
+    spawn — откуда брать позиции еды и бонуса. По умолчанию случайно;
+    при проверке паритета — позиции, записанные в браузере.
+    """
+
+    def __init__(
+        self,
+        grid_size: int = GRID_SIZE,
+        phrase_length: int | None = None,
+        rng: random.Random | None = None,
+        spawn=None,
+    ) -> None:
+        self.board = Board(grid_size)
+        self.phrase_length = phrase_length if phrase_length is not None else len(secret_phrase("Player"))
+        self.rng = rng or random.Random()
+        self._spawn = spawn or (lambda kind, board: board.random_free(self.rng))
+
+        center = grid_size // 2
+        cells = [self.board.cell(center - i, center) for i in range(INITIAL_LENGTH)]
+        for cell in cells:
+            self.board.set(cell, BODY)
+        self.snake = Snake(cells, "R")
+
+        self.status = PLAYING
+        self.ticks = 0
+        self.food_counter = 0  # для спавна бонусов (foodEatenCountRef)
+        self.bonus: int | None = None
+        self.bonus_phase: str | None = None
+        self.bonus_age = 0
+        self.food = self._place("food", FOOD)
+
+    @property
+    def score(self) -> int:
+        return self.snake.score
+
+    def _place(self, kind: str, value: int) -> int | None:
+        cell = self._spawn(kind, self.board)
+        if cell is not None:
+            self.board.set(cell, value)
+        return cell
+
+    def turn(self, direction: str) -> None:
+        """
+        Сменить направление — как changeDirection во frontend.
+
+        Внимание: frontend сравнивает с ПОСЛЕДНИМ НАЖАТЫМ направлением,
+        а не с тем, куда змейка реально ехала. Повторяем это поведение.
+        """
+        if direction in DIRECTIONS and direction != OPPOSITE[self.snake.pending]:
+            self.snake.pending = direction
+
+    def step(self) -> str:
+        """
+        Один тик игры (gameStep во frontend).
+
+        Returns:
+            Статус игры после тика
+        """
+        if self.status != PLAYING:
+            return self.status
+
+        board, snake = self.board, self.snake
+        self.ticks += 1
+        snake.direction = snake.pending
+        new_head = board.step(snake.head, snake.direction)
+
+        # Столкновение со стеной
+        if new_head is None:
+            self.status = GAME_OVER
+            return self.status
+
+        # Столкновение с собой (хвост не считается, если змейка не растёт — он уедет)
+        content = board.cells[new_head]
+        if content == BODY and not (snake.growth == 0 and new_head == snake.body[-1]):
+            self.status = GAME_OVER
+            return self.status
+
+        # Движение змейки
+        if snake.growth > 0:
+            snake.growth -= 1
+        else:
+            board.set(snake.body.pop(), EMPTY)
+        board.set(new_head, BODY)
+        snake.body.appendleft(new_head)
+
+        # Еда
+        if content == FOOD:
+            snake.growth += 1
+            snake.score += 1
+            snake.food_eaten += 1
+            self.food_counter += 1
+            if self._grow_check():
+                return self.status
+
+            self.food = self._place("food", FOOD)
+            if self.food_counter % BONUS_SPAWN_INTERVAL == 0 and self.bonus is None:
+                self._spawn_bonus()
+
+        # Бонус (клетку уже заняла голова)
+        elif content == BONUS:
+            points = 5 if self.bonus_phase == BONUS_SOLID else 3
+            snake.growth += points
+            snake.score += points
+            snake.bonuses_eaten += 1
+            self.bonus = None
+            self.bonus_phase = None
+            self._grow_check()
+
+        return self.status
+
+    def _grow_check(self) -> bool:
+        """Обновить max_length и проверить победу (голова + все буквы фразы)."""
+        snake = self.snake
+        length = max(len(snake.body) + snake.growth, INITIAL_LENGTH)
+        snake.max_length = max(snake.max_length, length)
+        if length >= self.phrase_length + 1:
+            self.status = VICTORY
+            return True
+        return False
+
+    def _spawn_bonus(self) -> None:
+        self.bonus = self._place("bonus", BONUS)
+        self.bonus_phase = BONUS_SOLID if self.bonus is not None else None
+        self.bonus_age = 0
+
+    def blink_bonus(self) -> None:
+        """Бонус переходит в фазу мигания (3 очка вместо 5)."""
+        if self.bonus is not None:
+            self.bonus_phase = BONUS_BLINKING
+
+    def expire_bonus(self) -> None:
+        """Бонус исчезает с поля."""
+        if self.bonus is not None:
+            self.board.set(self.bonus, EMPTY)
+            self.bonus = None
+            self.bonus_phase = None
+
+    def advance(self, ms: int) -> None:
+        """Прошло ms миллисекунд игрового времени (таймеры бонуса)."""
+        if self.bonus is None:
+            return
+        self.bonus_age += ms
+        if self.bonus_age >= BONUS_SOLID_DURATION + BONUS_BLINKING_DURATION:
+            self.expire_bonus()
+        elif self.bonus_age >= BONUS_SOLID_DURATION:
+            self.blink_bonus()
+
+    def tick(self) -> str:
+        """Тик + ход игровых часов на интервал тика."""
+        self.step()
+        self.advance(tick_interval_ms(self.snake.score))
+        return self.status
@@ -27,9 +27,15 @@ import sys
 sys.path.insert(0, '..')
 from settings import settings
 
-from .database import create_db_and_tables
-from .routers import game, leaderboard
+from .campaigns import load_campaigns
+from .compression import CompressionMiddleware
+from .database import create_db_and_tables, write_lane_stats, write_lanes
+from .events import consumer_offsets, event_log
+from .profiling import ProfilingMiddleware
+from .rooms import room_manager
+from .routers import events, game, leaderboard, rooms
 from .schemas import HealthResponse
+from .spool import result_spool
 
 
 @asynccontextmanager
@@ -52,12 +58,40 @@ async def lifespan(app: FastAPI):
     
     # Создаём таблицы в базе данных (если их ещё нет)
     await create_db_and_tables()
+    # Таблицы промо-кампаний (game_results__<campaign>) и их индексы
+    await load_campaigns()
     print("✅ База данных готова")
     
+    # Единственный писатель SQLite (групповой коммит, см. database.py) — по одному на шард
+    for write_lane in write_lanes():
+        write_lane.start()
+    
+    # Журнал событий для аналитики: оборванный хвост отрезаем, старые сегменты удаляем
+    if event_log is not None:
+        event_log.open()
+        consumer_offsets.open()
+    
+    # Журнал результатов: хвост после сбоя отрезаем, недописанное переносим в базу
+    if result_spool is not None:
+        result_spool.open()
+        result_spool.start()
+    
+    # Запускаем планировщик тиков мультиплеерных комнат
+    if settings.rooms.enabled:
+        room_manager.start()
+    
     yield  # Приложение работает
     
     # === Код при ОСТАНОВКЕ приложения ===
     print("👋 Остановка Snake Game API...")
+    await room_manager.stop()
+    if result_spool is not None:
+        await result_spool.stop()
+    # После комнат: их последние результаты тоже идут через полосу записи
+    for write_lane in write_lanes():
+        await write_lane.stop()
+    if event_log is not None:
+        event_log.close()
 
 
 # === Создаём экземпляр FastAPI ===
@@ -69,9 +103,10 @@ app = FastAPI(
     ## Возможности
     
     * 🎮 Сохранение результатов игр
-    * 🏆 Таблица лидеров
+    * 🏆 Таблица лидеров (общая и по промо-кампаниям)
     * 📊 Статистика игрока
     * 📜 История игр
+    * 👥 Мультиплеерные комнаты (WebSocket)
     
     ## Как использовать
     
@@ -108,10 +143,39 @@ app.add_middleware(
 )
 
 
+# === Сжатие ответов ===
+# gzip/brotli для JSON ответов больше minimum_size байт (см. compression.py)
+# Закэшированные ответы (таблица лидеров) приходят уже сжатыми и пропускаются
+if settings.compression.enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression.minimum_size,
+        gzip_level=settings.compression.gzip_level,
+        brotli_quality=settings.compression.brotli_quality,
+    )
+
+
+# === Профилирование ===
+# Выключено по умолчанию: без PROFILING_ENABLED middleware вообще не подключается
+if settings.profiling.enabled:
+    app.add_middleware(
+        ProfilingMiddleware,
+        output_dir=settings.profiling.output_dir,
+        interval_ms=settings.profiling.interval_ms,
+        sample_rate=settings.profiling.sample_rate,
+        header_name=settings.profiling.header_name,
+        token=settings.profiling.token,
+    )
+
+
 # === Подключаем роутеры ===
 # Каждый роутер — отдельная группа эндпоинтов
 app.include_router(game.router)
 app.include_router(leaderboard.router)
+if settings.rooms.enabled:
+    app.include_router(rooms.router)
+if settings.events.enabled:
+    app.include_router(events.router)
 
 
 # === Базовые эндпоинты ===
@@ -156,4 +220,7 @@ async def health_check() -> HealthResponse:
     return HealthResponse(
         status="healthy",
         version="1.0.0",
+        write_lane=write_lane_stats(),
+        spool=result_spool.stats() if result_spool is not None else None,
+        events=event_log.stats() if event_log is not None else None,
     )
@@ -12,16 +12,25 @@ SQLAlchemy автоматически преобразует Python код в SQ
 """
 
 from datetime import datetime
-from sqlalchemy import Integer, String, DateTime, Float
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Integer, String, DateTime, Float, Index, desc
+from sqlalchemy.orm import Mapped, declared_attr, mapped_column
 from sqlalchemy.sql import func
 
 from .database import Base
 
 
-class GameResult(Base):
+# Кампания по умолчанию — её результаты лежат в исходной таблице game_results
+DEFAULT_CAMPAIGN = "default"
+
+
+class GameResultMixin:
     """
-    Модель для хранения результатов игр.
+    Колонки результата игры.
+    
+    Вынесены в mixin, потому что у каждой промо-кампании своя таблица
+    с такими же колонками (см. campaigns.py):
+    - game_results — кампания по умолчанию
+    - game_results__<campaign> — остальные кампании
     
     Таблица game_results:
     +----+-------------+-------+----------+---------------------+
@@ -38,8 +47,18 @@ class GameResult(Base):
     3. Можно строить графики прогресса
     """
     
-    # Имя таблицы в базе данных
-    __tablename__ = "game_results"
+    # Кампания, к которой относится таблица (не колонка — вся таблица одной кампании)
+    campaign = DEFAULT_CAMPAIGN
+    
+    # === Индексы ===
+    # Таблица лидеров сортирует по score, история и статистика фильтруют по игроку.
+    # Имена индексов уникальны в схеме, поэтому содержат имя таблицы.
+    @declared_attr.directive
+    def __table_args__(cls) -> tuple:
+        return (
+            Index(f"ix_{cls.__tablename__}_score", "score"),
+            Index(f"ix_{cls.__tablename__}_player", "player_name", "played_at"),
+        )
     
     # === Колонки таблицы ===
     
@@ -111,4 +130,159 @@ class GameResult(Base):
     
     def __repr__(self) -> str:
         """Строковое представление для отладки."""
-        return f"<GameResult(id={self.id}, score={self.score}, player={self.player_name})>"
+        return (
+            f"<{type(self).__name__}(id={self.id}, score={self.score}, "
+            f"player={self.player_name}, campaign={self.campaign})>"
+        )
+
+
+class GameResult(GameResultMixin, Base):
+    """Результаты игр кампании по умолчанию."""
+    
+    # Имя таблицы в базе данных
+    __tablename__ = "game_results"
+
+
+class PlayerBestMixin:
+    """
+    Лучший результат каждого игрока.
+    
+    Таблица player_bests (у кампаний — player_bests__<campaign>):
+    +-------------+------------+---------------------+
+    | player_name | best_score | played_at           |
+    +-------------+------------+---------------------+
+    | Anna        | 67         | 2025-01-20 15:45:00 |
+    | Player      | 42         | 2025-01-20 15:30:00 |
+    +-------------+------------+---------------------+
+    
+    Зачем отдельная таблица?
+    -----------------------
+    Рейтинг "по игрокам" (каждый игрок один раз) по game_results — это
+    GROUP BY player_name + MAX(score) по ВСЕЙ таблице на каждый запрос.
+    Здесь одна строка на игрока, и она обновляется только когда
+    игрок ставит новый рекорд (см. player_bests.py).
+    
+    Индекс (best_score DESC, player_name DESC) — это и есть рейтинг игроков
+    (при равном рекорде порядок определяет имя, чтобы список не "прыгал"):
+    - TOP-N игроков — первые N записей индекса
+    - соседи игрока — по k записей индекса до и после него
+    
+    Место игрока считается не здесь, а по PlayerScoreCountMixin.
+    """
+    
+    campaign = DEFAULT_CAMPAIGN
+    
+    @declared_attr.directive
+    def __table_args__(cls) -> tuple:
+        return (
+            Index(f"ix_{cls.__tablename__}_rank", desc("best_score"), desc("player_name")),
+        )
+    
+    # Имя игрока — одна строка на игрока
+    player_name: Mapped[str] = mapped_column(
+        String(50),
+        primary_key=True,
+        comment="Имя игрока"
+    )
+    
+    # Лучший результат
+    best_score: Mapped[int] = mapped_column(
+        Integer,
+        nullable=False,
+        comment="Лучший результат"
+    )
+    
+    # Когда рекорд был поставлен
+    played_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        comment="Дата и время рекорда"
+    )
+    
+    def __repr__(self) -> str:
+        """Строковое представление для отладки."""
+        return f"<{type(self).__name__}(player={self.player_name}, best={self.best_score})>"
+
+
+class PlayerBest(PlayerBestMixin, Base):
+    """Лучшие результаты игроков кампании по умолчанию."""
+    
+    __tablename__ = "player_bests"
+
+
+class PlayerScoreCountMixin:
+    """
+    Сколько игроков имеют каждый рекорд (гистограмма рекордов).
+    
+    Таблица player_score_counts (у кампаний — player_score_counts__<campaign>):
+    +------------+---------+
+    | best_score | players |
+    +------------+---------+
+    | 67         | 1       |
+    | 42         | 3       |
+    +------------+---------+
+    
+    Зачем?
+    -----
+    Место игрока = 1 + количество игроков с рекордом выше.
+    COUNT(*) по индексу рекордов проходит все записи выше игрока:
+    на 10 миллионах игроков это сотни миллисекунд для игрока из хвоста.
+    Здесь та же сумма считается по РАЗНЫМ значениям рекорда, а их
+    сотни, а не миллионы: SUM(players) WHERE best_score > X.
+    
+    Обновляется вместе с player_bests (см. player_bests.py).
+    """
+    
+    campaign = DEFAULT_CAMPAIGN
+    
+    # Значение рекорда
+    best_score: Mapped[int] = mapped_column(
+        Integer,
+        primary_key=True,
+        comment="Значение рекорда"
+    )
+    
+    # Сколько игроков с таким рекордом
+    players: Mapped[int] = mapped_column(
+        Integer,
+        nullable=False,
+        default=0,
+        comment="Количество игроков с таким рекордом"
+    )
+    
+    def __repr__(self) -> str:
+        """Строковое представление для отладки."""
+        return f"<{type(self).__name__}(best={self.best_score}, players={self.players})>"
+
+
+class PlayerScoreCount(PlayerScoreCountMixin, Base):
+    """Гистограмма рекордов кампании по умолчанию."""
+    
+    __tablename__ = "player_score_counts"
+
+
+class SpoolReceipt(Base):
+    """
+    Результаты, уже перенесённые из локального журнала в базу (см. spool.py).
+    
+    Ключ записи журнала вставляется в ОДНОЙ транзакции с самим результатом.
+    Если процесс упал после COMMIT, но до сохранения позиции журнала,
+    повторный перенос увидит ключ и не создаст дубль.
+    """
+    
+    __tablename__ = "spool_receipts"
+    
+    # Ключ записи журнала (uuid4)
+    key: Mapped[str] = mapped_column(
+        String(36),
+        primary_key=True,
+        comment="Ключ записи журнала"
+    )
+    
+    # Когда запись перенесена в базу
+    applied_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+        comment="Дата и время переноса"
+    )
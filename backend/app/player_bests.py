@@ -0,0 +1,175 @@
+"""
+Поддержка таблиц рекордов игроков (player_bests и player_score_counts, см. models.py).
+
+Когда таблицы меняются?
+----------------------
+- Новый результат (save_game_result, комнаты) — upsert_best():
+  строка игрока пишется, только если это НОВЫЙ рекорд;
+  в гистограмме игрок переезжает из старого значения рекорда в новое
+- Очистка истории (clear_history) — rebuild_bests() для этого игрока:
+  рекорд пересчитывается по оставшимся играм (или строка удаляется)
+- Таблицы появились в уже заполненной базе — rebuild_bests() / rebuild_counts()
+
+Гистограмме нужен НАСТОЯЩИЙ старый рекорд, поэтому upsert в два шага:
+1. INSERT ... ON CONFLICT DO NOTHING — первый результат игрока просто
+   вставляется; если строка уже есть, запрос ничего не меняет
+2. Иначе строка точно существует: SELECT ... FOR UPDATE блокирует её
+   (в PostgreSQL) до конца транзакции, и старый рекорд читается под
+   блокировкой, а UPDATE пишет новый, только если он больше
+
+Одновременные ПЕРВЫЕ результаты одного игрока: второй INSERT ждёт
+коммита первого и ничего не вставляет — дальше обычный путь через
+блокировку строки, гистограмма не расходится.
+Синтаксис одинаковый в SQLite и PostgreSQL, отличается только модуль диалекта.
+
+Функции синхронные (обычная Session): они выполняются внутри задач записи
+(database.run_write — вся пачка в одном run_sync). Из асинхронного кода:
+    await session.run_sync(rebuild_bests, results, bests, counts)
+"""
+
+from datetime import datetime
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from .models import GameResultMixin, PlayerBestMixin, PlayerScoreCountMixin
+
+
+# insert() с поддержкой ON CONFLICT для каждого диалекта
+_DIALECT_INSERT = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+
+def _dialect_insert(session: Session):
+    return _DIALECT_INSERT[session.get_bind().dialect.name]
+
+
+def upsert_best(
+    session: Session,
+    bests: type[PlayerBestMixin],
+    counts: type[PlayerScoreCountMixin],
+    player_name: str,
+    score: int,
+    played_at: datetime,
+) -> None:
+    """
+    Записать результат в таблицу рекордов, если он лучше текущего рекорда.
+
+    Выполняется в транзакции сессии — коммит делает вызывающий код
+    (вместе с самим результатом игры).
+    """
+    inserted = session.execute(
+        _dialect_insert(session)(bests)
+        .values(player_name=player_name, best_score=score, played_at=played_at)
+        .on_conflict_do_nothing(index_elements=[bests.player_name])
+    )
+    if inserted.rowcount:
+        _bump(session, counts, score, 1)
+        return
+
+    old_score = session.scalar(
+        select(bests.best_score)
+        .where(bests.player_name == player_name)
+        .with_for_update()
+    )
+    # Равный результат рекордом не считается — остаётся дата первого
+    if old_score >= score:
+        return
+
+    session.execute(
+        update(bests)
+        .where(bests.player_name == player_name)
+        .values(best_score=score, played_at=played_at)
+    )
+    _bump(session, counts, old_score, -1)
+    _bump(session, counts, score, 1)
+
+
+def _bump(
+    session: Session,
+    counts: type[PlayerScoreCountMixin],
+    score: int,
+    delta: int,
+) -> None:
+    """Изменить количество игроков с рекордом score на delta."""
+    statement = _dialect_insert(session)(counts).values(best_score=score, players=delta)
+    statement = statement.on_conflict_do_update(
+        index_elements=[counts.best_score],
+        set_={"players": counts.players + statement.excluded.players},
+    )
+    session.execute(statement)
+
+
+def rebuild_bests(
+    session: Session,
+    results: type[GameResultMixin],
+    bests: type[PlayerBestMixin],
+    counts: type[PlayerScoreCountMixin],
+    player_name: str | None = None,
+) -> None:
+    """
+    Пересчитать рекорды по таблице результатов.
+
+    Args:
+        session: Сессия базы данных (коммит — за вызывающим кодом)
+        results: Таблица результатов кампании
+        bests: Таблица рекордов той же кампании
+        counts: Гистограмма рекордов той же кампании
+        player_name: Только для этого игрока (None — для всех)
+    """
+    old_score = None
+    if player_name is not None:
+        old_score = session.scalar(select(bests.best_score).where(bests.player_name == player_name))
+
+    # Лучшая игра каждого игрока; при равных очках — самая ранняя
+    ranked = select(
+        results.player_name,
+        results.score,
+        results.played_at,
+        func.row_number().over(
+            partition_by=results.player_name,
+            order_by=(results.score.desc(), results.played_at),
+        ).label("place"),
+    )
+    clear = delete(bests)
+    if player_name is not None:
+        ranked = ranked.where(results.player_name == player_name)
+        clear = clear.where(bests.player_name == player_name)
+    ranked = ranked.subquery()
+
+    session.execute(clear)
+    session.execute(
+        insert(bests).from_select(
+            ["player_name", "best_score", "played_at"],
+            select(ranked.c.player_name, ranked.c.score, ranked.c.played_at).where(ranked.c.place == 1),
+        )
+    )
+
+    if player_name is None:
+        rebuild_counts(session, bests, counts)
+        return
+
+    new_score = session.scalar(select(bests.best_score).where(bests.player_name == player_name))
+    if old_score != new_score:
+        if old_score is not None:
+            _bump(session, counts, old_score, -1)
+        if new_score is not None:
+            _bump(session, counts, new_score, 1)
+
+
+def rebuild_counts(
+    session: Session,
+    bests: type[PlayerBestMixin],
+    counts: type[PlayerScoreCountMixin],
+) -> None:
+    """Пересчитать гистограмму рекордов по таблице рекордов (полный проход)."""
+    session.execute(delete(counts))
+    session.execute(
+        insert(counts).from_select(
+            ["best_score", "players"],
+            select(bests.best_score, func.count()).group_by(bests.best_score),
+        )
+    )
@@ -0,0 +1,251 @@
+"""
+Профилирование запросов и лог медленных SQL запросов.
+
+Зачем это нужно?
+---------------
+Когда на проде растёт p99 latency, непонятно, где тратится время:
+- валидация Pydantic (schemas.py)
+- создание ORM объектов GameResult
+- сама база данных
+
+Здесь два инструмента:
+
+1. Семплирующий профайлер запроса
+   Фоновый поток каждые N миллисекунд "фотографирует" стек потока,
+   который обрабатывает запрос. Результат пишется в формате
+   "folded stacks" — его понимают flamegraph.pl, inferno и speedscope:
+       main.py:root;routers/game.py:get_player_stats;... 42
+
+   Включается заголовком (X-Profile) или случайной выборкой (sample_rate).
+
+2. Лог медленных SQL запросов
+   Через события SQLAlchemy замеряем время каждого запроса.
+   Если запрос дольше порога — пишем в лог SQL, параметры и план (EXPLAIN).
+
+Оба инструмента выключены по умолчанию. Выключенный профайлер даже не
+подключается как middleware, а лог запросов не вешает обработчики событий —
+накладных расходов нет совсем.
+
+Как посмотреть flamegraph:
+    PROFILING_ENABLED=true uvicorn app.main:app
+    curl -H "X-Profile: 1" http://localhost:8000/api/leaderboard
+    # Файл появится в ./profiles — откройте его на https://www.speedscope.app
+"""
+
+import logging
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from types import FrameType
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+
+# Корень backend — чтобы в стеках были короткие пути (app/routers/game.py)
+BACKEND_ROOT = str(Path(__file__).resolve().parent.parent)
+
+
+def _frame_label(frame: FrameType) -> str:
+    """Подпись кадра стека: "путь/к/файлу.py:функция"."""
+    filename = frame.f_code.co_filename
+    if filename.startswith(BACKEND_ROOT):
+        filename = filename[len(BACKEND_ROOT) + 1:]
+    else:
+        # Для библиотек оставляем "пакет/модуль.py"
+        filename = "/".join(Path(filename).parts[-2:])
+    return f"{filename}:{frame.f_code.co_name}"
+
+
+def _fold_stack(frame: FrameType | None) -> str:
+    """Превратить стек в строку "корень;...;вершина" (формат folded stacks)."""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return ";".join(labels)
+
+
+class SamplingProfiler:
+    """
+    Семплирующий профайлер одного потока.
+
+    Почему семплирование, а не cProfile?
+    -----------------------------------
+    cProfile замедляет КАЖДЫЙ вызов функции в разы. Семплер лишь
+    периодически читает стек, поэтому замедление — единицы процентов,
+    и профиль похож на реальную картину.
+
+    Ограничение: asyncio обрабатывает все запросы в одном потоке,
+    поэтому в профиль попадут и параллельные запросы. При профилировании
+    под нагрузкой это нужно учитывать.
+    """
+
+    def __init__(self, thread_id: int, interval: float) -> None:
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.samples[_fold_stack(frame)] += 1
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> Counter[str]:
+        """Остановить профайлер и вернуть собранные стеки."""
+        self._stop.set()
+        self._thread.join()
+        return self.samples
+
+
+def write_folded(samples: Counter[str], path: Path) -> None:
+    """Записать стеки в файл формата folded stacks."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as f:
+        for stack, count in samples.most_common():
+            f.write(f"{stack} {count}\n")
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware, которое профилирует выбранные запросы.
+
+    Запрос профилируется если:
+    - пришёл заголовок header_name (и совпал token, если он задан), или
+    - сработала случайная выборка с вероятностью sample_rate
+
+    Одновременно профилируется только один запрос — второй семплер
+    на том же потоке ничего нового не покажет, только добавит нагрузку.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        output_dir: str = "./profiles",
+        interval_ms: float = 5.0,
+        sample_rate: float = 0.0,
+        header_name: str = "X-Profile",
+        token: str = "",
+    ) -> None:
+        self.app = app
+        self.output_dir = Path(output_dir)
+        self.interval = interval_ms / 1000
+        self.sample_rate = sample_rate
+        self.header_name = header_name.lower()
+        self.token = token
+        self._busy = threading.Lock()
+
+    def _should_profile(self, scope: Scope) -> bool:
+        header = Headers(scope=scope).get(self.header_name)
+        if header is not None and (not self.token or header == self.token):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        if not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        name = f"{stamp}-{scope['method']}-{_slug(scope['path'])}-{uuid.uuid4().hex[:8]}.folded"
+
+        async def send_with_profile_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", []).append((b"x-profile-id", name.encode()))
+            await send(message)
+
+        profiler = SamplingProfiler(threading.get_ident(), self.interval)
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            samples = profiler.stop()
+            self._busy.release()
+            write_folded(samples, self.output_dir / name)
+            logger.info("Профиль запроса %s %s: %s (%d семплов)",
+                        scope["method"], scope["path"], name, sum(samples.values()))
+
+
+def _slug(path: str) -> str:
+    """/api/game/stats -> api_game_stats (для имени файла)."""
+    return path.strip("/").replace("/", "_") or "root"
+
+
+# === Лог медленных SQL запросов ===
+
+# Префикс EXPLAIN для каждого диалекта
+EXPLAIN_PREFIX = {
+    "sqlite": "EXPLAIN QUERY PLAN ",
+    "postgresql": "EXPLAIN ",
+}
+
+
+def _explain(conn, statement: str, parameters) -> str:
+    """
+    Получить план запроса.
+
+    Используем ОТДЕЛЬНЫЙ курсор: у исходного курсора ещё не прочитаны
+    результаты, и повторный execute() на нём их бы затёр.
+    """
+    prefix = EXPLAIN_PREFIX.get(conn.dialect.name)
+    if prefix is None or not statement.lstrip().upper().startswith(("SELECT", "WITH", "UPDATE", "DELETE")):
+        return ""
+
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        return "\n".join(" | ".join(str(col) for col in row) for row in cursor.fetchall())
+    except Exception as exc:  # план — вспомогательная информация, запрос не ломаем
+        return f"<EXPLAIN не удался: {exc}>"
+    finally:
+        cursor.close()
+
+
+def install_slow_query_log(engine: Engine, threshold_ms: float, explain: bool = True) -> None:
+    """
+    Подключить лог медленных запросов к движку SQLAlchemy.
+
+    Args:
+        engine: Синхронный движок (для async — engine.sync_engine)
+        threshold_ms: Порог в миллисекундах
+        explain: Добавлять ли в лог план запроса
+    """
+    threshold = threshold_ms / 1000
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        if elapsed < threshold:
+            return
+
+        plan = _explain(conn, statement, parameters) if explain and not executemany else ""
+        logger.warning(
+            "Медленный запрос (%.1f ms)\nSQL: %s\nПараметры: %r%s",
+            elapsed * 1000,
+            statement,
+            parameters,
+            f"\nПлан:\n{plan}" if plan else "",
+        )
@@ -0,0 +1,59 @@
+"""
+Запись результата игры — одно место для всех источников результатов.
+
+Результаты приходят из POST /api/game/result и из мультиплеерных комнат.
+В обоих случаях нужно одно и то же в одной транзакции:
+1. INSERT в таблицу результатов кампании
+2. обновить рекорд игрока (если он побит) и гистограмму рекордов
+
+insert_result() — это "задача записи": она получает сессию и не делает
+commit. Коммитит database.run_write() — в SQLite пачкой вместе
+с другими записями (см. WriteLane). Задачи записи синхронные: вся
+пачка выполняется в одном run_sync, без переключений на каждый запрос.
+"""
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session
+
+from .campaigns import best_model, count_model
+from .models import GameResultMixin
+from .player_bests import upsert_best
+
+
+def insert_result(
+    session: Session,
+    model: type[GameResultMixin],
+    data: dict,
+) -> GameResultMixin:
+    """
+    Добавить результат игры и обновить рекорд игрока (без commit).
+
+    Args:
+        session: Сессия базы данных
+        model: Таблица результатов кампании
+        data: Поля результата (player_name, score, duration, max_length, ...)
+
+    Returns:
+        Сохранённый результат с id и played_at
+    """
+    db_result = model(**data)
+
+    # Добавляем в сессию и отправляем INSERT (транзакция ещё открыта)
+    session.add(db_result)
+    session.flush()
+
+    # id и played_at обычно приходят сразу из INSERT ... RETURNING;
+    # отдельный SELECT — только если база RETURNING не умеет
+    if inspect(db_result).unloaded:
+        session.refresh(db_result)
+
+    # Если это новый рекорд игрока — обновляем таблицу рекордов (в той же транзакции)
+    upsert_best(
+        session,
+        best_model(model.campaign),
+        count_model(model.campaign),
+        db_result.player_name,
+        db_result.score,
+        db_result.played_at,
+    )
+    return db_result
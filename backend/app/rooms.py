@@ -0,0 +1,588 @@
+"""
+Движок мультиплеерных комнат: несколько змеек на одном поле.
+
+Как это устроено?
+----------------
+- Сервер — единственный источник правды: клиенты присылают только
+  нажатия (направление), а движение, столкновения и еду считает сервер.
+- Один планировщик (asyncio задача) крутит ВСЕ комнаты процесса.
+  Комнаты лежат в куче (heap) по времени следующего тика, планировщик
+  спит до ближайшего тика, обрабатывает все "созревшие" комнаты и снова спит.
+  Никаких отдельных задач и таймеров на каждую комнату.
+- Поле — game_core.Board: проверка столкновения и спавн еды за O(1).
+- Клиентам уходит только дельта тика (куда сдвинулись головы, кто умер,
+  где появилась еда), а не всё поле. Полное состояние — один раз при старте.
+
+Протокол (JSON через WebSocket, клетки — числа y * width + x):
+    клиент -> сервер:
+        {"type": "dir", "d": "U" | "D" | "L" | "R"}
+        {"type": "start"}                              — начать игру не дожидаясь полной комнаты
+    сервер -> клиент:
+        {"type": "welcome", "room": ..., "you": sid}  — свой номер в комнате
+        {"type": "lobby", "room": ..., "players": [...]}
+        {"type": "state", ...}                         — полное состояние (старт и пересинхронизация)
+        {"type": "t", "n": тик, "m": [[sid, клетка, вырос]], "d": [sid], "f": [клетки]}
+        {"type": "end", "results": [...]}              — после него сервер закрывает сокет
+        {"type": "error", "message": ...}              — комната остановлена из-за ошибки сервера
+
+В дельте "m": клиент добавляет голову змейки sid в клетку; если "вырос" = 0,
+убирает хвост. Еда в клетке головы считается съеденной.
+
+Когда в комнате остаётся одна живая змейка (или ноль в одиночной игре),
+комната завершается, и результаты всех игроков пишутся в game_results.
+"""
+
+import asyncio
+import heapq
+import json
+import logging
+import random
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from itertools import count
+
+from .cache import leaderboard_cache
+from .database import run_write, shard_for, shards
+from .events import publish_result
+from .game_core import BODY, EMPTY, FOOD, Board, Snake, tick_interval_ms
+from .models import GameResult
+from .results import insert_result
+from .spool import db_unavailable, result_spool
+
+import sys
+sys.path.insert(0, '..')
+from settings import settings
+
+
+logger = logging.getLogger(__name__)
+
+# Статусы комнаты
+WAITING = "waiting"
+RUNNING = "running"
+FINISHED = "finished"
+
+
+class RoomError(Exception):
+    """Ошибка входа в комнату (комната заполнена, не найдена и т.д.)."""
+
+
+def _encode(message: dict) -> str:
+    # Компактный JSON без пробелов — каждый байт уходит каждому игроку каждый тик
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+class Player:
+    """
+    Игрок в комнате.
+
+    outbox — очередь исходящих сообщений. Движок только кладёт в неё,
+    отправкой в сокет занимается отдельная задача WebSocket обработчика.
+    Так медленный клиент не тормозит планировщик.
+    """
+
+    def __init__(self, sid: int, name: str, outbox_size: int) -> None:
+        self.sid = sid
+        self.name = name
+        # None в очереди — комната закрыта, сокет пора закрыть
+        self.outbox: asyncio.Queue[str | None] = asyncio.Queue(maxsize=outbox_size)
+        self.snake: Snake | None = None
+        self.died_at: float | None = None
+        self.connected = True
+
+
+class Room:
+    """Одна игровая комната: поле, змейки и счётчик тиков."""
+
+    def __init__(
+        self,
+        room_id: str,
+        grid_size: int,
+        max_players: int,
+        food_count: int,
+        tick_ms: int | None = None,
+    ) -> None:
+        self.id = room_id
+        self.board = Board(grid_size)
+        self.max_players = max_players
+        self.food_count = food_count
+        self.tick_ms = tick_ms
+        self.players: dict[int, Player] = {}
+        self.status = WAITING
+        self.tick = 0
+        self.started_at: float | None = None
+        # Итоги считаются один раз при завершении: их же видят игроки и пишет save_room_results
+        self.final_results: list[dict] | None = None
+        self.rng = random.Random()
+        self._sids = count()
+
+    # === Лобби ===
+
+    def add_player(self, name: str) -> Player:
+        if self.status != WAITING:
+            raise RoomError("Игра в комнате уже идёт")
+        if len(self.players) >= self.max_players:
+            raise RoomError("Комната заполнена")
+        player = Player(next(self._sids), name, settings.rooms.outbox_size)
+        self.players[player.sid] = player
+        player.outbox.put_nowait(_encode({"type": "welcome", "room": self.id, "you": player.sid}))
+        self.broadcast(self.lobby_message())
+        return player
+
+    def remove_player(self, player: Player) -> None:
+        player.connected = False
+        if self.status == WAITING:
+            self.players.pop(player.sid, None)
+            self.broadcast(self.lobby_message())
+        elif player.snake is not None and player.snake.alive:
+            # Вышел посреди игры — змейка погибнет на ближайшем тике
+            player.snake.alive = False
+
+    @property
+    def is_full(self) -> bool:
+        return len(self.players) >= self.max_players
+
+    def lobby_message(self) -> dict:
+        return {
+            "type": "lobby",
+            "room": self.id,
+            "players": [{"sid": p.sid, "name": p.name} for p in self.players.values()],
+        }
+
+    # === Старт ===
+
+    def start(self) -> None:
+        """Расставить змейки, разложить еду и начать игру."""
+        width, height = self.board.width, self.board.height
+        players = list(self.players.values())
+        for index, player in enumerate(players):
+            # Змейки на равных расстояниях по вертикали, чётные смотрят вправо, нечётные — влево
+            y = (index + 1) * height // (len(players) + 1)
+            if index % 2 == 0:
+                cells = [self.board.cell(x, y) for x in (2, 1, 0)]
+                direction = "R"
+            else:
+                cells = [self.board.cell(x, y) for x in (width - 3, width - 2, width - 1)]
+                direction = "L"
+            for cell in cells:
+                self.board.set(cell, BODY)
+            player.snake = Snake(cells, direction)
+
+        for _ in range(self.food_count):
+            self._spawn_food()
+
+        self.status = RUNNING
+        self.started_at = time.monotonic()
+        for player in players:
+            player.outbox.put_nowait(_encode(self.state_message(player.sid)))
+
+    def _spawn_food(self) -> int | None:
+        cell = self.board.random_free(self.rng)
+        if cell is not None:
+            self.board.set(cell, FOOD)
+        return cell
+
+    def state_message(self, sid: int) -> dict:
+        """Полное состояние комнаты (при старте и пересинхронизации)."""
+        return {
+            "type": "state",
+            "room": self.id,
+            "you": sid,
+            "w": self.board.width,
+            "h": self.board.height,
+            "n": self.tick,
+            "snakes": [
+                {
+                    "sid": p.sid,
+                    "name": p.name,
+                    "body": list(p.snake.body),
+                    "alive": p.snake.alive,
+                    "score": p.snake.score,
+                }
+                for p in self.players.values()
+                if p.snake is not None
+            ],
+            "food": [cell for cell in range(self.board.size) if self.board.cells[cell] == FOOD],
+        }
+
+    # === Игровой тик ===
+
+    @property
+    def interval(self) -> float:
+        """
+        Интервал тика в секундах.
+
+        По умолчанию ускоряется по лучшему счёту в комнате (как во frontend),
+        tick_ms фиксирует его (нужно для нагрузочного теста).
+        """
+        if self.tick_ms is not None:
+            return self.tick_ms / 1000
+        best = max((p.snake.score for p in self.players.values() if p.snake), default=0)
+        return tick_interval_ms(best) / 1000
+
+    def step(self) -> dict:
+        """
+        Один тик: все змейки ходят одновременно.
+
+        Порядок важен:
+        1. Считаем новые головы (стена -> смерть)
+        2. Освобождаем хвосты тех, кто не растёт (в клетку хвоста можно шагнуть)
+        3. Две головы в одной клетке -> обе погибают
+        4. Голова в теле любой змейки -> смерть
+        5. Двигаем выживших, едим еду, освобождаем клетки погибших
+        """
+        self.tick += 1
+        playing = [p for p in self.players.values() if p.snake is not None and p.died_at is None]
+        # Вышедшие из игры (alive=False, но ещё не убраны с поля) погибают сразу
+        dead = [p for p in playing if not p.snake.alive]
+
+        heads = self._turn(playing, dead)
+        moves, eaten = self._move(heads, dead)
+
+        now = time.monotonic()
+        for player in dead:
+            player.snake.alive = False
+            player.died_at = now
+            for cell in player.snake.body:
+                self.board.set(cell, EMPTY)
+
+        food = [cell for cell in (self._spawn_food() for _ in range(eaten)) if cell is not None]
+
+        alive = sum(1 for p in self.players.values() if p.snake is not None and p.snake.alive)
+        if alive <= (1 if len(self.players) > 1 else 0) or self.board.free_count == 0:
+            self.status = FINISHED
+
+        return {"type": "t", "n": self.tick, "m": moves, "d": [p.sid for p in dead], "f": food}
+
+    def _turn(self, playing: list[Player], dead: list[Player]) -> dict[Player, int]:
+        """Шаги 1-2: применить нажатия, посчитать новые головы, освободить хвосты."""
+        heads: dict[Player, int] = {}
+        for player in playing:
+            snake = player.snake
+            if not snake.alive:
+                continue
+            snake.direction = snake.pending
+            new_head = self.board.step(snake.head, snake.direction)
+            if new_head is None:
+                dead.append(player)
+            else:
+                heads[player] = new_head
+
+        for player in heads:
+            if player.snake.growth == 0:
+                self.board.set(player.snake.body[-1], EMPTY)
+        return heads
+
+    def _move(self, heads: dict[Player, int], dead: list[Player]) -> tuple[list[list[int]], int]:
+        """Шаги 3-5: столкновения, движение выживших и еда. Возвращает (дельту ходов, съедено)."""
+        board = self.board
+        targets: dict[int, int] = {}
+        for cell in heads.values():
+            targets[cell] = targets.get(cell, 0) + 1
+
+        moves = []
+        eaten = 0
+        for player, cell in heads.items():
+            snake = player.snake
+            grew = snake.growth > 0
+            if grew:
+                snake.growth -= 1
+            else:
+                # Хвост уже освобождён выше — убираем его из тела в любом случае
+                snake.body.pop()
+
+            if targets[cell] > 1 or board.cells[cell] == BODY:
+                dead.append(player)
+                continue
+
+            if board.cells[cell] == FOOD:
+                snake.growth += 1
+                snake.score += 1
+                snake.food_eaten += 1
+                eaten += 1
+
+            board.set(cell, BODY)
+            snake.body.appendleft(cell)
+            snake.max_length = max(snake.max_length, len(snake.body) + snake.growth)
+            moves.append([player.sid, cell, int(grew)])
+        return moves, eaten
+
+    # === Рассылка ===
+
+    def broadcast(self, message: dict) -> None:
+        """
+        Отправить сообщение всем игрокам.
+
+        JSON кодируется один раз на комнату, а не на каждого игрока.
+        Если клиент не успевает читать (очередь переполнена), выбрасываем
+        накопленные дельты и кладём полное состояние — клиент пересинхронизируется.
+        """
+        encoded = _encode(message)
+        for player in self.players.values():
+            if not player.connected:
+                continue
+            try:
+                player.outbox.put_nowait(encoded)
+            except asyncio.QueueFull:
+                while not player.outbox.empty():
+                    player.outbox.get_nowait()
+                player.outbox.put_nowait(_encode(self.state_message(player.sid)))
+
+    def close(self) -> None:
+        """
+        Закрыть сокеты игроков: после уже отправленных сообщений — None в очередь.
+
+        Если очередь переполнена, выбрасываем самые старые сообщения
+        (последним в очереди лежит итог игры — он дойдёт).
+        """
+        for player in self.players.values():
+            while True:
+                try:
+                    player.outbox.put_nowait(None)
+                    break
+                except asyncio.QueueFull:
+                    player.outbox.get_nowait()
+
+    def results(self) -> list[dict]:
+        """Итоги игры по каждому игроку (от лучшего к худшему)."""
+        end = time.monotonic()
+        rows = [
+            {
+                "sid": p.sid,
+                "player_name": p.name,
+                "score": p.snake.score,
+                "duration": round((p.died_at or end) - self.started_at, 1),
+                "max_length": p.snake.max_length,
+                "food_eaten": p.snake.food_eaten,
+                "bonuses_eaten": p.snake.bonuses_eaten,
+            }
+            for p in self.players.values()
+            if p.snake is not None
+        ]
+        return sorted(rows, key=lambda row: row["score"], reverse=True)
+
+
+class RoomManager:
+    """
+    Реестр комнат и общий планировщик тиков.
+
+    Почему одна задача на все комнаты?
+    ---------------------------------
+    Сотни asyncio задач с asyncio.sleep() каждая — это сотни таймеров
+    и переключений контекста. Куча (heapq) с временем следующего тика
+    даёт то же самое за O(log n) на тик и позволяет видеть отставание
+    (lag) всего процесса в одном месте.
+    """
+
+    def __init__(
+        self,
+        on_finish: Callable[[Room], Awaitable[None]] | None = None,
+        grid_size: int | None = None,
+        max_players: int | None = None,
+        food_count: int | None = None,
+        max_rooms: int | None = None,
+        tick_ms: int | None = None,
+    ) -> None:
+        self.on_finish = on_finish
+        self.tick_ms = tick_ms
+        self.grid_size = grid_size or settings.rooms.grid_size
+        self.max_players = max_players or settings.rooms.max_players
+        self.food_count = food_count or settings.rooms.food_count
+        self.max_rooms = max_rooms or settings.rooms.max_rooms
+        self.rooms: dict[str, Room] = {}
+        self._heap: list[tuple[float, int, Room]] = []
+        self._order = count()
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._background: set[asyncio.Task] = set()
+        # Метрики планировщика
+        self.ticks = 0
+        self.overruns = 0
+        self.max_lag = 0.0
+        self.aborted = 0
+
+    # === Жизненный цикл ===
+
+    def start(self) -> None:
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
+
+    # === Комнаты ===
+
+    def join(self, player_name: str, room_id: str | None = None) -> tuple[Room, Player]:
+        """
+        Войти в комнату.
+
+        Без room_id — в первую комнату с ожиданием и свободным местом,
+        или в новую. Когда комната заполняется, игра стартует сама.
+        """
+        if room_id is not None:
+            room = self.rooms.get(room_id)
+            if room is None:
+                raise RoomError("Комната не найдена")
+        else:
+            room = next(
+                (r for r in self.rooms.values() if r.status == WAITING and not r.is_full),
+                None,
+            ) or self.create_room()
+
+        player = room.add_player(player_name)
+        if room.is_full:
+            self.start_room(room)
+        return room, player
+
+    def create_room(self) -> Room:
+        if len(self.rooms) >= self.max_rooms:
+            raise RoomError("Все комнаты заняты, попробуйте позже")
+        room = Room(uuid.uuid4().hex[:8], self.grid_size, self.max_players, self.food_count, self.tick_ms)
+        self.rooms[room.id] = room
+        return room
+
+    def leave(self, room: Room, player: Player) -> None:
+        room.remove_player(player)
+        if room.status == WAITING and not room.players:
+            self.rooms.pop(room.id, None)
+
+    def handle(self, room: Room, player: Player, message: dict) -> None:
+        """Обработать сообщение клиента."""
+        kind = message.get("type")
+        if kind == "dir" and player.snake is not None:
+            player.snake.turn(str(message.get("d", "")))
+        elif kind == "start" and room.status == WAITING:
+            self.start_room(room)
+
+    def start_room(self, room: Room) -> None:
+        room.start()
+        self._schedule(room, asyncio.get_running_loop().time() + room.interval)
+
+    # === Планировщик ===
+
+    def _schedule(self, room: Room, due: float) -> None:
+        heapq.heappush(self._heap, (due, next(self._order), room))
+        # Новая комната может тикнуть раньше той, до которой спит планировщик
+        if self._wakeup is not None and self._heap[0][2] is room:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            now = loop.time()
+            due = self._heap[0][0]
+            if due > now:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), due - now)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            # Обрабатываем все комнаты, чей тик уже наступил
+            while self._heap and self._heap[0][0] <= now:
+                due, _, room = heapq.heappop(self._heap)
+                try:
+                    self._tick(room, due, now)
+                except Exception:
+                    # Ошибка в одной комнате не должна останавливать остальные
+                    logger.exception("Комната %s: ошибка тика, комната закрыта", room.id)
+                    self._abort(room)
+
+            # Даём отработать сокетам и остальным запросам
+            await asyncio.sleep(0)
+
+    def _tick(self, room: Room, due: float, now: float) -> None:
+        if room.status != RUNNING:
+            return
+
+        lag = now - due
+        self.max_lag = max(self.max_lag, lag)
+        self.ticks += 1
+
+        room.broadcast(room.step())
+        if room.status == FINISHED:
+            self._finish(room)
+            return
+
+        next_due = due + room.interval
+        if next_due <= now:
+            # Не успеваем: не копим долг тиков, а сдвигаем расписание
+            self.overruns += 1
+            next_due = now + room.interval
+        heapq.heappush(self._heap, (next_due, next(self._order), room))
+
+    def _finish(self, room: Room) -> None:
+        room.final_results = room.results()
+        room.broadcast({"type": "end", "results": room.final_results})
+        room.close()
+        self.rooms.pop(room.id, None)
+        if self.on_finish is not None:
+            task = asyncio.create_task(self.on_finish(room))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+
+    def _abort(self, room: Room) -> None:
+        """Закрыть сломанную комнату без записи результатов."""
+        room.status = FINISHED
+        self.aborted += 1
+        room.broadcast({"type": "error", "message": "Ошибка сервера, игра остановлена"})
+        room.close()
+        self.rooms.pop(room.id, None)
+
+    def stats(self) -> dict:
+        """Метрики для мониторинга."""
+        return {
+            "rooms": len(self.rooms),
+            "running": sum(1 for r in self.rooms.values() if r.status == RUNNING),
+            "ticks": self.ticks,
+            "overruns": self.overruns,
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "aborted": self.aborted,
+        }
+
+
+async def save_room_results(room: Room) -> None:
+    """Записать результаты завершённой комнаты в game_results (и рекорды игроков)."""
+    # Игроки комнаты могут жить в разных шардах — пишем в каждый шард своих
+    by_shard: dict[int, list[dict]] = {}
+    for row in room.final_results or room.results():
+        row = {key: value for key, value in row.items() if key != "sid"}
+        by_shard.setdefault(shard_for(row["player_name"]).index, []).append(row)
+    
+    async def save_shard(index: int, rows: list[dict]) -> None:
+        def save(session) -> list:
+            return [insert_result(session, GameResult, row) for row in rows]
+        
+        try:
+            saved = await run_write(save, shards[index])
+        except Exception as exc:
+            if result_spool is None or not db_unavailable(exc):
+                raise
+            # База недоступна — результаты комнаты в журнал (см. spool.py)
+            for row in rows:
+                record = await result_spool.append(GameResult.campaign, row)
+                await publish_result(GameResult.campaign, {**row, "played_at": record["accepted_at"]}, spooled=True)
+            return
+        for row, result in zip(rows, saved):
+            await publish_result(GameResult.campaign, {**row, "played_at": result.played_at}, result_id=result.id)
+    
+    await asyncio.gather(*(save_shard(index, rows) for index, rows in by_shard.items()))
+    leaderboard_cache.invalidate()
+
+
+# === Общий менеджер комнат процесса ===
+room_manager = RoomManager(on_finish=save_room_results)
@@ -0,0 +1,154 @@
+"""
+API роутер журнала событий (см. events.py).
+
+Для аналитики, рассылок и прочих фоновых задач: вместо выборок из
+game_results они читают принятые результаты из журнала, порциями,
+со своей скоростью. База с живыми игроками этих запросов не видит.
+
+Как читать:
+    GET /api/events?from_offset=0&max=500      -> events, next_offset
+    GET /api/events?from_offset=<next_offset>  -> следующая порция
+    ...пустой events — новых событий пока нет, повторить позже
+
+Смещение можно хранить в журнале — тогда потребитель переживёт
+перезапуск без своей базы:
+    GET /api/events?consumer=marketing         -> с закоммиченного смещения
+    PUT /api/events/consumers/marketing {"offset": <next_offset>}
+
+Все запросы — с заголовком X-Events-Token (EVENTS_TOKEN): журнал отдаёт
+результаты всех игроков, а PUT двигает смещения чужих потребителей.
+"""
+
+import asyncio
+import secrets
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, Query, Response, status
+
+from ..events import OffsetOutOfRange, consumer_offsets, event_log
+from ..schemas import ConsumerOffset, ConsumerOffsetCommit, EventsResponse
+
+import sys
+sys.path.insert(0, '../..')
+from settings import settings
+
+CONSUMER_PATTERN = r"^[A-Za-z0-9_.-]{1,64}$"
+
+
+def check_token(x_events_token: str | None = Header(default=None)) -> None:
+    """Журнал и смещения — только с верным X-Events-Token."""
+    # Настройки не дают включить журнал без токена (EventsSettings), но без него — никому
+    if not settings.events.token:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="EVENTS_TOKEN не задан")
+    if x_events_token is None or not secrets.compare_digest(
+        x_events_token.encode(), settings.events.token.encode()
+    ):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Нужен заголовок X-Events-Token")
+
+
+router = APIRouter(
+    prefix="/api/events",
+    tags=["events"],
+    dependencies=[Depends(check_token)],
+)
+
+
+def _consumer_offset(consumer: str) -> ConsumerOffset:
+    committed = consumer_offsets.get(consumer)
+    offset = committed["offset"] if committed else None
+    return ConsumerOffset(
+        consumer=consumer,
+        offset=offset,
+        committed_at=committed["committed_at"] if committed else None,
+        lag=event_log.end_offset - (offset if offset is not None else event_log.start_offset),
+    )
+
+
+@router.get(
+    "",
+    response_model=EventsResponse,
+    summary="Прочитать журнал событий",
+    description="Принятые результаты игр начиная со смещения from_offset (не больше max).",
+)
+async def read_events(
+    from_offset: int | None = Query(default=None, ge=0),
+    limit: int = Query(default=100, ge=1, alias="max"),
+    consumer: str | None = Query(default=None, pattern=CONSUMER_PATTERN),
+) -> Response:
+    """
+    Порция событий журнала.
+
+    События лежат в файле уже готовым JSON — ответ склеивается из них
+    как есть, без разбора и повторной сериализации.
+
+    Args:
+        from_offset: С какого смещения читать (по умолчанию — закоммиченное
+            смещение consumer, а без него — самое старое событие)
+        limit: Максимум событий (не больше EVENTS_MAX_BATCH)
+        consumer: Имя потребителя (только чтобы взять его смещение)
+
+    Returns:
+        События и next_offset для следующего запроса
+
+    Raises:
+        HTTPException 410: События удалены (retention) — начните с start_offset
+        HTTPException 400: Смещение больше end_offset
+    """
+    if from_offset is None:
+        committed = consumer_offsets.get(consumer) if consumer else None
+        from_offset = committed["offset"] if committed else event_log.start_offset
+    limit = min(limit, settings.events.max_batch)
+
+    try:
+        events = await asyncio.to_thread(event_log.read, from_offset, limit)
+    except OffsetOutOfRange as exc:
+        if from_offset < event_log.start_offset:
+            raise HTTPException(
+                status_code=status.HTTP_410_GONE,
+                detail=f"{exc}; самое старое событие — {event_log.start_offset}",
+            )
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+    next_offset = events[-1][0] + 1 if events else from_offset
+    body = b'{"events":[%s],"next_offset":%d,"start_offset":%d,"end_offset":%d}' % (
+        b",".join(b'{"offset":%d,"event":%s}' % (offset, payload) for offset, payload in events),
+        next_offset,
+        event_log.start_offset,
+        event_log.end_offset,
+    )
+    return Response(content=body, media_type="application/json")
+
+
+@router.get(
+    "/consumers/{consumer}",
+    response_model=ConsumerOffset,
+    summary="Смещение потребителя",
+)
+async def get_consumer_offset(
+    consumer: str = Path(pattern=CONSUMER_PATTERN),
+) -> ConsumerOffset:
+    """Закоммиченное смещение потребителя и его отставание (lag)."""
+    return _consumer_offset(consumer)
+
+
+@router.put(
+    "/consumers/{consumer}",
+    response_model=ConsumerOffset,
+    summary="Закоммитить смещение потребителя",
+)
+async def commit_consumer_offset(
+    body: ConsumerOffsetCommit,
+    consumer: str = Path(pattern=CONSUMER_PATTERN),
+) -> ConsumerOffset:
+    """
+    Запомнить, до какого места потребитель дочитал журнал.
+
+    offset — смещение СЛЕДУЮЩЕГО непрочитанного события (обычно next_offset
+    последнего ответа /api/events), не больше end_offset.
+    """
+    if body.offset > event_log.end_offset:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Смещение {body.offset} больше end_offset {event_log.end_offset}",
+        )
+    await asyncio.to_thread(consumer_offsets.commit, consumer, body.offset)
+    return _consumer_offset(consumer)
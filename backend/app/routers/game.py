@@ -12,19 +12,46 @@ API роутер для игровых операций.
 Это делает код организованным и легко поддерживаемым.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select, func
+from datetime import datetime, timezone
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import Float, delete, select, func
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.functions import FunctionElement
 
-from ..database import get_async_session
-from ..models import GameResult
+from ..cache import leaderboard_cache, progress_cache
+from ..campaigns import (
+    CampaignError,
+    best_model,
+    count_model,
+    ensure_campaign,
+    get_campaign_model,
+    missing_table,
+    refresh_campaigns,
+)
+from ..database import get_player_session, run_write, shard_for
+from ..downsample import SAMPLERS
+from ..events import publish_result
+from ..models import DEFAULT_CAMPAIGN, GameResultMixin
+from ..player_bests import rebuild_bests
+from ..results import insert_result
+from ..spool import db_unavailable, result_spool
 from ..schemas import (
     GameResultCreate,
     GameResultResponse,
     PlayerStats,
     MessageResponse,
+    ProgressPoint,
+    ProgressResponse,
 )
 
+# Сколько строк истории читать из базы за раз при построении графика
+PROGRESS_CHUNK = 5000
+
 # Создаём роутер с префиксом /api/game
 # Все эндпоинты в этом файле будут начинаться с /api/game
 router = APIRouter(
@@ -42,19 +69,31 @@ router = APIRouter(
 )
 async def save_game_result(
     result: GameResultCreate,
-    session: AsyncSession = Depends(get_async_session),
+    response: Response,
 ) -> GameResultResponse:
     """
     Сохранить результат игры.
     
     Вызывается frontend'ом когда игра заканчивается (Game Over).
+    Результат попадает в таблицу своей кампании (result.campaign);
+    таблица новой кампании создаётся при первом результате.
+    
+    Запись идёт через run_write(): в SQLite одновременные результаты
+    коммитятся одной транзакцией (см. WriteLane в database.py).
+    
+    Если база недоступна (нет соединения, таймаут, SQLite занята),
+    результат пишется в локальный журнал (spool.py)
+    и ответ — 202 Accepted: id ещё нет, в базе результат появится позже.
+    
+    Принятый результат (в базе или в spool) попадает и в журнал событий
+    для аналитики (events.py, /api/events).
     
     Args:
         result: Данные о результате игры (очки, время, статистика)
-        session: Сессия базы данных (инжектируется автоматически)
+        response: Ответ (для смены статуса на 202)
     
     Returns:
-        Сохранённый результат с присвоенным ID
+        Сохранённый результат с присвоенным ID (или принятый в журнал)
     
     Пример запроса:
         POST /api/game/result
@@ -63,29 +102,55 @@ async def save_game_result(
             "duration": 125.5,
             "max_length": 10,
             "food_eaten": 15,
-            "bonuses_eaten": 2
+            "bonuses_eaten": 2,
+            "campaign": "promo2025"
         }
     """
-    # Создаём новую запись в базе данных
-    db_result = GameResult(
-        player_name=result.player_name,
-        score=result.score,
-        duration=result.duration,
-        max_length=result.max_length,
-        food_eaten=result.food_eaten,
-        bonuses_eaten=result.bonuses_eaten,
-    )
-    
-    # Добавляем в сессию и сохраняем
-    session.add(db_result)
-    await session.commit()
+    data = result.model_dump(exclude={"campaign"})
+    try:
+        db_result = await _write_result(result.campaign, data)
+    except CampaignError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    except Exception as exc:
+        # Ошибки схемы и ограничений повтор не исправит — в журнал только "база недоступна"
+        if result_spool is None or not db_unavailable(exc):
+            raise
+        # База недоступна — не теряем игру: журнал на диске, запись в базу позже
+        record = await result_spool.append(result.campaign, data)
+        await publish_result(result.campaign, {**data, "played_at": record["accepted_at"]}, spooled=True)
+        response.status_code = status.HTTP_202_ACCEPTED
+        return GameResultResponse(
+            **data,
+            id=None,
+            played_at=record["accepted_at"],
+            campaign=result.campaign,
+            spooled=True,
+        )
     
-    # Обновляем объект (чтобы получить сгенерированный id и played_at)
-    await session.refresh(db_result)
+    # Таблица лидеров изменилась — сбрасываем кэш
+    leaderboard_cache.invalidate()
+    # Для аналитики — в журнал событий (см. events.py)
+    await publish_result(result.campaign, {**data, "played_at": db_result.played_at}, result_id=db_result.id)
     
     return db_result
 
 
+async def _write_result(campaign: str, data: dict) -> GameResultMixin:
+    """Записать результат в таблицу кампании (через полосу записи шарда игрока)."""
+    model = await ensure_campaign(campaign)
+    try:
+        return await run_write(
+            lambda session: insert_result(session, model, data),
+            shard_for(data["player_name"]),
+        )
+    except DBAPIError as exc:
+        # Кампанию отключили из другого процесса — таблицы уже нет
+        if campaign == DEFAULT_CAMPAIGN or not missing_table(exc):
+            raise
+        await refresh_campaigns(force=True)
+        raise CampaignError(f"Кампания '{campaign}' не найдена") from exc
+
+
 @router.get(
     "/stats",
     response_model=PlayerStats,
@@ -94,7 +159,8 @@ async def save_game_result(
 )
 async def get_player_stats(
     player_name: str = "Player",
-    session: AsyncSession = Depends(get_async_session),
+    model: type[GameResultMixin] = Depends(get_campaign_model),
+    session: AsyncSession = Depends(get_player_session),
 ) -> PlayerStats:
     """
     Получить статистику игрока.
@@ -107,21 +173,22 @@ async def get_player_stats(
     
     Args:
         player_name: Имя игрока (по умолчанию "Player")
-        session: Сессия базы данных
+        model: Таблица кампании (?campaign=..., по умолчанию default)
+        session: Сессия шарда игрока (без шардирования — единственной базы)
     
     Returns:
         Статистика игрока
     """
     # Запрос с агрегацией (считаем сумму, среднее, максимум)
     query = select(
-        func.count(GameResult.id).label("total_games"),
-        func.max(GameResult.score).label("best_score"),
-        func.avg(GameResult.score).label("average_score"),
-        func.sum(GameResult.duration).label("total_time"),
-        func.sum(GameResult.food_eaten).label("total_food"),
-        func.sum(GameResult.bonuses_eaten).label("total_bonuses"),
-        func.max(GameResult.max_length).label("longest_snake"),
-    ).where(GameResult.player_name == player_name)
+        func.count(model.id).label("total_games"),
+        func.max(model.score).label("best_score"),
+        func.avg(model.score).label("average_score"),
+        func.sum(model.duration).label("total_time"),
+        func.sum(model.food_eaten).label("total_food"),
+        func.sum(model.bonuses_eaten).label("total_bonuses"),
+        func.max(model.max_length).label("longest_snake"),
+    ).where(model.player_name == player_name)
     
     result = await session.execute(query)
     row = result.one_or_none()
@@ -160,7 +227,8 @@ async def get_player_stats(
 async def get_game_history(
     player_name: str = "Player",
     limit: int = 10,
-    session: AsyncSession = Depends(get_async_session),
+    model: type[GameResultMixin] = Depends(get_campaign_model),
+    session: AsyncSession = Depends(get_player_session),
 ) -> list[GameResultResponse]:
     """
     Получить историю игр.
@@ -168,6 +236,7 @@ async def get_game_history(
     Args:
         player_name: Имя игрока
         limit: Максимальное количество записей (по умолчанию 10)
+        model: Таблица кампании
         session: Сессия базы данных
     
     Returns:
@@ -177,9 +246,9 @@ async def get_game_history(
     limit = min(limit, 100)
     
     query = (
-        select(GameResult)
-        .where(GameResult.player_name == player_name)
-        .order_by(GameResult.played_at.desc())
+        select(model)
+        .where(model.player_name == player_name)
+        .order_by(model.played_at.desc())
         .limit(limit)
     )
     
@@ -189,6 +258,125 @@ async def get_game_history(
     return games
 
 
+@router.get(
+    "/progress",
+    response_model=ProgressResponse,
+    summary="График прогресса",
+    description="Очки игрока по времени, прореженные до заданного числа точек (LTTB или min/max).",
+)
+async def get_progress(
+    request: Request,
+    player_name: str = "Player",
+    points: int = 200,
+    method: Literal["lttb", "minmax"] = "lttb",
+    model: type[GameResultMixin] = Depends(get_campaign_model),
+    session: AsyncSession = Depends(get_player_session),
+) -> Response:
+    """
+    График прогресса игрока: очки по времени.
+    
+    Все игры игрока читаются ОДНИМ потоковым проходом по индексу
+    (player_name, played_at) — уже в порядке времени, без сортировки —
+    и сразу прореживаются до points точек (см. downsample.py).
+    В памяти держится пара корзин, а не вся история.
+    
+    Ответ кэшируется по игроку: в ключе число игр и время последней
+    игры (один запрос по тому же индексу), так что новая игра сама
+    "сбрасывает" график этого игрока, не трогая графики остальных.
+    
+    Args:
+        request: HTTP запрос (нужен заголовок Accept-Encoding)
+        player_name: Имя игрока
+        points: Сколько точек нужно графику (3-1000)
+        method: lttb — форма графика, minmax — все пики и провалы
+        model: Таблица кампании
+        session: Сессия шарда игрока
+    
+    Returns:
+        Точки графика в порядке времени
+    """
+    points = max(3, min(points, 1000))
+    
+    # Сколько игр и когда последняя — это и размер корзин, и версия графика
+    summary_query = (
+        select(func.count(), func.max(model.played_at))
+        .where(model.player_name == player_name)
+    )
+    total_games, last_played_at = (await session.execute(summary_query)).one()
+    
+    cache_key = ("progress", model.campaign, player_name, points, method, total_games, last_played_at)
+    cache_version = progress_cache.version
+    cached = progress_cache.get(cache_key)
+    if cached is None:
+        progress = await _build_progress(session, model, player_name, points, method, total_games)
+        cached = progress_cache.put(
+            cache_key,
+            progress.model_dump_json().encode(),
+            cache_version,
+        )
+    
+    return cached.to_response(request.headers.get("accept-encoding"))
+
+
+class epoch_seconds(FunctionElement):
+    """
+    Время в секундах Unix — считается в базе.
+    
+    Разбор даты из строки (SQLite хранит даты текстом) на каждую из
+    десятков тысяч игр занимает больше, чем сам проход по индексу.
+    В базе это одна арифметическая операция на строку.
+    """
+    
+    type = Float()
+    inherit_cache = True
+
+
+@compiles(epoch_seconds)
+def _epoch_seconds_default(element, compiler, **kw):
+    # PostgreSQL: EXTRACT возвращает numeric — приводим к double precision
+    return f"CAST(EXTRACT(EPOCH FROM {compiler.process(element.clauses, **kw)}) AS DOUBLE PRECISION)"
+
+
+@compiles(epoch_seconds, "sqlite")
+def _epoch_seconds_sqlite(element, compiler, **kw):
+    # julianday — дни от юлианской эпохи; 2440587.5 — это 1970-01-01
+    return f"((julianday({compiler.process(element.clauses, **kw)}) - 2440587.5) * 86400.0)"
+
+
+async def _build_progress(
+    session: AsyncSession,
+    model: type[GameResultMixin],
+    player_name: str,
+    points: int,
+    method: str,
+    total_games: int,
+) -> ProgressResponse:
+    """Потоковый проход по играм игрока с прореживанием (без кэша)."""
+    sampler = SAMPLERS[method](total_games, points)
+    
+    query = (
+        select(epoch_seconds(model.played_at), model.score)
+        .where(model.player_name == player_name)
+        .order_by(model.played_at)
+        .execution_options(yield_per=PROGRESS_CHUNK)
+    )
+    result = await session.stream(query)
+    async for partition in result.partitions():
+        sampler.extend(partition)
+    
+    return ProgressResponse(
+        player_name=player_name,
+        campaign=model.campaign,
+        method=method,
+        total_games=total_games,
+        points=[
+            # julianday в SQLite точен до миллисекунд — округляем "хвост" float
+            ProgressPoint(played_at=datetime.fromtimestamp(round(x, 3), timezone.utc), score=score)
+            for x, score in sampler.finish()
+        ],
+    )
+
+
 @router.delete(
     "/history",
     response_model=MessageResponse,
@@ -197,28 +385,33 @@ async def get_game_history(
 )
 async def clear_history(
     player_name: str = "Player",
-    session: AsyncSession = Depends(get_async_session),
+    model: type[GameResultMixin] = Depends(get_campaign_model),
 ) -> MessageResponse:
     """
     Очистить историю игр.
     
-    ⚠️ Удаляет ВСЕ результаты игрока. Действие необратимо!
+    ⚠️ Удаляет ВСЕ результаты игрока в кампании. Действие необратимо!
     
     Args:
         player_name: Имя игрока
-        session: Сессия базы данных
+        model: Таблица кампании
     
     Returns:
         Сообщение об успехе
     """
-    from sqlalchemy import delete
+    def clear(session: Session) -> int:
+        # Удаляем все записи игрока
+        query = delete(model).where(model.player_name == player_name)
+        result = session.execute(query)
+        
+        # Рекорд игрока пересчитываем по оставшимся играм (после удаления — строки не будет)
+        rebuild_bests(session, model, best_model(model.campaign), count_model(model.campaign), player_name)
+        return result.rowcount
     
-    # Удаляем все записи игрока
-    query = delete(GameResult).where(GameResult.player_name == player_name)
-    result = await session.execute(query)
-    await session.commit()
+    deleted_count = await run_write(clear, shard_for(player_name))
     
-    deleted_count = result.rowcount
+    if deleted_count:
+        leaderboard_cache.invalidate()
     
     return MessageResponse(
         message=f"Удалено {deleted_count} записей",
@@ -2,20 +2,44 @@
 API роутер для таблицы лидеров.
 
 Таблица лидеров показывает 10 лучших результатов за все время.
+Два режима:
+- mode=games (по умолчанию) — лучшие ИГРЫ, один игрок может занять несколько мест
+- mode=players — лучшие ИГРОКИ, каждый один раз (таблица рекордов player_bests)
+
+У каждой промо-кампании своя таблица лидеров: ?campaign=promo2025
+(по умолчанию — default, см. campaigns.py).
+
+С шардированием (см. database.py) каждый игрок лежит в одном шарде,
+и таблица лидеров собирается "scatter-gather":
+- один и тот же запрос уходит во все шарды одновременно (asyncio.gather)
+- TOP-N каждого шарда уже отсортирован — общий TOP-N это слияние
+  отсортированных списков через кучу (heapq.merge), первые N записей
+- количества (игр, игроков, игроков выше рекорда) — суммы по шардам
+Без шардирования шард один, и всё сводится к обычному запросу.
 """
 
-from fastapi import APIRouter, Depends
-from sqlalchemy import select, func, distinct
+import asyncio
+import heapq
+from collections.abc import Awaitable, Callable
+from itertools import islice
+from typing import Literal, TypeVar
+
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy import select, func, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..database import get_async_session
-from ..models import GameResult
-from ..schemas import LeaderboardEntry, LeaderboardResponse
+from ..cache import leaderboard_cache
+from ..campaigns import active_campaigns, best_model, count_model, get_campaign_model
+from ..database import get_shard_sessions, shard_for
+from ..models import GameResultMixin, PlayerBestMixin, PlayerScoreCountMixin
+from ..schemas import AroundResponse, LeaderboardEntry, LeaderboardResponse
 
 import sys
 sys.path.insert(0, '../..')
 from settings import settings
 
+T = TypeVar("T")
+
 # Создаём роутер
 router = APIRouter(
     prefix="/api/leaderboard",
@@ -30,18 +54,30 @@ router = APIRouter(
     description="Возвращает TOP-10 лучших результатов за всё время.",
 )
 async def get_leaderboard(
+    request: Request,
     limit: int = None,
-    session: AsyncSession = Depends(get_async_session),
-) -> LeaderboardResponse:
+    mode: Literal["games", "players"] = "games",
+    model: type[GameResultMixin] = Depends(get_campaign_model),
+    sessions: list[AsyncSession] = Depends(get_shard_sessions),
+) -> Response:
     """
     Получить таблицу лидеров.
     
-    Возвращает TOP-N лучших результатов за всё время (без группировки по игроку).
+    mode=games: TOP-N лучших результатов за всё время (без группировки по игроку).
     Один игрок может появляться несколько раз если у него несколько хороших игр.
     
+    mode=players: TOP-N игроков по личному рекорду — каждый игрок один раз.
+    Читается из таблицы рекордов по индексу best_score DESC, без GROUP BY.
+    
+    Ответ кэшируется вместе со сжатыми версиями (см. cache.py):
+    пока не появится новый результат, база и сжатие не трогаются.
+    
     Args:
+        request: HTTP запрос (нужен заголовок Accept-Encoding)
         limit: Количество записей (по умолчанию из настроек)
-        session: Сессия базы данных
+        mode: games — лучшие игры, players — лучшие игроки
+        model: Таблица кампании (?campaign=..., по умолчанию default)
+        sessions: Сессии всех шардов (без шардирования — одна)
     
     Returns:
         Таблица лидеров с метаинформацией
@@ -50,18 +86,56 @@ async def get_leaderboard(
     if limit is None:
         limit = settings.game.leaderboard_size
     
-    # Ограничиваем максимальное значение
-    limit = min(limit, 100)
+    # Ограничиваем: от 1 до 100 (islice не принимает отрицательный limit,
+    # а LIMIT -1 в SQLite — это "без ограничения")
+    limit = max(1, min(limit, 100))
+    
+    # Версию запоминаем ДО запроса в базу (см. ResponseCache.put)
+    cache_key = ("leaderboard", model.campaign, mode, limit)
+    cache_version = leaderboard_cache.version
+    cached = leaderboard_cache.get(cache_key)
+    if cached is None:
+        if mode == "players":
+            leaderboard = await _build_player_leaderboard(sessions, model, limit)
+        else:
+            leaderboard = await _build_leaderboard(sessions, model, limit)
+        cached = leaderboard_cache.put(
+            cache_key,
+            leaderboard.model_dump_json().encode(),
+            cache_version,
+        )
     
-    # Просто берём TOP-N по очкам (без группировки)
+    return cached.to_response(request.headers.get("accept-encoding"))
+
+
+async def _gather(
+    sessions: list[AsyncSession],
+    query: Callable[[AsyncSession], Awaitable[T]],
+) -> list[T]:
+    """Выполнить запрос во всех шардах одновременно (результаты — в порядке шардов)."""
+    return await asyncio.gather(*(query(session) for session in sessions))
+
+
+async def _scalars(session: AsyncSession, query) -> list:
+    return (await session.execute(query)).scalars().all()
+
+
+async def _build_leaderboard(
+    sessions: list[AsyncSession],
+    model: type[GameResultMixin],
+    limit: int,
+) -> LeaderboardResponse:
+    """Собрать таблицу лидеров кампании из базы данных (без кэша)."""
+    # Просто берём TOP-N по очкам (без группировки) — в каждом шарде
     query = (
-        select(GameResult)
-        .order_by(GameResult.score.desc())
+        select(model)
+        .order_by(model.score.desc())
         .limit(limit)
     )
+    per_shard = await _gather(sessions, lambda session: _scalars(session, query))
     
-    result = await session.execute(query)
-    games = result.scalars().all()
+    # Общий TOP-N — слияние отсортированных TOP-N шардов
+    games = list(islice(heapq.merge(*per_shard, key=lambda game: game.score, reverse=True), limit))
     
     # Формируем записи таблицы лидеров с рангом (местом)
     entries = [
@@ -74,66 +148,270 @@ async def get_leaderboard(
         for idx, game in enumerate(games)
     ]
     
-    # === Считаем общую статистику ===
+    total_games, total_players = await _totals(sessions, model)
     
-    # Общее количество игр
-    total_games_query = select(func.count(GameResult.id))
-    total_games_result = await session.execute(total_games_query)
-    total_games = total_games_result.scalar() or 0
+    return LeaderboardResponse(
+        entries=entries,
+        total_games=total_games,
+        total_players=total_players,
+        campaign=model.campaign,
+    )
+
+
+async def _build_player_leaderboard(
+    sessions: list[AsyncSession],
+    model: type[GameResultMixin],
+    limit: int,
+) -> LeaderboardResponse:
+    """Собрать таблицу лидеров по игрокам (каждый игрок один раз)."""
+    bests = best_model(model.campaign)
     
-    # Количество уникальных игроков
-    total_players_query = select(func.count(distinct(GameResult.player_name)))
-    total_players_result = await session.execute(total_players_query)
-    total_players = total_players_result.scalar() or 0
+    # Первые N записей индекса (best_score DESC, player_name DESC) — в каждом шарде
+    query = (
+        select(bests)
+        .order_by(bests.best_score.desc(), bests.player_name.desc())
+        .limit(limit)
+    )
+    per_shard = await _gather(sessions, lambda session: _scalars(session, query))
+    
+    # Игрок живёт в одном шарде — слияние не даёт повторов
+    players = list(islice(heapq.merge(*per_shard, key=_rank_key, reverse=True), limit))
+    
+    # Равные рекорды — одно место (1, 2, 2, 4): все, кто выше, уже в списке
+    entries = []
+    for idx, player in enumerate(players):
+        tied = entries and entries[-1].score == player.best_score
+        entries.append(
+            LeaderboardEntry(
+                rank=entries[-1].rank if tied else idx + 1,
+                player_name=player.player_name,
+                score=player.best_score,
+                played_at=player.played_at,
+            )
+        )
+    
+    total_games, total_players = await _totals(sessions, model)
     
     return LeaderboardResponse(
         entries=entries,
         total_games=total_games,
         total_players=total_players,
+        campaign=model.campaign,
+        mode="players",
     )
 
 
+def _rank_key(player: PlayerBestMixin) -> tuple[int, str]:
+    """Ключ рейтинга игроков — как в индексе (best_score, player_name)."""
+    return player.best_score, player.player_name
+
+
+async def _totals(
+    sessions: list[AsyncSession],
+    model: type[GameResultMixin],
+) -> tuple[int, int]:
+    """Общее количество игр и уникальных игроков (суммы по шардам)."""
+    total_games_query = select(func.count(model.id))
+    
+    # Сумма по гистограмме рекордов — вместо COUNT(DISTINCT player_name)
+    counts = count_model(model.campaign)
+    total_players_query = select(func.sum(counts.players))
+    
+    async def totals(session: AsyncSession) -> tuple[int, int]:
+        total_games = (await session.execute(total_games_query)).scalar() or 0
+        total_players = (await session.execute(total_players_query)).scalar() or 0
+        return total_games, total_players
+    
+    per_shard = await _gather(sessions, totals)
+    return sum(games for games, _ in per_shard), sum(players for _, players in per_shard)
+
+
 @router.get(
     "/position",
     summary="Узнать позицию игрока",
-    description="Возвращает место игрока в рейтинге по его лучшему результату.",
+    description="Возвращает место игрока среди игроков по его лучшему результату.",
 )
 async def get_player_position(
     player_name: str = "Player",
-    session: AsyncSession = Depends(get_async_session),
+    model: type[GameResultMixin] = Depends(get_campaign_model),
+    sessions: list[AsyncSession] = Depends(get_shard_sessions),
 ) -> dict:
     """
-    Узнать позицию игрока в таблице лидеров.
+    Узнать позицию игрока в таблице лидеров (кампании).
+    
+    Место считается среди ИГРОКОВ (как в mode=players):
+    1 + количество игроков с рекордом выше. Равные рекорды — одно место.
+    Рекорд ищется по первичному ключу (в шарде игрока),
+    количество — по гистограммам рекордов всех шардов (сумма).
     """
-    # Находим лучший результат игрока
-    best_score_query = (
-        select(func.max(GameResult.score))
-        .where(GameResult.player_name == player_name)
-    )
-    best_score_result = await session.execute(best_score_query)
-    best_score = best_score_result.scalar()
+    bests = best_model(model.campaign)
+    player = await sessions[shard_for(player_name).index].get(bests, player_name)
     
-    if best_score is None:
+    if player is None:
         return {
             "player_name": player_name,
+            "campaign": model.campaign,
             "position": None,
             "best_score": None,
             "message": "Игрок ещё не играл",
         }
     
-    # Считаем сколько результатов лучше
-    better_results_query = (
-        select(func.count(GameResult.id))
-        .where(GameResult.score > best_score)
-    )
-    better_result = await session.execute(better_results_query)
-    better_count = better_result.scalar() or 0
-    
-    position = better_count + 1
+    ranks = await _shard_ranks(sessions, count_model(model.campaign), {player.best_score})
+    position = ranks[player.best_score]
     
     return {
         "player_name": player_name,
+        "campaign": model.campaign,
         "position": position,
-        "best_score": best_score,
-        "message": f"Вы на {position} месте с результатом {best_score}",
+        "best_score": player.best_score,
+        "message": f"Вы на {position} месте с результатом {player.best_score}",
     }
+
+
+@router.get(
+    "/around",
+    response_model=AroundResponse,
+    summary="Соседи игрока в рейтинге",
+    description="Возвращает k игроков выше и k игроков ниже игрока (по личным рекордам).",
+)
+async def get_leaderboard_around(
+    player_name: str = "Player",
+    k: int = 5,
+    model: type[GameResultMixin] = Depends(get_campaign_model),
+    sessions: list[AsyncSession] = Depends(get_shard_sessions),
+) -> AroundResponse:
+    """
+    "Окно" рейтинга вокруг игрока: k соседей сверху, сам игрок, k снизу.
+    
+    Рейтинг — индекс (best_score DESC, player_name DESC) таблицы рекордов.
+    Ключ игрока — пара (best_score, player_name), и соседи — это записи
+    индекса сразу до и после этого ключа. Поэтому окно — два поиска
+    по индексу с LIMIT k, а не оконная функция по всей таблице.
+    Места берутся из гистограммы рекордов (сотни строк, а не миллионы).
+    Время не зависит от размера таблицы (см. scripts/bench_leaderboard_around.py).
+    
+    С шардированием оба поиска идут в каждый шард, и из слитых
+    списков берутся k ближайших сверху и снизу.
+    
+    Args:
+        player_name: Имя игрока
+        k: Соседей с каждой стороны (1-50)
+        model: Таблица кампании
+        sessions: Сессии всех шардов
+    
+    Returns:
+        k записей рейтинга выше игрока, сам игрок и k записей ниже
+    """
+    k = max(1, min(k, 50))
+    bests = best_model(model.campaign)
+    
+    player = await sessions[shard_for(player_name).index].get(bests, player_name)
+    if player is None:
+        return AroundResponse(player_name=player_name, campaign=model.campaign)
+    
+    key = tuple_(bests.best_score, bests.player_name)
+    player_key = tuple_(player.best_score, player.player_name)
+    
+    # Выше в рейтинге = больше ключ. Ближайшие — по возрастанию ключа
+    above_query = (
+        select(bests)
+        .where(key > player_key)
+        .order_by(bests.best_score, bests.player_name)
+        .limit(k)
+    )
+    above_per_shard = await _gather(sessions, lambda session: _scalars(session, above_query))
+    above = list(islice(heapq.merge(*above_per_shard, key=_rank_key), k))
+    
+    # Ниже в рейтинге = меньше ключ. Ближайшие — по убыванию ключа
+    below_query = (
+        select(bests)
+        .where(key < player_key)
+        .order_by(bests.best_score.desc(), bests.player_name.desc())
+        .limit(k)
+    )
+    below_per_shard = await _gather(sessions, lambda session: _scalars(session, below_query))
+    below = list(islice(heapq.merge(*below_per_shard, key=_rank_key, reverse=True), k))
+    
+    # Сверху вниз: соседи выше (в обратном порядке), игрок, соседи ниже
+    window = [*reversed(above), player, *below]
+    ranks = await _shard_ranks(sessions, count_model(model.campaign), {row.best_score for row in window})
+    entries = [
+        LeaderboardEntry(
+            rank=ranks[row.best_score],
+            player_name=row.player_name,
+            score=row.best_score,
+            played_at=row.played_at,
+        )
+        for row in window
+    ]
+    
+    return AroundResponse(
+        player_name=player_name,
+        campaign=model.campaign,
+        position=ranks[player.best_score],
+        best_score=player.best_score,
+        entries=entries,
+    )
+
+
+async def _ranks(
+    session: AsyncSession,
+    counts: type[PlayerScoreCountMixin],
+    scores: set[int],
+) -> dict[int, int]:
+    """
+    Места для значений рекорда: 1 + количество игроков с рекордом выше.
+    
+    Один запрос к гистограмме: значения выше наименьшего из scores
+    (их столько, сколько РАЗНЫХ рекордов, а не игроков).
+    
+    Returns:
+        {рекорд: место}
+    """
+    query = (
+        select(counts.best_score, counts.players)
+        .where(counts.best_score > min(scores))
+        .order_by(counts.best_score.desc())
+    )
+    buckets = (await session.execute(query)).all()
+    
+    ranks = {}
+    above = 0
+    pending = sorted(scores, reverse=True)
+    for best_score, players in buckets:
+        while pending and pending[0] >= best_score:
+            ranks[pending.pop(0)] = above + 1
+        above += players
+    for score in pending:
+        ranks[score] = above + 1
+    return ranks
+
+
+async def _shard_ranks(
+    sessions: list[AsyncSession],
+    counts: type[PlayerScoreCountMixin],
+    scores: set[int],
+) -> dict[int, int]:
+    """
+    Места по всем шардам: игроков выше рекорда — сумма по шардам.
+    
+    Returns:
+        {рекорд: место}
+    """
+    per_shard = await _gather(sessions, lambda session: _ranks(session, counts, scores))
+    return {score: 1 + sum(ranks[score] - 1 for ranks in per_shard) for score in scores}
+
+
+@router.get(
+    "/campaigns",
+    summary="Список кампаний",
+    description="Промо-кампании, у которых есть таблица лидеров.",
+)
+async def list_campaigns() -> dict:
+    """
+    Список активных кампаний.
+    
+    Returns:
+        id кампаний (default — первым)
+    """
+    return {"campaigns": active_campaigns()}
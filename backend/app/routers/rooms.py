@@ -0,0 +1,111 @@
+"""
+API роутер для мультиплеерных комнат.
+
+- WebSocket /api/rooms/ws — войти в комнату и играть
+- GET /api/rooms — список комнат и метрики планировщика
+
+Вся игровая логика — в app/rooms.py, здесь только транспорт:
+читаем сообщения клиента и отправляем ему очередь исходящих сообщений.
+"""
+
+import asyncio
+import json
+
+from fastapi import APIRouter, WebSocket
+
+from ..rooms import Player, Room, RoomError, room_manager
+
+router = APIRouter(
+    prefix="/api/rooms",
+    tags=["rooms"],
+)
+
+
+@router.get(
+    "",
+    summary="Список комнат",
+    description="Комнаты процесса и метрики планировщика тиков.",
+)
+async def list_rooms() -> dict:
+    """
+    Список комнат.
+
+    Returns:
+        Комнаты (id, статус, игроки) и метрики планировщика
+    """
+    return {
+        "rooms": [
+            {"id": room.id, "status": room.status, "players": len(room.players), "tick": room.tick}
+            for room in room_manager.rooms.values()
+        ],
+        "scheduler": room_manager.stats(),
+    }
+
+
+async def _pump(websocket: WebSocket, player: Player) -> None:
+    """Отправлять клиенту сообщения из очереди игрока; None — закрыть сокет."""
+    while True:
+        message = await player.outbox.get()
+        if message is None:
+            await websocket.close()
+            return
+        await websocket.send_text(message)
+
+
+async def _read(websocket: WebSocket, room: Room, player: Player) -> None:
+    """
+    Читать сообщения клиента.
+
+    Бинарные кадры и невалидный JSON пропускаем: протокол — только текстовый JSON,
+    а мусор от одного клиента не повод рвать ему игру.
+    """
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+        text = message.get("text")
+        if text is None:
+            continue
+        try:
+            data = json.loads(text)
+        except ValueError:
+            continue
+        if isinstance(data, dict):
+            room_manager.handle(room, player, data)
+
+
+@router.websocket("/ws")
+async def room_socket(
+    websocket: WebSocket,
+    player_name: str = "Player",
+    room_id: str | None = None,
+) -> None:
+    """
+    Подключение игрока к комнате.
+
+    Пример:
+        ws://localhost:8000/api/rooms/ws?player_name=Anna
+        ws://localhost:8000/api/rooms/ws?player_name=Anna&room_id=1a2b3c4d
+
+    Протокол сообщений описан в app/rooms.py.
+    Соединение живёт, пока не отключится клиент или не закончится комната
+    (тогда _pump отправит последние сообщения и закроет сокет).
+    """
+    await websocket.accept()
+
+    player_name = player_name.strip()[:50] or "Player"
+    try:
+        room, player = room_manager.join(player_name, room_id)
+    except RoomError as exc:
+        await websocket.close(code=4000, reason=str(exc))
+        return
+
+    writer = asyncio.create_task(_pump(websocket, player))
+    reader = asyncio.create_task(_read(websocket, room, player))
+    try:
+        await asyncio.wait({writer, reader}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in (writer, reader):
+            task.cancel()
+        await asyncio.gather(writer, reader, return_exceptions=True)
+        room_manager.leave(room, player)
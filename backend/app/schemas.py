@@ -20,6 +20,9 @@ Pydantic схемы для валидации данных API.
 from datetime import datetime
 from pydantic import BaseModel, Field, field_validator
 
+from .campaigns import CAMPAIGN_PATTERN
+from .models import DEFAULT_CAMPAIGN
+
 
 # === Схемы для GameResult ===
 
@@ -67,6 +70,12 @@ class GameResultCreate(BaseModel):
         description="Количество съеденных бонусов"
     )
     
+    campaign: str = Field(
+        default=DEFAULT_CAMPAIGN,
+        pattern=CAMPAIGN_PATTERN,
+        description="Промо-кампания (латиница, цифры и _, до 32 символов)"
+    )
+    
     @field_validator("player_name")
     @classmethod
     def validate_player_name(cls, v: str) -> str:
@@ -87,9 +96,12 @@ class GameResultResponse(BaseModel):
     
     Что возвращаем клиенту после сохранения.
     Включает id и played_at, которые создались в базе.
+    
+    Если база была недоступна, результат принят в локальный журнал:
+    spooled=True, id=None, played_at — время приёма.
     """
     
-    id: int = Field(description="Уникальный ID записи")
+    id: int | None = Field(description="Уникальный ID записи (None — результат ещё в журнале)")
     player_name: str = Field(description="Имя игрока")
     score: int = Field(description="Набранные очки")
     duration: float = Field(description="Длительность игры в секундах")
@@ -97,6 +109,8 @@ class GameResultResponse(BaseModel):
     food_eaten: int = Field(description="Количество съеденной еды")
     bonuses_eaten: int = Field(description="Количество съеденных бонусов")
     played_at: datetime = Field(description="Дата и время игры")
+    campaign: str = Field(default=DEFAULT_CAMPAIGN, description="Промо-кампания")
+    spooled: bool = Field(default=False, description="Принят в журнал, в базу будет записан позже")
     
     # Позволяет создавать схему из SQLAlchemy модели
     model_config = {"from_attributes": True}
@@ -135,10 +149,58 @@ class LeaderboardResponse(BaseModel):
     total_players: int = Field(
         description="Количество уникальных игроков"
     )
+    campaign: str = Field(
+        default=DEFAULT_CAMPAIGN,
+        description="Промо-кампания"
+    )
+    mode: str = Field(
+        default="games",
+        description="games — лучшие игры, players — лучшие игроки"
+    )
+
+
+class AroundResponse(BaseModel):
+    """
+    Окно рейтинга вокруг игрока (/api/leaderboard/around).
+    
+    entries — k игроков выше, сам игрок и k игроков ниже (по месту).
+    Если игрок ещё не играл — position и best_score пустые, entries пустой.
+    """
+    
+    player_name: str = Field(description="Имя игрока")
+    campaign: str = Field(default=DEFAULT_CAMPAIGN, description="Промо-кампания")
+    position: int | None = Field(default=None, description="Место игрока")
+    best_score: int | None = Field(default=None, description="Лучший результат игрока")
+    entries: list[LeaderboardEntry] = Field(
+        default_factory=list,
+        description="Соседи игрока по рейтингу (вместе с ним)"
+    )
 
 
 # === Схемы для статистики ===
 
+class ProgressPoint(BaseModel):
+    """Точка графика прогресса — одна игра."""
+    
+    played_at: datetime = Field(description="Дата и время игры")
+    score: int = Field(description="Набранные очки")
+
+
+class ProgressResponse(BaseModel):
+    """
+    График прогресса игрока (/api/game/progress).
+    
+    points — игры игрока в порядке времени, прореженные до ~points точек
+    (см. downsample.py). Если игр меньше — все игры.
+    """
+    
+    player_name: str = Field(description="Имя игрока")
+    campaign: str = Field(default=DEFAULT_CAMPAIGN, description="Промо-кампания")
+    method: str = Field(description="lttb или minmax")
+    total_games: int = Field(description="Всего игр игрока")
+    points: list[ProgressPoint] = Field(description="Точки графика (по времени)")
+
+
 class PlayerStats(BaseModel):
     """
     Статистика игрока.
@@ -165,8 +227,49 @@ class MessageResponse(BaseModel):
     success: bool = Field(default=True, description="Успешность операции")
 
 
+# === Схемы журнала событий ===
+
+class EventRecord(BaseModel):
+    """Событие журнала: смещение и само событие (принятый результат игры)."""
+    
+    offset: int = Field(description="Смещение события в журнале")
+    event: dict = Field(description="Событие: type, accepted_at, campaign, id, spooled и поля результата")
+
+
+class EventsResponse(BaseModel):
+    """
+    Порция событий журнала (/api/events).
+    
+    Следующий запрос — с from_offset=next_offset. Пустой events значит,
+    что новых событий пока нет (next_offset == end_offset).
+    """
+    
+    events: list[EventRecord] = Field(description="События по порядку смещений")
+    next_offset: int = Field(description="С какого смещения читать дальше")
+    start_offset: int = Field(description="Самое старое хранимое событие")
+    end_offset: int = Field(description="Смещение следующего записанного события")
+
+
+class ConsumerOffset(BaseModel):
+    """Закоммиченное смещение потребителя."""
+    
+    consumer: str = Field(description="Имя потребителя")
+    offset: int | None = Field(description="Смещение следующего непрочитанного события (None — ещё не коммитил)")
+    committed_at: datetime | None = Field(default=None, description="Когда закоммичено")
+    lag: int = Field(description="Сколько событий потребитель ещё не прочитал")
+
+
+class ConsumerOffsetCommit(BaseModel):
+    """Тело коммита смещения."""
+    
+    offset: int = Field(ge=0, description="Смещение следующего непрочитанного события")
+
+
 class HealthResponse(BaseModel):
     """Ответ проверки здоровья сервиса."""
     
     status: str = Field(default="healthy", description="Статус сервиса")
     version: str = Field(default="1.0.0", description="Версия API")
+    write_lane: dict | None = Field(default=None, description="Очередь записи SQLite (None — не используется)")
+    spool: dict | None = Field(default=None, description="Журнал результатов: глубина и отставание переноса")
+    events: dict | None = Field(default=None, description="Журнал событий: смещения и размер")
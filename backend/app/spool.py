@@ -0,0 +1,409 @@
+"""
+Локальный журнал результатов на случай, когда база недоступна.
+
+Проблема
+--------
+Если PostgreSQL перезапускается (или у Render "икнула" база),
+save_game_result падает с ошибкой — а игрок уже видит Game Over,
+и его игра просто пропадает.
+
+Решение
+-------
+1. Не получилось записать в базу — результат дописывается в конец
+   локального файла-журнала (append-only) и сбрасывается на диск (fsync)
+2. Клиент получает 202 Accepted: результат принят, в базе появится позже
+3. Фоновый "переносчик" раз в replay_interval_seconds пробует перенести
+   журнал в базу — по порядку, с того места, где остановился
+4. Журнал перенесён целиком — файл обнуляется
+
+Формат журнала
+--------------
+Одна строка — одна запись: "<crc32 в hex> <json>\\n".
+Контрольная сумма ловит запись, оборванную на середине (процесс упал
+во время write): при старте "хвост" после последней целой записи отрезается.
+
+Позиция переноса (смещение в байтах) хранится в соседнем файле и
+обновляется атомарно (запись во временный файл + rename).
+
+Почему перенос идемпотентный?
+----------------------------
+У каждой записи есть ключ (uuid4). Ключ вставляется в spool_receipts в
+ОДНОЙ транзакции с результатом (см. SpoolReceipt в models.py). Если процесс
+упал между COMMIT и сохранением позиции, запись перенесётся ещё раз,
+увидит свой ключ и будет пропущена — без дубля в таблице лидеров.
+
+Какие ошибки значат "база недоступна"?
+-------------------------------------
+Только временные (db_unavailable): нет соединения, таймаут, SQLite
+"database is locked" / "unable to open". Ошибку схемы ("no such table")
+или ограничения (IntegrityError) повтор не исправит — такой результат
+в журнал не пишется, запрос падает как обычно.
+
+Если запись из журнала раз за разом падает НЕ из-за недоступности базы,
+после max_attempts попыток она уходит в results.dead (тот же формат,
+плюс текст ошибки), и перенос идёт дальше — одна плохая запись не
+держит всю очередь. results.dead разбирается вручную.
+
+Каталог журнала должен переживать перезапуск процесса
+(на Render — подключённый диск; без него журнал живёт до перезапуска контейнера).
+"""
+
+import asyncio
+import json
+import logging
+import os
+import uuid
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy.exc import DBAPIError, OperationalError
+
+from .cache import leaderboard_cache
+from .campaigns import ensure_campaign
+from .database import run_write, shard_for
+from .models import SpoolReceipt
+from .player_bests import _dialect_insert
+from .results import insert_result
+
+import sys
+sys.path.insert(0, '..')
+from settings import settings
+
+
+logger = logging.getLogger(__name__)
+
+# PostgreSQL: классы SQLSTATE "нет соединения" (08), "не хватает ресурсов" (53),
+# "вмешательство оператора" (57: перезапуск сервера, отмена по statement_timeout)
+_UNAVAILABLE_SQLSTATE = ("08", "53", "57")
+# SQLite: временные ошибки различаются только текстом
+_UNAVAILABLE_SQLITE = ("database is locked", "unable to open database")
+
+
+def db_unavailable(exc: BaseException) -> bool:
+    """
+    Ошибка "база недоступна": результат не потерян, его можно записать позже.
+
+    OSError и таймаут — отказ в соединении до того, как драйвер вернул
+    свою ошибку. Всё остальное (схема, ограничения, данные) — не временное.
+    """
+    if isinstance(exc, (OSError, asyncio.TimeoutError)):
+        return True
+    if not isinstance(exc, DBAPIError):
+        return False
+    # Диалект сам распознал обрыв соединения
+    if exc.connection_invalidated:
+        return True
+    orig = exc.orig
+    if isinstance(orig, (OSError, asyncio.TimeoutError)):
+        return True
+    code = getattr(orig, "sqlstate", None) or getattr(orig, "pgcode", None)
+    if code:
+        return code.startswith(_UNAVAILABLE_SQLSTATE)
+    return isinstance(exc, OperationalError) and any(text in str(orig) for text in _UNAVAILABLE_SQLITE)
+
+
+def _encode(record: dict) -> bytes:
+    payload = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode()
+    return b"%08x %s\n" % (zlib.crc32(payload), payload)
+
+
+def _decode(line: bytes) -> dict | None:
+    """Запись журнала из строки (None — строка оборвана или повреждена)."""
+    if not line.endswith(b"\n") or len(line) < 10 or line[8:9] != b" ":
+        return None
+    payload = line[9:-1]
+    try:
+        if int(line[:8], 16) != zlib.crc32(payload):
+            return None
+        return json.loads(payload)
+    except ValueError:
+        return None
+
+
+class ResultSpool:
+    """
+    Журнал результатов и его фоновый перенос в базу.
+
+    Пример:
+        spool = ResultSpool("./spool")
+        spool.open()       # восстановление после сбоя
+        spool.start()      # фоновый перенос
+        record = await spool.append("default", {"player_name": "Anna", "score": 42, ...})
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        replay_interval: float = 5.0,
+        replay_batch: int = 100,
+        max_attempts: int = 5,
+    ) -> None:
+        self.directory = Path(directory)
+        self.path = self.directory / "results.journal"
+        self.offset_path = self.directory / "results.offset"
+        self.dead_path = self.directory / "results.dead"
+        self.replay_interval = replay_interval
+        self.replay_batch = replay_batch
+        self.max_attempts = max_attempts
+
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+        self._offset = 0   # Сколько байт журнала уже перенесено
+        self._size = 0     # Конец последней целой записи
+        self._pending = 0  # Записей ждут переноса
+        self._oldest: datetime | None = None  # Время самой старой из них
+        self._attempts: dict[str, int] = {}  # Неудачные попытки записей (по ключу)
+
+        # Метрики
+        self.spooled = 0
+        self.replayed = 0
+        self.dead = 0
+        self.last_error: str | None = None
+
+    # === Файлы ===
+
+    def open(self) -> None:
+        """Открыть журнал: прочитать позицию, отрезать оборванный хвост, посчитать записи."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.path.touch(exist_ok=True)
+        try:
+            self._offset = int(self.offset_path.read_text())
+        except (FileNotFoundError, ValueError):
+            self._offset = 0
+
+        size = self.path.stat().st_size
+        # Журнал обнулили, а позицию сохранить не успели
+        if self._offset > size:
+            self._offset = 0
+
+        good_end = self._offset
+        pending = 0
+        oldest = None
+        with open(self.path, "rb") as journal:
+            journal.seek(self._offset)
+            position = self._offset
+            for line in journal:
+                position += len(line)
+                record = _decode(line)
+                if record is None:
+                    continue
+                good_end = position
+                pending += 1
+                if oldest is None:
+                    oldest = datetime.fromisoformat(record["accepted_at"])
+
+        if good_end < size:
+            logger.warning("Журнал результатов: отрезан повреждённый хвост (%d байт)", size - good_end)
+            with open(self.path, "r+b") as journal:
+                journal.truncate(good_end)
+                os.fsync(journal.fileno())
+
+        self._size = good_end
+        self._pending = pending
+        self._oldest = oldest
+        self._save_offset()
+
+    def _save_offset(self) -> None:
+        tmp = self.offset_path.with_suffix(".tmp")
+        with open(tmp, "w") as file:
+            file.write(str(self._offset))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp, self.offset_path)
+
+    def _write(self, data: bytes, path: Path | None = None) -> None:
+        with open(path or self.path, "ab") as journal:
+            journal.write(data)
+            journal.flush()
+            os.fsync(journal.fileno())
+
+    def _read(self, limit: int) -> list[tuple[int, dict | None]]:
+        """До limit записей после позиции переноса: (конец записи, запись)."""
+        records = []
+        with open(self.path, "rb") as journal:
+            journal.seek(self._offset)
+            position = self._offset
+            while position < self._size and len(records) < limit:
+                line = journal.readline()
+                position += len(line)
+                records.append((position, _decode(line)))
+        return records
+
+    def _truncate(self) -> None:
+        with open(self.path, "r+b") as journal:
+            journal.truncate(0)
+            os.fsync(journal.fileno())
+        self._offset = self._size = 0
+        self._save_offset()
+
+    # === Запись ===
+
+    async def append(self, campaign: str, data: dict) -> dict:
+        """
+        Дописать результат в журнал и дождаться fsync.
+
+        Returns:
+            Запись журнала (key, accepted_at, campaign, result)
+        """
+        accepted_at = datetime.now(timezone.utc)
+        record = {
+            "key": str(uuid.uuid4()),
+            "accepted_at": accepted_at.isoformat(),
+            "campaign": campaign,
+            "result": data,
+        }
+        line = _encode(record)
+        async with self._lock:
+            await asyncio.to_thread(self._write, line)
+            self._size += len(line)
+            self._pending += 1
+            if self._oldest is None:
+                self._oldest = accepted_at
+        self.spooled += 1
+        logger.warning("База недоступна: результат %s записан в журнал", record["key"])
+        return record
+
+    # === Перенос в базу ===
+
+    async def replay_once(self) -> int:
+        """
+        Перенести журнал в базу (пока переносится).
+
+        Returns:
+            Сколько результатов записано в базу
+        """
+        applied = 0
+        stalled = False
+        while self._pending and not stalled:
+            records = await asyncio.to_thread(self._read, self.replay_batch)
+            if not records:
+                break
+            for end, record in records:
+                if record is not None:
+                    outcome = await self._replay(record)
+                    if outcome is None:
+                        # Попробуем в следующий раз с этой же записи
+                        stalled = True
+                        break
+                    applied += outcome
+                    self._pending -= 1
+                self._offset = end
+            await self._advance()
+
+        if applied:
+            self.last_error = None
+            leaderboard_cache.invalidate()
+        return applied
+
+    async def _replay(self, record: dict) -> int | None:
+        """
+        Одна запись журнала: 1 — записана, 0 — уже была или ушла в results.dead,
+        None — не записана, позиция переноса остаётся на ней.
+        """
+        try:
+            applied = await self._apply(record)
+        except Exception as exc:
+            self.last_error = repr(exc)
+            # База всё ещё недоступна — запись не виновата, попытку не считаем
+            if db_unavailable(exc):
+                return None
+            attempts = self._attempts.get(record["key"], 0) + 1
+            if attempts < self.max_attempts:
+                logger.warning("Журнал результатов: запись %s не записана (попытка %d): %r",
+                               record["key"], attempts, exc)
+                self._attempts[record["key"]] = attempts
+                return None
+            logger.exception("Журнал результатов: запись %s перенесена в %s", record["key"], self.dead_path.name)
+            await self._bury(record, exc)
+            return 0
+        self._attempts.pop(record["key"], None)
+        return int(applied)
+
+    async def _bury(self, record: dict, exc: Exception) -> None:
+        """Дописать запись в results.dead — её разберут вручную."""
+        self._attempts.pop(record["key"], None)
+        line = _encode({**record, "error": repr(exc), "failed_at": datetime.now(timezone.utc).isoformat()})
+        await asyncio.to_thread(self._write, line, self.dead_path)
+        self.dead += 1
+
+    async def _apply(self, record: dict) -> bool:
+        """Записать результат из журнала (False — уже был записан раньше)."""
+        model = await ensure_campaign(record["campaign"])
+        data = {**record["result"], "played_at": datetime.fromisoformat(record["accepted_at"])}
+
+        def apply(session) -> bool:
+            statement = _dialect_insert(session)(SpoolReceipt).values(key=record["key"])
+            inserted = session.execute(statement.on_conflict_do_nothing())
+            if not inserted.rowcount:
+                return False
+            insert_result(session, model, data)
+            return True
+
+        if not await run_write(apply, shard_for(data["player_name"])):
+            return False
+        self.replayed += 1
+        return True
+
+    async def _advance(self) -> None:
+        """Сохранить позицию; журнал перенесён целиком — обнулить файл."""
+        async with self._lock:
+            if self._offset >= self._size:
+                await asyncio.to_thread(self._truncate)
+                self._pending = 0
+                self._oldest = None
+                return
+            await asyncio.to_thread(self._save_offset)
+            head = await asyncio.to_thread(self._read, 1)
+            record = head[0][1] if head else None
+            self._oldest = datetime.fromisoformat(record["accepted_at"]) if record else None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.replay_interval)
+            try:
+                await self.replay_once()
+            except Exception:
+                logger.exception("Журнал результатов: ошибка переноса")
+
+    def start(self) -> None:
+        """Запустить фоновый перенос."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Остановить фоновый перенос (журнал остаётся на диске)."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        """Глубина журнала и отставание переноса — для /api/health."""
+        lag = 0.0
+        if self._oldest is not None:
+            lag = (datetime.now(timezone.utc) - self._oldest).total_seconds()
+        return {
+            "pending": self._pending,
+            "pending_bytes": self._size - self._offset,
+            "lag_seconds": round(lag, 1),
+            "spooled": self.spooled,
+            "replayed": self.replayed,
+            "dead": self.dead,
+            "last_error": self.last_error,
+        }
+
+
+# Общий журнал приложения (None — выключен через SPOOL_ENABLED=false)
+result_spool: ResultSpool | None = None
+if settings.spool.enabled:
+    result_spool = ResultSpool(
+        settings.spool.dir,
+        replay_interval=settings.spool.replay_interval_seconds,
+        replay_batch=settings.spool.replay_batch,
+        max_attempts=settings.spool.max_attempts,
+    )
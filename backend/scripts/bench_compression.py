@@ -0,0 +1,150 @@
+"""
+Бенчмарк сжатия ответов: байты "на проводе" против CPU.
+
+Что измеряем?
+------------
+1. Размер ответа без сжатия, с gzip и с brotli на разных уровнях
+2. Время сжатия одного ответа (микросекунды CPU)
+3. Сколько CPU тратится на N запросов таблицы лидеров:
+   - если сжимать каждый ответ заново (только middleware)
+   - если сжимать один раз на версию (кэш из app/cache.py)
+
+Данные синтетические, но по форме совпадают с реальными ответами API
+(та же Pydantic схема, похожие имена и очки).
+
+Как запустить:
+    cd backend
+    python scripts/bench_compression.py
+    python scripts/bench_compression.py --requests 10000 --writes 50
+"""
+
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.compression import SUPPORTED_ENCODINGS, compress  # noqa: E402
+from app.schemas import GameResultResponse, LeaderboardEntry, LeaderboardResponse  # noqa: E402
+from settings import settings  # noqa: E402
+
+
+# Уровни, которые сравниваем (middleware использует "быстрые", кэш — более сильные)
+LEVELS = {
+    "gzip": [1, 6, 9],
+    "br": [1, 4, 8, 11],
+}
+
+NAMES = ["Player", "Змей", "Anna", "neo", "Пётр", "snake_master", "Катя", "Max", "ЛисаАлиса", "guest42"]
+
+
+def make_leaderboard(rows: int) -> bytes:
+    """Сгенерировать JSON таблицы лидеров на rows записей."""
+    now = datetime.now(timezone.utc)
+    entries = [
+        LeaderboardEntry(
+            rank=i + 1,
+            player_name=random.choice(NAMES),
+            score=500 - i * 3,
+            played_at=now - timedelta(minutes=random.randint(0, 100_000)),
+        )
+        for i in range(rows)
+    ]
+    response = LeaderboardResponse(entries=entries, total_games=123_456, total_players=7_890)
+    return response.model_dump_json().encode()
+
+
+def make_history(rows: int) -> bytes:
+    """Сгенерировать JSON истории игр на rows записей."""
+    now = datetime.now(timezone.utc)
+    games = [
+        GameResultResponse(
+            id=100_000 + i,
+            player_name="Player",
+            score=random.randint(0, 200),
+            duration=round(random.uniform(5, 600), 1),
+            max_length=random.randint(3, 60),
+            food_eaten=random.randint(0, 150),
+            bonuses_eaten=random.randint(0, 20),
+            played_at=now - timedelta(minutes=i * 7),
+        )
+        for i in range(rows)
+    ]
+    return ("[" + ",".join(game.model_dump_json() for game in games) + "]").encode()
+
+
+def time_compress(body: bytes, encoding: str, level: int, repeat: int) -> float:
+    """Среднее время одного сжатия в микросекундах."""
+    start = time.process_time()
+    for _ in range(repeat):
+        compress(body, encoding, level)
+    return (time.process_time() - start) / repeat * 1_000_000
+
+
+def report_sizes(payloads: dict[str, bytes], repeat: int) -> None:
+    """Таблица: размер и CPU для каждого алгоритма и уровня."""
+    print(f"{'payload':<18}{'encoding':<10}{'level':>6}{'bytes':>10}{'ratio':>8}{'µs/op':>10}")
+    print("-" * 62)
+    for name, body in payloads.items():
+        print(f"{name:<18}{'identity':<10}{'-':>6}{len(body):>10}{1.0:>8.2f}{0.0:>10.1f}")
+        for encoding in SUPPORTED_ENCODINGS:
+            for level in LEVELS[encoding]:
+                size = len(compress(body, encoding, level))
+                cpu = time_compress(body, encoding, level, repeat)
+                print(f"{'':<18}{encoding:<10}{level:>6}{size:>10}{len(body) / size:>8.2f}{cpu:>10.1f}")
+        print()
+
+
+def report_cached_vs_uncached(body: bytes, requests: int, writes: int) -> None:
+    """
+    Сравнить CPU на сжатие: каждый запрос против одного раза на версию.
+
+    writes — сколько раз за время requests запросов таблица лидеров менялась
+    (каждое изменение сбрасывает кэш, и ответ сжимается заново).
+    """
+    print(f"CPU на {requests} запросов таблицы лидеров при {writes} изменениях:")
+    levels = settings.compression
+    for encoding, per_request_level, cached_level in (
+        ("gzip", levels.gzip_level, levels.cached_gzip_level),
+        ("br", levels.brotli_quality, levels.cached_brotli_quality),
+    ):
+        if encoding not in SUPPORTED_ENCODINGS:
+            continue
+        per_request = time_compress(body, encoding, per_request_level, 200) * requests / 1000
+        cached = time_compress(body, encoding, cached_level, 20) * (writes + 1) / 1000
+        size_per_request = len(compress(body, encoding, per_request_level))
+        size_cached = len(compress(body, encoding, cached_level))
+        print(
+            f"  {encoding:<5} каждый запрос (level {per_request_level}): {per_request:>9.1f} ms, "
+            f"{size_per_request} B/ответ | кэш (level {cached_level}): {cached:>7.1f} ms, "
+            f"{size_cached} B/ответ"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк сжатия ответов API")
+    parser.add_argument("--repeat", type=int, default=200, help="Повторов на одно измерение")
+    parser.add_argument("--requests", type=int, default=10_000, help="Запросов таблицы лидеров")
+    parser.add_argument("--writes", type=int, default=100, help="Изменений таблицы лидеров")
+    args = parser.parse_args()
+
+    random.seed(42)
+    payloads = {
+        "leaderboard-10": make_leaderboard(10),
+        "leaderboard-100": make_leaderboard(100),
+        "history-10": make_history(10),
+        "history-100": make_history(100),
+    }
+
+    if "br" not in SUPPORTED_ENCODINGS:
+        print("⚠️  brotli не установлен — сравниваем только gzip\n")
+
+    report_sizes(payloads, args.repeat)
+    report_cached_vs_uncached(payloads["leaderboard-10"], args.requests, args.writes)
+
+
+if __name__ == "__main__":
+    main()
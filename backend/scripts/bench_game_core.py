@@ -0,0 +1,146 @@
+"""
+Микробенчмарки игрового ядра: O(1) поле против подхода из useGame.js.
+
+Что сравниваем?
+--------------
+1. Спавн еды на поле, заполненном змейкой на 10% / 50% / 90% / 99%:
+   - "как во frontend": случайная клетка + проверка snake.some(...),
+     повтор до успеха (но не больше 1000 попыток)
+   - game_core.Board.random_free(): случайный индекс в списке свободных клеток
+2. Проверка столкновения головы с телом:
+   - "как во frontend": перебор всех сегментов
+   - game_core: чтение одной клетки bytearray
+3. Полная симуляция SnakeGame: тиков в секунду
+
+Поля 20×20 (как в игре), 50×50 и 100×100.
+
+Как запустить:
+    cd backend
+    python scripts/bench_game_core.py
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.game_core import BODY, DIRECTIONS, PLAYING, Board, SnakeGame  # noqa: E402
+
+SIZES = [20, 50, 100]
+FILL_LEVELS = [0.1, 0.5, 0.9, 0.99]
+
+
+def naive_spawn(size: int, snake: list[tuple[int, int]], rng: random.Random) -> tuple[tuple[int, int], int]:
+    """Копия getRandomPosition(): Returns (позиция, число попыток)."""
+    attempts = 0
+    while True:
+        position = (rng.randrange(size), rng.randrange(size))
+        attempts += 1
+        if attempts > 1000:
+            return position, attempts
+        if not any(segment == position for segment in snake):
+            return position, attempts
+
+
+def make_snake(size: int, fill: float) -> list[tuple[int, int]]:
+    """Змейка "змейкой" по строкам, занимающая долю fill поля."""
+    length = int(size * size * fill)
+    cells = []
+    for y in range(size):
+        row = range(size) if y % 2 == 0 else range(size - 1, -1, -1)
+        for x in row:
+            if len(cells) == length:
+                return cells
+            cells.append((x, y))
+    return cells
+
+
+def timeit(fn, repeat: int) -> float:
+    """Среднее время одного вызова в микросекундах."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1_000_000
+
+
+def bench_spawn() -> None:
+    print("Спавн еды (µs на спавн; попытки и промахи — для варианта frontend)")
+    print(f"{'поле':>8}{'занято':>8}{'frontend':>12}{'попыток':>10}{'промахов':>10}{'core':>10}{'ускорение':>11}")
+    for size in SIZES:
+        for fill in FILL_LEVELS:
+            snake = make_snake(size, fill)
+            board = Board(size)
+            for x, y in snake:
+                board.set(board.cell(x, y), BODY)
+            occupied = set(snake)
+
+            rng = random.Random(1)
+            repeat = 50 if size * size * fill > 2000 else 200
+            attempts = misses = 0
+            start = time.perf_counter()
+            for _ in range(repeat):
+                position, tries = naive_spawn(size, snake, rng)
+                attempts += tries
+                misses += position in occupied
+            naive = (time.perf_counter() - start) / repeat * 1_000_000
+
+            core = timeit(lambda: board.random_free(rng), 20_000)
+            print(
+                f"{size}×{size:<5}{fill:>7.0%}{naive:>12.1f}{attempts / repeat:>10.1f}"
+                f"{misses:>10}{core:>10.2f}{naive / core:>10.0f}×"
+            )
+    print()
+
+
+def bench_collision() -> None:
+    print("Проверка столкновения головы с телом (µs на проверку)")
+    print(f"{'поле':>8}{'длина':>8}{'frontend':>12}{'core':>10}{'ускорение':>11}")
+    for size in SIZES:
+        snake = make_snake(size, 0.5)
+        board = Board(size)
+        for x, y in snake:
+            board.set(board.cell(x, y), BODY)
+        head = (size - 1, size - 1)  # свободная клетка — худший случай для перебора
+        cell = board.cell(*head)
+
+        naive = timeit(lambda: any(segment == head for segment in snake), 200)
+        core = timeit(lambda: board.cells[cell] == BODY, 100_000)
+        print(f"{size}×{size:<5}{len(snake):>8}{naive:>12.1f}{core:>10.3f}{naive / core:>10.0f}×")
+    print()
+
+
+def bench_simulation(games: int = 200) -> None:
+    print(f"Симуляция SnakeGame ({games} партий, бот идёт к еде)")
+    rng = random.Random(7)
+    ticks = 0
+    start = time.perf_counter()
+    for _ in range(games):
+        game = SnakeGame(rng=rng)
+        while game.status == PLAYING and game.ticks < 5000:
+            board, head = game.board, game.snake.head
+            target = game.bonus if game.bonus is not None else game.food
+            tx, ty = board.xy(target) if target is not None else (0, 0)
+            options = []
+            for direction in DIRECTIONS:
+                cell = board.step(head, direction)
+                if cell is not None and board.cells[cell] != BODY:
+                    x, y = board.xy(cell)
+                    options.append((abs(x - tx) + abs(y - ty), direction))
+            if options:
+                game.turn(min(options)[1])
+            game.tick()
+        ticks += game.ticks
+    elapsed = time.perf_counter() - start
+    print(f"  {ticks} тиков за {elapsed:.2f} с — {ticks / elapsed:,.0f} тиков/с (вместе с ботом)")
+
+
+def main() -> None:
+    bench_spawn()
+    bench_collision()
+    bench_simulation()
+
+
+if __name__ == "__main__":
+    main()
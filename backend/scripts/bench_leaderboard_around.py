@@ -0,0 +1,200 @@
+"""
+Бенчмарк /api/leaderboard/around на больших таблицах рекордов.
+
+Что измеряем?
+------------
+Для таблиц player_bests на 100 тысяч, 1 миллион и 10 миллионов игроков:
+1. around — весь эндпоинт (get_leaderboard_around): рекорд игрока, его место
+   и два поиска соседей по индексу
+2. window — только два поиска соседей (k выше и k ниже)
+3. position — место игрока по гистограмме рекордов (SUM по значениям рекорда)
+4. count — место игрока через COUNT(*) по индексу рекордов (для сравнения:
+   проходит всех игроков выше, растёт с местом)
+5. row_number — "наивное" окно через ROW_NUMBER() OVER по всей таблице
+   (только на небольших таблицах — дальше это секунды)
+
+Игроки для замеров берутся с разных мест рейтинга: из топа, середины и хвоста.
+
+Данные
+------
+Очки распределены экспоненциально (много одинаковых маленьких рекордов) —
+так проверяется и обработка равных очков. Гистограмма рекордов строится
+rebuild_counts() — тем же кодом, что и в приложении. Базы создаются один раз в
+--data-dir и переиспользуются (10 миллионов строк — это ~1 ГБ и ~минута).
+
+Как запустить:
+    cd backend
+    python scripts/bench_leaderboard_around.py
+    python scripts/bench_leaderboard_around.py --rows 100000 1000000 10000000 --k 5
+"""
+
+import argparse
+import asyncio
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import func, select, tuple_  # noqa: E402
+from sqlalchemy.dialects import sqlite  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+from sqlalchemy.schema import CreateIndex, CreateTable  # noqa: E402
+
+from app.models import GameResult, PlayerBest, PlayerScoreCount  # noqa: E402
+from app.player_bests import rebuild_counts  # noqa: E402
+from app.routers.leaderboard import _ranks, get_leaderboard_around  # noqa: E402
+
+BATCH = 100_000
+
+
+def player_name(i: int) -> str:
+    return f"player{i:08d}"
+
+
+async def build_dataset(path: Path, rows: int) -> None:
+    """Создать базу с таблицей рекордов на rows игроков (индексы — после вставки)."""
+    print(f"  создаю {path.name} ({rows:,} игроков)...", flush=True)
+    started = time.perf_counter()
+    tmp = path.with_suffix(".tmp")
+    tmp.unlink(missing_ok=True)
+    db = sqlite3.connect(tmp)
+    db.execute("PRAGMA journal_mode = OFF")
+    db.execute("PRAGMA synchronous = OFF")
+    dialect = sqlite.dialect()
+    for table in (PlayerBest.__table__, PlayerScoreCount.__table__):
+        db.execute(str(CreateTable(table).compile(dialect=dialect)))
+
+    rng = random.Random(rows)
+    for start in range(0, rows, BATCH):
+        db.executemany(
+            "INSERT INTO player_bests (player_name, best_score, played_at) VALUES (?, ?, ?)",
+            (
+                (player_name(i), int(rng.expovariate(1 / 40)), "2025-01-20 15:30:00.000000")
+                for i in range(start, min(start + BATCH, rows))
+            ),
+        )
+    for index in PlayerBest.__table__.indexes:
+        db.execute(str(CreateIndex(index).compile(dialect=dialect)))
+    db.commit()
+    db.close()
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp}")
+    async with async_sessionmaker(engine)() as session:
+        await session.run_sync(rebuild_counts, PlayerBest, PlayerScoreCount)
+        await session.commit()
+    await engine.dispose()
+
+    db = sqlite3.connect(tmp)
+    db.execute("ANALYZE")
+    db.close()
+    tmp.rename(path)
+    print(f"  готово за {time.perf_counter() - started:.0f} с", flush=True)
+
+
+async def timed(fn, repeat: int) -> float:
+    """Медиана времени вызова, мс."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+async def bench(path: Path, rows: int, k: int, naive_max_rows: int, repeat: int) -> None:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+
+    rng = random.Random(1)
+    # Топ, середина и хвост рейтинга: берём игроков с известными рекордами
+    async with session_maker() as session:
+        probes = []
+        for label, order in (("top", PlayerBest.best_score.desc()), ("bottom", PlayerBest.best_score)):
+            name = await session.scalar(select(PlayerBest.player_name).order_by(order, PlayerBest.player_name).limit(1))
+            probes.append((label, name))
+        probes.insert(1, ("middle", player_name(rng.randrange(rows))))
+
+    for label, name in probes:
+        async with session_maker() as session:
+            player = await session.get(PlayerBest, name)
+            position = (await _ranks(session, PlayerScoreCount, {player.best_score}))[player.best_score]
+            key = tuple_(PlayerBest.best_score, PlayerBest.player_name)
+            player_key = tuple_(player.best_score, player.player_name)
+
+            async def around():
+                session.expunge_all()
+                await get_leaderboard_around(player_name=name, k=k, model=GameResult, sessions=[session])
+
+            async def window():
+                session.expunge_all()
+                await session.execute(
+                    select(PlayerBest).where(key > player_key)
+                    .order_by(PlayerBest.best_score, PlayerBest.player_name).limit(k)
+                )
+                await session.execute(
+                    select(PlayerBest).where(key < player_key)
+                    .order_by(PlayerBest.best_score.desc(), PlayerBest.player_name.desc()).limit(k)
+                )
+
+            async def position_only():
+                await _ranks(session, PlayerScoreCount, {player.best_score})
+
+            async def count_only():
+                await session.scalar(select(func.count()).select_from(PlayerBest).where(key > player_key))
+
+            async def row_number():
+                ranked = select(
+                    PlayerBest.player_name,
+                    func.row_number().over(
+                        order_by=(PlayerBest.best_score.desc(), PlayerBest.player_name.desc())
+                    ).label("place"),
+                ).subquery()
+                place = select(ranked.c.place).where(ranked.c.player_name == name).scalar_subquery()
+                await session.execute(
+                    select(ranked).where(ranked.c.place.between(place - k, place + k))
+                )
+
+            around_ms = await timed(around, repeat)
+            window_ms = await timed(window, repeat)
+            position_ms = await timed(position_only, repeat)
+            count_ms = await timed(count_only, max(3, repeat // 10))
+            naive = f"{await timed(row_number, 3):>12.2f}" if rows <= naive_max_rows else f"{'—':>12}"
+            print(
+                f"{rows:>12,}{label:>8}{position:>12,}{around_ms:>10.2f}{window_ms:>10.3f}"
+                f"{position_ms:>11.3f}{count_ms:>10.2f}{naive}"
+            )
+
+    await engine.dispose()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк /api/leaderboard/around")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000, 10_000_000])
+    parser.add_argument("--k", type=int, default=5, help="Соседей с каждой стороны")
+    parser.add_argument("--repeat", type=int, default=50, help="Повторов каждого замера")
+    parser.add_argument("--naive-max-rows", type=int, default=1_000_000, help="До скольких строк мерить ROW_NUMBER")
+    parser.add_argument("--data-dir", type=Path, default=Path(tempfile.gettempdir()) / "snake-bench")
+    args = parser.parse_args()
+
+    args.data_dir.mkdir(parents=True, exist_ok=True)
+    for rows in args.rows:
+        path = args.data_dir / f"player_bests_{rows}.db"
+        if not path.exists():
+            await build_dataset(path, rows)
+
+    print(f"\nВремя, мс (медиана). k = {args.k}")
+    print(
+        f"{'игроков':>12}{'игрок':>8}{'место':>12}{'around':>10}{'window':>10}"
+        f"{'position':>11}{'count':>10}{'row_number':>12}"
+    )
+    for rows in args.rows:
+        await bench(args.data_dir / f"player_bests_{rows}.db", rows, args.k, args.naive_max_rows, args.repeat)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,161 @@
+"""
+Бенчмарк /api/game/progress: график игрока с десятками тысяч игр.
+
+Что измеряем?
+------------
+База с --others игр случайных игроков и одним "активным" игроком
+с --games играми. Для него:
+
+1. summary  — COUNT + MAX(played_at) по индексу (player_name, played_at):
+              выполняется на каждый запрос, это и ключ кэша
+2. lttb     — потоковый проход по всем играм + LTTB до --points точек
+3. minmax   — то же, прореживание min/max
+4. all_rows — для сравнения: загрузить все игры игрока ORM объектами
+              (так пришлось бы строить график по сырой истории)
+5. cached   — повторный запрос через API (ответ из кэша)
+
+Как запустить:
+    cd backend
+    python scripts/bench_progress.py
+    python scripts/bench_progress.py --games 50000 --others 1000000 --points 200
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Настройки читаются при импорте приложения — окружение задаём до него
+BENCH_DIR = Path(tempfile.gettempdir()) / "snake-bench-progress"
+BENCH_DB = BENCH_DIR / "progress.db"
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{BENCH_DB}"
+os.environ["ROOMS_ENABLED"] = "false"
+os.environ["SPOOL_ENABLED"] = "false"
+
+from sqlalchemy import func, select  # noqa: E402
+from sqlalchemy.dialects import sqlite  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+from sqlalchemy.schema import CreateIndex, CreateTable  # noqa: E402
+
+from app.models import GameResult  # noqa: E402
+from app.routers.game import _build_progress  # noqa: E402
+
+PLAYER = "grinder"
+
+
+def build_dataset(path: Path, games: int, others: int) -> None:
+    db = sqlite3.connect(path)
+    dialect = sqlite.dialect()
+    db.execute(str(CreateTable(GameResult.__table__).compile(dialect=dialect)))
+    rng = random.Random(1)
+    start = datetime(2025, 1, 1)
+
+    def rows():
+        for i in range(others):
+            name, score = f"player{rng.randrange(100_000)}", rng.randrange(300)
+            yield (name, score, start + timedelta(minutes=rng.randrange(10**6)))
+        # Активный игрок: медленный рост с шумом
+        for i in range(games):
+            yield (PLAYER, int(20 + i / games * 200 + rng.gauss(0, 25)) % 400, start + timedelta(minutes=3 * i))
+
+    db.executemany(
+        "INSERT INTO game_results (player_name, score, duration, max_length, food_eaten, bonuses_eaten, played_at)"
+        " VALUES (?, ?, 60.0, 10, 10, 1, ?)",
+        ((name, score, played_at.isoformat(" ")) for name, score, played_at in rows()),
+    )
+    for index in GameResult.__table__.indexes:
+        db.execute(str(CreateIndex(index).compile(dialect=dialect)))
+    db.commit()
+    db.execute("ANALYZE")
+    db.close()
+
+
+async def timed(fn, repeat: int) -> float:
+    """Медиана времени вызова, мс."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк /api/game/progress")
+    parser.add_argument("--games", type=int, default=50_000, help="Игр у активного игрока")
+    parser.add_argument("--others", type=int, default=500_000, help="Игр остальных игроков")
+    parser.add_argument("--points", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    BENCH_DIR.mkdir(exist_ok=True)
+    try:
+        path = BENCH_DB
+        path.unlink(missing_ok=True)
+        print(f"создаю базу: {args.games:,} игр игрока + {args.others:,} остальных...", flush=True)
+        build_dataset(path, args.games, args.others)
+
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        session_maker = async_sessionmaker(engine, expire_on_commit=False)
+        async with session_maker() as session:
+            summary_query = (
+                select(func.count(), func.max(GameResult.played_at))
+                .where(GameResult.player_name == PLAYER)
+            )
+            total = (await session.execute(summary_query)).one()[0]
+
+            async def summary():
+                await session.execute(summary_query)
+
+            async def lttb():
+                await _build_progress(session, GameResult, PLAYER, args.points, "lttb", total)
+
+            async def minmax():
+                await _build_progress(session, GameResult, PLAYER, args.points, "minmax", total)
+
+            async def all_rows():
+                session.expunge_all()
+                query = select(GameResult).where(GameResult.player_name == PLAYER).order_by(GameResult.played_at)
+                (await session.execute(query)).scalars().all()
+
+            chart = await _build_progress(session, GameResult, PLAYER, args.points, "lttb", total)
+            print(f"\nигр: {total:,}, точек графика: {len(chart.points)}, JSON: {len(chart.model_dump_json()):,} байт")
+            print(f"{'summary':>10}{'lttb':>10}{'minmax':>10}{'all_rows':>10}   (мс, медиана)")
+            print(
+                f"{await timed(summary, args.repeat):>10.1f}{await timed(lttb, args.repeat):>10.1f}"
+                f"{await timed(minmax, args.repeat):>10.1f}{await timed(all_rows, 3):>10.1f}"
+            )
+        await engine.dispose()
+
+        # Повторный запрос через API — ответ из кэша (остаётся только summary)
+        from fastapi.testclient import TestClient
+
+        from app.main import app
+
+        with TestClient(app) as client:
+            url = f"/api/game/progress?player_name={PLAYER}&points={args.points}"
+            first = time.perf_counter()
+            client.get(url)
+            first = (time.perf_counter() - first) * 1000
+            samples = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                client.get(url)
+                samples.append((time.perf_counter() - started) * 1000)
+            print(f"\nAPI: первый запрос {first:.1f} мс, из кэша {statistics.median(samples):.1f} мс")
+    finally:
+        for leftover in BENCH_DIR.glob("progress.db*"):
+            leftover.unlink()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,169 @@
+"""
+Нагрузочный тест движка комнат: рой ботов в одном процессе.
+
+Что делаем?
+----------
+1. Поднимаем RoomManager и N комнат по P ботов в каждой
+2. Боты каждый тик выбирают безопасное направление (к ближайшей еде)
+3. Закончившиеся комнаты сразу заменяются новыми — комнат всегда N
+4. Исходящие сообщения читаются из очередей игроков (как это делал бы сокет)
+
+Что измеряем?
+------------
+- CPU движка на один тик комнаты (шаг + кодирование дельты + рассылка)
+- отставание тиков от расписания (p50/p99/max) и число "перегрузок"
+- средний размер дельты против полного состояния (байт)
+- оценку: сколько комнат выдержит одно ядро на заданном tick rate
+
+CPU ботов в оценку не входит — в реальности они работают на клиентах.
+
+Как запустить:
+    cd backend
+    python scripts/bench_rooms.py
+    python scripts/bench_rooms.py --rooms 500 --tick-ms 50 100 150 --seconds 10
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.game_core import BODY, DIRECTIONS, FOOD  # noqa: E402
+from app.rooms import RUNNING, Room, RoomManager, _encode  # noqa: E402
+
+
+def choose_direction(room: Room, snake) -> str:
+    """Бот: безопасный ход, по возможности — в сторону ближайшей еды."""
+    board = room.board
+    food = [cell for cell in range(board.size) if board.cells[cell] == FOOD]
+    hx, hy = board.xy(snake.head)
+    best, best_distance = snake.direction, None
+    for direction in DIRECTIONS:
+        cell = board.step(snake.head, direction)
+        if cell is None or board.cells[cell] == BODY:
+            continue
+        x, y = board.xy(cell)
+        distance = min((abs(x - fx) + abs(y - fy) for fx, fy in map(board.xy, food)), default=0)
+        if best_distance is None or distance < best_distance:
+            best, best_distance = direction, distance
+    return best
+
+
+class Swarm:
+    """Рой ботов поверх RoomManager с замером CPU движка."""
+
+    def __init__(self, rooms: int, players: int, tick_ms: int) -> None:
+        self.target_rooms = rooms
+        self.players = players
+        self.manager = RoomManager(
+            on_finish=self._replace_room,
+            max_players=players,
+            max_rooms=rooms * 2,
+            tick_ms=tick_ms,
+        )
+        self.engine_seconds = 0.0
+        self.lags: list[float] = []
+        self.delta_bytes: list[int] = []
+        self.state_bytes: list[int] = []
+        self.finished_rooms = 0
+
+        # Оборачиваем тик планировщика, чтобы мерить только работу движка
+        original_tick = self.manager._tick
+
+        def timed_tick(room, due, now):
+            start = time.perf_counter()
+            original_tick(room, due, now)
+            self.engine_seconds += time.perf_counter() - start
+            self.lags.append(now - due)
+
+        self.manager._tick = timed_tick
+
+    def fill(self) -> None:
+        while len(self.manager.rooms) < self.target_rooms:
+            room = self.manager.create_room()
+            for i in range(self.players):
+                room.add_player(f"bot{i}")
+            self.manager.start_room(room)
+            self.state_bytes.append(len(_encode(room.state_message(0))))
+
+    async def _replace_room(self, room: Room) -> None:
+        self.finished_rooms += 1
+        self.fill()
+
+    def drive_bots(self) -> None:
+        """Ходы ботов + вычитывание исходящих очередей."""
+        for room in self.manager.rooms.values():
+            if room.status != RUNNING:
+                continue
+            for player in room.players.values():
+                if player.snake is not None and player.snake.alive:
+                    player.snake.turn(choose_direction(room, player.snake))
+                while not player.outbox.empty():
+                    message = player.outbox.get_nowait()
+                    if message.startswith('{"type":"t"'):
+                        self.delta_bytes.append(len(message))
+
+
+async def run(rooms: int, players: int, tick_ms: int, seconds: float) -> dict:
+    swarm = Swarm(rooms, players, tick_ms)
+    swarm.manager.start()
+    swarm.fill()
+
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+    while time.perf_counter() - started < seconds:
+        swarm.drive_bots()
+        await asyncio.sleep(tick_ms / 2000)
+    wall = time.perf_counter() - started
+    cpu = time.process_time() - cpu_started
+    await swarm.manager.stop()
+
+    ticks = swarm.manager.ticks
+    per_tick = swarm.engine_seconds / max(ticks, 1)
+    lags = sorted(swarm.lags) or [0.0]
+    return {
+        "tick_ms": tick_ms,
+        "rooms": rooms,
+        "ticks_per_sec": ticks / wall,
+        "engine_us_per_tick": per_tick * 1_000_000,
+        "engine_core_share": swarm.engine_seconds / wall,
+        "process_core_share": cpu / wall,
+        "lag_p50_ms": statistics.median(lags) * 1000,
+        "lag_p99_ms": lags[int(len(lags) * 0.99) - 1 if len(lags) > 1 else 0] * 1000,
+        "overruns": swarm.manager.overruns,
+        "finished_rooms": swarm.finished_rooms,
+        "delta_bytes": statistics.mean(swarm.delta_bytes) if swarm.delta_bytes else 0,
+        "state_bytes": statistics.mean(swarm.state_bytes),
+        # Одно ядро = 1 секунда CPU в секунду; комната тикает 1000 / tick_ms раз в секунду
+        "rooms_per_core": 1 / (per_tick * 1000 / tick_ms) if per_tick else float("inf"),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Нагрузочный тест комнат (рой ботов)")
+    parser.add_argument("--rooms", type=int, default=200, help="Одновременных комнат")
+    parser.add_argument("--players", type=int, default=4, help="Ботов в комнате")
+    parser.add_argument("--tick-ms", type=int, nargs="+", default=[50, 100, 150], help="Интервалы тика")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Длительность каждого прогона")
+    args = parser.parse_args()
+
+    print(
+        f"{'tick':>6}{'rooms':>7}{'ticks/s':>10}{'µs/tick':>9}{'engine%':>9}{'proc%':>7}"
+        f"{'lag p50':>9}{'lag p99':>9}{'overrun':>9}{'delta B':>9}{'state B':>9}{'rooms/core':>12}"
+    )
+    for tick_ms in args.tick_ms:
+        r = asyncio.run(run(args.rooms, args.players, tick_ms, args.seconds))
+        print(
+            f"{r['tick_ms']:>6}{r['rooms']:>7}{r['ticks_per_sec']:>10.0f}{r['engine_us_per_tick']:>9.1f}"
+            f"{r['engine_core_share'] * 100:>8.1f}%{r['process_core_share'] * 100:>6.0f}%"
+            f"{r['lag_p50_ms']:>9.2f}{r['lag_p99_ms']:>9.2f}{r['overruns']:>9}"
+            f"{r['delta_bytes']:>9.0f}{r['state_bytes']:>9.0f}{r['rooms_per_core']:>12.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
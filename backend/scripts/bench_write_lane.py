@@ -0,0 +1,150 @@
+"""
+Бенчмарк записи результатов в SQLite: сессия на запись vs WriteLane.
+
+Что измеряем?
+------------
+N одновременных "клиентов" сохраняют результаты тем же кодом, что и
+POST /api/game/result (insert_result: INSERT результата + рекорд игрока).
+
+1. session — как было раньше: своя сессия и свой COMMIT на каждую запись,
+   писатели толкаются за блокировку SQLite (busy_timeout)
+2. lane    — через WriteLane: одна очередь, пачка записей в одной транзакции
+
+Для каждого режима: записей в секунду, задержка одной записи (p50/p99),
+число ошибок ("database is locked") и средний размер пачки.
+
+Каждый прогон — в новой временной базе (файл, WAL).
+
+Как запустить:
+    cd backend
+    python scripts/bench_write_lane.py
+    python scripts/bench_write_lane.py --writers 1 16 64 256 --writes 20
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+
+from app.database import Base, WriteLane  # noqa: E402
+from app.models import GameResult  # noqa: E402
+from app.results import insert_result  # noqa: E402
+
+
+def make_result(rng: random.Random) -> dict:
+    return {
+        "player_name": f"player{rng.randrange(1000)}",
+        "score": rng.randrange(500),
+        "duration": 60.0,
+        "max_length": 10,
+        "food_eaten": 10,
+        "bonuses_eaten": 1,
+    }
+
+
+async def create_tables(url: str) -> None:
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+        await conn.run_sync(Base.metadata.create_all)
+    await engine.dispose()
+
+
+async def run_clients(write, writers: int, writes: int) -> tuple[float, list[float], int]:
+    """writers клиентов по writes записей. Возвращает (секунды, задержки мс, ошибки)."""
+    latencies: list[float] = []
+    errors = 0
+
+    async def client(seed: int) -> None:
+        nonlocal errors
+        rng = random.Random(seed)
+        for _ in range(writes):
+            data = make_result(rng)
+            started = time.perf_counter()
+            try:
+                await write(lambda session: insert_result(session, GameResult, data))
+            except Exception:
+                errors += 1
+                continue
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(seed) for seed in range(writers)))
+    return time.perf_counter() - started, latencies, errors
+
+
+async def bench_session(url: str, writers: int, writes: int) -> tuple:
+    # Движок как у приложения без полосы (пул по умолчанию);
+    # busy_timeout — чтобы писатели ждали, а не падали сразу
+    engine = create_async_engine(url)
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        dbapi_connection.execute("PRAGMA busy_timeout=5000")
+
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def write(job):
+        async with session_maker() as session:
+            result = await session.run_sync(job)
+            await session.commit()
+            return result
+
+    outcome = await run_clients(write, writers, writes)
+    await engine.dispose()
+    return (*outcome, None)
+
+
+async def bench_lane(url: str, writers: int, writes: int, batch_ms: float) -> tuple:
+    lane = WriteLane(url, batch_ms=batch_ms)
+    lane.start()
+    outcome = await run_clients(lane.run, writers, writes)
+    stats = lane.stats()
+    await lane.stop()
+    return (*outcome, stats["avg_batch"])
+
+
+def percentile(samples: list[float], p: float) -> float:
+    if not samples:
+        return float("nan")
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк WriteLane")
+    parser.add_argument("--writers", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--writes", type=int, default=25, help="Записей на одного клиента")
+    parser.add_argument("--batch-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    print(f"{'режим':>8}{'клиентов':>10}{'записей/с':>12}{'p50, мс':>10}{'p99, мс':>10}{'ошибок':>8}{'пачка':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for writers in args.writers:
+            for mode in ("session", "lane"):
+                path = Path(tmp) / f"{mode}_{writers}.db"
+                url = f"sqlite+aiosqlite:///{path}"
+                await create_tables(url)
+                if mode == "session":
+                    elapsed, latencies, errors, batch = await bench_session(url, writers, args.writes)
+                else:
+                    elapsed, latencies, errors, batch = await bench_lane(url, writers, args.writes, args.batch_ms)
+                print(
+                    f"{mode:>8}{writers:>10}{len(latencies) / elapsed:>12.0f}"
+                    f"{statistics.median(latencies) if latencies else float('nan'):>10.1f}"
+                    f"{percentile(latencies, 0.99):>10.1f}{errors:>8}"
+                    f"{'—' if batch is None else f'{batch:.1f}':>8}"
+                )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
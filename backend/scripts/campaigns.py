@@ -0,0 +1,96 @@
+"""
+Управление промо-кампаниями из командной строки.
+
+Что умеет?
+---------
+- list   — активные кампании и число результатов в каждой
+- create — завести кампанию: таблицы результатов, рекордов и индексы
+           (сервер сам кампании не создаёт, если не задан CAMPAIGN_AUTO_CREATE=true)
+- detach — отключить закончившуюся кампанию: таблица переименовывается
+           в game_results_archive__<campaign>__<время> (данные остаются в базе)
+- drop   — удалить таблицу кампании целиком
+
+Отключение — одна DDL операция, сколько бы результатов ни было в кампании.
+
+Работающий сервер подхватывает изменения сам: новую кампанию — при первом
+запросе к ней (список перечитывается не чаще CAMPAIGN_REFRESH_SECONDS),
+отключённая отвечает 404.
+
+С шардированием (DB_SHARD_URLS) команды работают со всеми шардами,
+list показывает сумму результатов по шардам.
+
+Как запустить:
+    cd backend
+    python scripts/campaigns.py list
+    python scripts/campaigns.py create promo2025
+    python scripts/campaigns.py detach promo2025
+    python scripts/campaigns.py drop promo2025
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import func, select  # noqa: E402
+
+from app.campaigns import (  # noqa: E402
+    CampaignError,
+    active_campaigns,
+    campaign_model,
+    create_campaign,
+    detach_campaign,
+    load_campaigns,
+)
+from app.database import create_db_and_tables, shards  # noqa: E402
+
+
+async def run(args: argparse.Namespace) -> int:
+    await create_db_and_tables()
+    await load_campaigns()
+    try:
+        if args.command == "list":
+            for campaign in active_campaigns():
+                model = campaign_model(campaign)
+                count = 0
+                for shard in shards:
+                    async with shard.session_maker() as session:
+                        count += await session.scalar(select(func.count(model.id)))
+                print(f"{campaign:<34}{model.__tablename__:<48}{count:>10}")
+        elif args.command == "create":
+            await create_campaign(args.campaign)
+            print(f"Кампания '{args.campaign}' создана")
+        else:
+            archive = await detach_campaign(args.campaign, drop=args.command == "drop")
+            if archive:
+                print(f"Кампания '{args.campaign}' отключена, таблица: {archive}")
+            else:
+                print(f"Кампания '{args.campaign}' удалена")
+    except CampaignError as exc:
+        print(f"Ошибка: {exc}")
+        return 1
+    finally:
+        for shard in shards:
+            await shard.engine.dispose()
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Промо-кампании")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="Активные кампании")
+    commands_with_id = (
+        ("create", "Создать таблицы кампании"),
+        ("detach", "Переименовать таблицу в архивную"),
+        ("drop", "Удалить таблицу"),
+    )
+    for name, help_text in commands_with_id:
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("campaign", help="id кампании")
+    return asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
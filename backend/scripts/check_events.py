@@ -0,0 +1,203 @@
+"""
+Проверка журнала событий (app/events.py) и /api/events.
+
+Что проверяем?
+-------------
+Приложение запускается с маленькими сегментами (EVENTS_SEGMENT_BYTES),
+через API сохраняются --games результатов. Затем:
+
+1. Потребитель читает журнал порциями по --batch через /api/events,
+   коммитит смещение, "перезапускается" и дочитывает с закоммиченного —
+   каждое событие ровно один раз и по порядку, id совпадают с ответами POST
+2. Чтение с произвольных смещений (в середине сегментов, на границах)
+   совпадает с полным чтением — проверка разреженного индекса
+3. Оборванная запись в конце активного сегмента отрезается при открытии
+4. Retention по размеру удаляет старые сегменты: их смещения отдают 410,
+   самое старое оставшееся событие читается
+5. Без X-Events-Token (или с неверным) журнал не читается и смещение
+   потребителя не двигается
+
+Как запустить:
+    cd backend
+    python scripts/check_events.py
+    python scripts/check_events.py --games 5000 --segment-bytes 20000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+TOKEN = "check-events-token"
+
+
+def post_results(client, games: int, rng: random.Random) -> list[int]:
+    """Сохранить games результатов через API. Возвращает их id по порядку."""
+    ids = []
+    for number in range(games):
+        response = client.post("/api/game/result", json={
+            "player_name": f"player{rng.randrange(50)}",
+            "score": number,
+            "duration": 10.0,
+            "max_length": 5,
+            "food_eaten": 2,
+            "bonuses_eaten": 0,
+        })
+        ids.append(response.json()["id"])
+    return ids
+
+
+def consume(client, batch: int, until: int | None = None) -> list[int]:
+    """Читать журнал с закоммиченного смещения и коммитить (до until событий или до конца)."""
+    seen = []
+    while until is None or len(seen) < until:
+        page = client.get("/api/events", params={"consumer": "report", "max": batch}).json()
+        if not page["events"]:
+            break
+        seen += [record["event"]["id"] for record in page["events"]]
+        client.put("/api/events/consumers/report", json={"offset": page["next_offset"]})
+    return seen
+
+
+def check_consumer(client, ids: list[int], batch: int) -> list[str]:
+    """1. Потребитель с коммитом смещения и "перезапуском"."""
+    problems = []
+    seen = consume(client, batch, until=len(ids) // 2)
+    seen += consume(client, batch)
+    if seen != ids:
+        problems.append(f"потребитель прочитал {len(seen)} событий, ожидалось {len(ids)} по порядку")
+    lag = client.get("/api/events/consumers/report").json()["lag"]
+    if lag != 0:
+        problems.append(f"lag после дочитывания: {lag}")
+    return problems
+
+
+def check_auth(client, app) -> list[str]:
+    """5. Без токена и с неверным токеном — 401, смещение не меняется."""
+    from fastapi.testclient import TestClient
+
+    problems = []
+    before = client.get("/api/events/consumers/report").json()["offset"]
+    for name, headers in [("без токена", {}), ("неверный токен", {"X-Events-Token": "wrong"})]:
+        stranger = TestClient(app, headers=headers)
+        if stranger.get("/api/events").status_code != 401:
+            problems.append(f"{name}: журнал читается")
+        if stranger.put("/api/events/consumers/report", json={"offset": 0}).status_code != 401:
+            problems.append(f"{name}: смещение потребителя двигается")
+    if client.get("/api/events/consumers/report").json()["offset"] != before:
+        problems.append("смещение потребителя изменилось без токена")
+    return problems
+
+
+def check_reads(log, ids: list[int], rng: random.Random) -> list[str]:
+    """2. Чтение с произвольных смещений (в середине сегментов, на границах)."""
+    problems = []
+    games = len(ids)
+    for offset in sorted(rng.sample(range(games), 50)) + [0, games - 1]:
+        events = log.read(offset, 3)
+        expected = list(range(offset, min(offset + 3, games)))
+        if [event_offset for event_offset, _ in events] != expected:
+            problems.append(f"read({offset}): смещения {[o for o, _ in events]}")
+        elif b'"id":%d,' % ids[offset] not in events[0][1]:
+            problems.append(f"read({offset}): не то событие")
+    return problems
+
+
+def check_torn_tail(events_dir: Path, segment_bytes: int) -> list[str]:
+    """3. Оборванная запись в конце активного сегмента отрезается при открытии."""
+    from app.events import EventLog
+
+    problems = []
+    log = EventLog(str(events_dir), segment_bytes=segment_bytes)
+    log.open()
+    end = log.end_offset
+    log.close()
+    active = sorted(events_dir.glob("*.log"))[-1]
+    with open(active, "ab") as segment:
+        segment.write(b"\x00\x00\x01\x00garbage")
+    log = EventLog(str(events_dir), segment_bytes=segment_bytes)
+    log.open()
+    if log.end_offset != end:
+        problems.append(f"после оборванной записи end_offset {log.end_offset} != {end}")
+    offset = asyncio.run(log.append({"type": "check"}))
+    if offset != end or log.read(offset, 1)[0][1] != b'{"type":"check"}':
+        problems.append("после восстановления событие не дописывается")
+    log.close()
+    return problems
+
+
+def check_retention(events_dir: Path, segment_bytes: int) -> tuple[list[str], int]:
+    """4. Retention по размеру. Возвращает (расхождения, первое оставшееся смещение)."""
+    from app.events import EventLog, OffsetOutOfRange
+
+    problems = []
+    log = EventLog(str(events_dir), segment_bytes=segment_bytes, retention_bytes=segment_bytes * 3)
+    log.open()
+    start = log.start_offset
+    if start == 0 or log.stats()["segments"] > 4:
+        problems.append(f"retention: start_offset {start}, сегментов {log.stats()['segments']}")
+    try:
+        log.read(start - 1, 1)
+        problems.append("retention: удалённое смещение читается")
+    except OffsetOutOfRange:
+        pass
+    if log.read(start, 1)[0][0] != start:
+        problems.append("retention: самое старое событие не читается")
+    log.close()
+    return problems, start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Проверка журнала событий")
+    parser.add_argument("--games", type=int, default=1500)
+    parser.add_argument("--batch", type=int, default=97)
+    parser.add_argument("--segment-bytes", type=int, default=16_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        events_dir = Path(tmp) / "events"
+        # Настройки читаются при импорте приложения — окружение задаём до него
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{Path(tmp) / 'snake.db'}"
+        os.environ["EVENTS_ENABLED"] = "true"
+        os.environ["EVENTS_TOKEN"] = TOKEN
+        os.environ["EVENTS_DIR"] = str(events_dir)
+        os.environ["EVENTS_SEGMENT_BYTES"] = str(args.segment_bytes)
+        os.environ["SPOOL_ENABLED"] = "false"
+        os.environ["ROOMS_ENABLED"] = "false"
+
+        from fastapi.testclient import TestClient
+
+        from app.events import EventLog
+        from app.main import app
+
+        rng = random.Random(1)
+        with TestClient(app, headers={"X-Events-Token": TOKEN}) as client:
+            ids = post_results(client, args.games, rng)
+            problems = check_consumer(client, ids, args.batch)
+            problems += check_auth(client, app)
+            segments = client.get("/api/health").json()["events"]["segments"]
+
+        log = EventLog(str(events_dir), segment_bytes=args.segment_bytes)
+        log.open()
+        problems += check_reads(log, ids, rng)
+        log.close()
+        problems += check_torn_tail(events_dir, args.segment_bytes)
+        retention_problems, start = check_retention(events_dir, args.segment_bytes)
+        problems += retention_problems
+
+    print(f"Событий: {args.games}, сегментов: {segments}, после retention начинается с {start}")
+    for problem in problems:
+        print(f"❌ {problem}")
+    if not problems:
+        print("✅ Журнал событий в порядке")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""
+Проверка паритета: Python ядро (app/game_core.py) против frontend (useGame.js).
+
+Откуда берутся партии?
+---------------------
+Во frontend есть запись партии (см. TRACE_STORAGE_KEY в useGame.js):
+    1. npm run build && npm run preview
+    2. В консоли браузера: localStorage.setItem('snakeTrace', '1')
+    3. Сыграть партию до Game Over или победы
+    4. copy(JSON.stringify(window.__snakeTrace)) и сохранить в файл *.json
+
+Запись содержит направление на каждом тике, позиции появления еды/бонусов
+и моменты смены фаз бонуса (таймеры). Скрипт проигрывает партию через
+SnakeGame и сравнивает итог: статус, счёт, статистику и тело змейки.
+
+Записывайте партии в production сборке: в dev режиме React StrictMode
+вызывает обновления состояния дважды, и запись получается некорректной.
+
+В scripts/traces/ лежат несколько партий, сыгранных ботом через
+настоящий useGame.js (с бонусами и сменой фаз) — их удобно гонять
+после любых изменений правил.
+
+Как запустить:
+    cd backend
+    python scripts/check_parity.py scripts/traces/*.json
+"""
+
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.game_core import Board, SnakeGame  # noqa: E402
+
+
+class ParityError(Exception):
+    """Python ядро разошлось с записанной партией."""
+
+
+class RecordedSpawns:
+    """Выдаёт позиции еды/бонусов в том порядке, в котором их выбрал браузер."""
+
+    def __init__(self, spawns: list[dict]) -> None:
+        self.spawns = list(spawns)
+        self.index = 0
+        self.game: SnakeGame | None = None
+
+    def __call__(self, kind: str, board: Board) -> int:
+        if self.index >= len(self.spawns):
+            raise ParityError(f"лишний спавн '{kind}': в записи их всего {len(self.spawns)}")
+        spawn = self.spawns[self.index]
+        self.index += 1
+
+        tick = self.game.ticks if self.game is not None else 0
+        if spawn["kind"] != kind or spawn["tick"] != tick:
+            raise ParityError(
+                f"тик {tick}: ожидался спавн {spawn['kind']} на тике {spawn['tick']}, а ядро спавнит {kind}"
+            )
+
+        cell = board.cell(spawn["x"], spawn["y"])
+        if not board.is_free(cell):
+            raise ParityError(f"тик {tick}: {kind} в ({spawn['x']}, {spawn['y']}) — клетка занята в ядре")
+        return cell
+
+
+def replay(trace: dict) -> SnakeGame:
+    """Проиграть записанную партию через SnakeGame."""
+    spawns = RecordedSpawns(trace["spawns"])
+    game = SnakeGame(grid_size=trace["gridSize"], phrase_length=trace["phraseLength"], spawn=spawns)
+    spawns.game = game
+
+    events = sorted(trace["events"], key=lambda event: event["tick"])
+    event_index = 0
+    for tick, direction in enumerate(trace["ticks"]):
+        # Таймеры бонуса, сработавшие до этого тика
+        while event_index < len(events) and events[event_index]["tick"] <= tick:
+            if events[event_index]["type"] == "blink":
+                game.blink_bonus()
+            else:
+                game.expire_bonus()
+            event_index += 1
+
+        game.snake.pending = direction
+        game.step()
+
+    if spawns.index != len(spawns.spawns):
+        raise ParityError(f"ядро использовало {spawns.index} спавнов из {len(spawns.spawns)}")
+    return game
+
+
+def compare(trace: dict, game: SnakeGame) -> list[str]:
+    """Сравнить итог партии. Returns: список расхождений."""
+    expected = trace["result"]
+    snake = [{"x": x, "y": y} for x, y in map(game.board.xy, game.snake.body)]
+    actual = {
+        "status": game.status,
+        "score": game.snake.score,
+        "foodEaten": game.snake.food_eaten,
+        "bonusesEaten": game.snake.bonuses_eaten,
+        "maxLength": game.snake.max_length,
+        "snake": snake,
+    }
+    return [
+        f"{key}: frontend={expected[key]!r}, ядро={value!r}"
+        for key, value in actual.items()
+        if expected.get(key) != value
+    ]
+
+
+def main() -> int:
+    paths = [Path(arg) for arg in sys.argv[1:]]
+    if not paths:
+        print("Использование: python scripts/check_parity.py scripts/traces/*.json")
+        return 2
+
+    failed = 0
+    for path in paths:
+        trace = json.loads(path.read_text(encoding="utf-8"))
+        try:
+            problems = compare(trace, replay(trace))
+        except ParityError as exc:
+            problems = [str(exc)]
+
+        if problems:
+            failed += 1
+            print(f"❌ {path.name}")
+            for problem in problems:
+                print(f"   {problem}")
+        else:
+            print(f"✅ {path.name}: {len(trace['ticks'])} тиков, счёт {trace['result']['score']}")
+
+    print(f"\nПартий: {len(paths)}, расхождений: {failed}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+"""
+Проверка шардирования на нескольких SQLite файлах.
+
+Что проверяем?
+-------------
+Приложение запускается с DB_SHARD_URLS на N файлов во временном каталоге,
+через API сохраняются случайные результаты (с равными очками, несколькими
+играми на игрока и очисткой истории). Затем ответы эндпоинтов сравниваются
+с "эталоном" — тем же самым, посчитанным на Python по всем результатам сразу:
+
+- /api/leaderboard (mode=games и mode=players) — записи, места, итоги
+- /api/leaderboard/position — место и рекорд каждого игрока
+- /api/leaderboard/around — окно вокруг нескольких игроков
+- /api/game/stats и /api/game/history — данные игрока лежат в одном шарде
+
+Заодно проверяется, что игроки действительно разложены по разным шардам.
+
+Как запустить:
+    cd backend
+    python scripts/check_shards.py
+    python scripts/check_shards.py --shards 4 --players 300 --games 2000
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+from typing import NamedTuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def competition_ranks(scores: list[int]) -> list[int]:
+    """Места при равных очках: 1, 2, 2, 4."""
+    ranks = []
+    for idx, score in enumerate(scores):
+        ranks.append(ranks[-1] if ranks and scores[idx - 1] == score else idx + 1)
+    return ranks
+
+
+class Reference(NamedTuple):
+    """Эталон, посчитанный на Python по всем результатам сразу."""
+
+    bests: dict[str, int]              # Рекорд каждого игрока
+    ranking: list[tuple[str, int]]     # (игрок, рекорд) от лучшего
+    position: dict[str, int]           # Место игрока
+
+
+def reference(games: list[dict]) -> Reference:
+    bests: dict[str, int] = {}
+    for game in games:
+        bests[game["player_name"]] = max(bests.get(game["player_name"], -1), game["score"])
+    ranking = sorted(bests.items(), key=lambda item: (item[1], item[0]), reverse=True)
+    ranks = competition_ranks([score for _, score in ranking])
+    position = {name: rank for (name, _), rank in zip(ranking, ranks)}
+    return Reference(bests, ranking, position)
+
+
+def check_games_board(client, games: list[dict], ref: Reference, limit: int) -> list[str]:
+    """mode=games: очки TOP-N (при равных очках порядок игроков не определён) и итоги."""
+    problems = []
+    board = client.get(f"/api/leaderboard?limit={limit}").json()
+    expected_scores = sorted((game["score"] for game in games), reverse=True)[:limit]
+    if [entry["score"] for entry in board["entries"]] != expected_scores:
+        problems.append("mode=games: очки TOP-N не совпадают")
+    if board["total_games"] != len(games) or board["total_players"] != len(ref.bests):
+        problems.append(f"итоги: {board['total_games']}/{board['total_players']} != {len(games)}/{len(ref.bests)}")
+    return problems
+
+
+def check_players_board(client, ref: Reference, limit: int) -> list[str]:
+    """mode=players: игроки, очки и места."""
+    board = client.get(f"/api/leaderboard?limit={limit}&mode=players").json()
+    got = [(entry["player_name"], entry["score"], entry["rank"]) for entry in board["entries"]]
+    expected = [(name, score, ref.position[name]) for name, score in ref.ranking][:limit]
+    return [f"mode=players: {got[:5]}... != {expected[:5]}..."] if got != expected else []
+
+
+def check_positions(client, ref: Reference) -> list[str]:
+    """/position для каждого игрока."""
+    problems = []
+    for name, score in ref.bests.items():
+        answer = client.get("/api/leaderboard/position", params={"player_name": name}).json()
+        if (answer["position"], answer["best_score"]) != (ref.position[name], score):
+            problems.append(f"position {name}: {answer['position']} != {ref.position[name]}")
+    return problems
+
+
+def check_around(client, ref: Reference, k: int = 3) -> list[str]:
+    """/around для игроков из топа, середины и хвоста."""
+    problems = []
+    for idx in (0, len(ref.ranking) // 2, len(ref.ranking) - 1):
+        name = ref.ranking[idx][0]
+        answer = client.get("/api/leaderboard/around", params={"player_name": name, "k": k}).json()
+        window = ref.ranking[max(0, idx - k): idx + k + 1]
+        expected = [(row_name, score, ref.position[row_name]) for row_name, score in window]
+        got = [(entry["player_name"], entry["score"], entry["rank"]) for entry in answer["entries"]]
+        if got != expected:
+            problems.append(f"around {name}: {got} != {expected}")
+    return problems
+
+
+def check_player_data(client, games: list[dict], ref: Reference) -> list[str]:
+    """Статистика и история игрока (данные игрока лежат в одном шарде)."""
+    problems = []
+    for name in random.Random(0).sample(sorted(ref.bests), min(20, len(ref.bests))):
+        own = [game for game in games if game["player_name"] == name]
+        stats = client.get("/api/game/stats", params={"player_name": name}).json()
+        history = client.get("/api/game/history", params={"player_name": name, "limit": 100}).json()
+        if stats["total_games"] != len(own) or stats["best_score"] != ref.bests[name]:
+            problems.append(f"stats {name}: {stats['total_games']} игр, рекорд {stats['best_score']}")
+        if len(history) != min(len(own), 100):
+            problems.append(f"history {name}: {len(history)} != {len(own)}")
+    return problems
+
+
+def check(client, games: list[dict], limit: int) -> list[str]:
+    """Сравнить ответы API с эталоном. Возвращает список расхождений."""
+    ref = reference(games)
+    return [
+        *check_games_board(client, games, ref, limit),
+        *check_players_board(client, ref, limit),
+        *check_positions(client, ref),
+        *check_around(client, ref),
+        *check_player_data(client, games, ref),
+    ]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Проверка шардирования")
+    parser.add_argument("--shards", type=int, default=3)
+    parser.add_argument("--players", type=int, default=120)
+    parser.add_argument("--games", type=int, default=800)
+    parser.add_argument("--limit", type=int, default=25)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [Path(tmp) / f"shard{index}.db" for index in range(args.shards)]
+        # Настройки читаются при импорте приложения — окружение задаём до него
+        os.environ["DB_SHARD_URLS"] = json.dumps([f"sqlite+aiosqlite:///{path}" for path in paths])
+        os.environ["SPOOL_ENABLED"] = "false"
+        os.environ["ROOMS_ENABLED"] = "false"
+
+        from fastapi.testclient import TestClient
+
+        from app.main import app
+
+        rng = random.Random(args.players)
+        games = []
+        with TestClient(app) as client:
+            for _ in range(args.games):
+                game = {
+                    "player_name": f"player{rng.randrange(args.players)}",
+                    # Маленький разброс очков — много равных рекордов
+                    "score": rng.randrange(60),
+                    "duration": 10.0,
+                    "max_length": 5,
+                    "food_eaten": 2,
+                    "bonuses_eaten": 0,
+                }
+                response = client.post("/api/game/result", json=game)
+                if response.status_code != 201:
+                    print(f"❌ POST /api/game/result: {response.status_code} {response.text}")
+                    return 1
+                games.append(game)
+
+            # Очистка истории — тоже в шарде игрока
+            for name in {game["player_name"] for game in games[:5]}:
+                client.delete("/api/game/history", params={"player_name": name})
+                games = [game for game in games if game["player_name"] != name]
+
+            problems = check(client, games, args.limit)
+
+        per_shard = []
+        for path in paths:
+            db = sqlite3.connect(path)
+            per_shard.append(db.execute("SELECT COUNT(DISTINCT player_name) FROM game_results").fetchone()[0])
+            db.close()
+
+    print(f"Шардов: {args.shards}, игроков по шардам: {per_shard}, игр: {len(games)}")
+    if sum(1 for players in per_shard if players) < min(args.shards, 2):
+        problems.append("все игроки попали в один шард")
+    for problem in problems:
+        print(f"❌ {problem}")
+    if not problems:
+        print("✅ Ответы совпадают с эталоном")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
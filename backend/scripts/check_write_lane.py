@@ -0,0 +1,115 @@
+"""
+Проверка полосы записи SQLite (WriteLane в app/database.py) в приложении.
+
+Что проверяем?
+-------------
+Приложение запускается с DB_WRITE_LANE=true на временном файле SQLite
+(как при обычном старте — с lifespan), и --clients одновременных клиентов
+разом отправляют POST /api/game/result. Затем:
+
+1. Все ответы — 201: ни один результат не упал с "database is locked"
+   и не ушёл в журнал spool (202)
+2. /api/health показывает полосу записи: записи шли пачками (batches < jobs)
+3. В базе ровно столько игр, сколько ответов 201, а таблица рекордов
+   и гистограмма совпадают с пересчётом по всем играм
+
+Как запустить:
+    cd backend
+    python scripts/check_write_lane.py
+    python scripts/check_write_lane.py --clients 400
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+async def burst(app, clients: int) -> tuple[Counter, dict]:
+    """clients одновременных POST. Возвращает (коды ответов, /api/health)."""
+    import httpx
+
+    rng = random.Random(1)
+    games = [
+        {
+            "player_name": f"player{rng.randrange(clients // 4 + 1)}",
+            "score": rng.randrange(300),
+            "duration": 30.0,
+            "max_length": 8,
+            "food_eaten": 6,
+            "bonuses_eaten": 1,
+        }
+        for _ in range(clients)
+    ]
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://check") as client:
+            responses = await asyncio.gather(*(client.post("/api/game/result", json=game) for game in games))
+            health = (await client.get("/api/health")).json()
+    return Counter(response.status_code for response in responses), health
+
+
+def check_database(path: Path, created: int) -> list[str]:
+    """Игры, рекорды и гистограмма в базе."""
+    problems = []
+    db = sqlite3.connect(path)
+    games = db.execute("SELECT COUNT(*) FROM game_results").fetchone()[0]
+    if games != created:
+        problems.append(f"в базе {games} игр, ответов 201: {created}")
+    bests = dict(db.execute("SELECT player_name, best_score FROM player_bests"))
+    expected = dict(db.execute("SELECT player_name, MAX(score) FROM game_results GROUP BY player_name"))
+    if bests != expected:
+        problems.append("таблица рекордов не совпадает с пересчётом")
+    counts = dict(db.execute("SELECT best_score, players FROM player_score_counts WHERE players > 0"))
+    if counts != dict(Counter(expected.values())):
+        problems.append("гистограмма рекордов не совпадает с пересчётом")
+    db.close()
+    return problems
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Проверка полосы записи SQLite")
+    parser.add_argument("--clients", type=int, default=400)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "snake.db"
+        # Настройки читаются при импорте приложения — окружение задаём до него
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{path}"
+        os.environ["DB_WRITE_LANE"] = "true"
+        os.environ["SPOOL_DIR"] = str(Path(tmp) / "spool")
+        os.environ["EVENTS_ENABLED"] = "false"
+        os.environ["ROOMS_ENABLED"] = "false"
+        os.environ.pop("DB_SHARD_URLS", None)
+
+        from app.main import app
+
+        statuses, health = asyncio.run(burst(app, args.clients))
+        lane = health.get("write_lane")
+
+        problems = []
+        if statuses != {201: args.clients}:
+            problems.append(f"ответы: {dict(statuses)}, ожидалось {{201: {args.clients}}}")
+        if lane is None:
+            problems.append("полоса записи не включилась (/api/health: write_lane = null)")
+        elif lane["jobs"] != args.clients or lane["batches"] >= lane["jobs"]:
+            problems.append(f"полоса записи: {lane['jobs']} записей в {lane['batches']} пачках")
+        problems += check_database(path, statuses[201])
+
+    print(f"Клиентов: {args.clients}, ответы: {dict(statuses)}, полоса записи: {lane}")
+    for problem in problems:
+        print(f"❌ {problem}")
+    if not problems:
+        print("✅ Полоса записи в порядке")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,7 +3,7 @@
 """
 
 import os
-from pydantic import Field
+from pydantic import Field, field_validator, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -12,6 +12,42 @@ class DatabaseSettings(BaseSettings):
     
     model_config = SettingsConfigDict(env_prefix="DB_")
     
+    # === Очередь записи для SQLite (см. WriteLane в app/database.py) ===
+    # Действует только для SQLite в файле (PostgreSQL пишет параллельно сам).
+    # Выигрыш и при одном писателе, и под нагрузкой — scripts/bench_write_lane.py
+    write_lane: bool = Field(
+        default=True,
+        description="SQLite: писать через одно соединение с групповым коммитом"
+    )
+    
+    write_batch_ms: float = Field(
+        default=2.0,
+        description="Сколько ждать ещё записей перед коммитом пачки (мс)"
+    )
+    
+    write_batch_max: int = Field(
+        default=256,
+        description="Максимум записей в одной транзакции"
+    )
+    
+    sqlite_wal: bool = Field(
+        default=True,
+        description="SQLite: журнал WAL (чтения не блокируются записью)"
+    )
+    
+    # === Шардирование (см. shard_for в app/database.py) ===
+    # JSON список: DB_SHARD_URLS='["sqlite+aiosqlite:///./shard0.db", "sqlite+aiosqlite:///./shard1.db"]'
+    # Пустой список — одна база из DATABASE_URL
+    shard_urls: list[str] = Field(
+        default=[],
+        description="URL баз-шардов (игрок попадает в шард по хэшу имени)"
+    )
+    
+    @field_validator("shard_urls")
+    @classmethod
+    def _async_shard_urls(cls, urls: list[str]) -> list[str]:
+        return [_async_url(url) for url in urls]
+    
     # URL подключения к базе данных
     # Render устанавливает DATABASE_URL при подключении PostgreSQL
     # Для локальной разработки используем SQLite
@@ -20,17 +56,22 @@ class DatabaseSettings(BaseSettings):
         database_url = os.getenv("DATABASE_URL")
         
         if database_url:
-            # Render даёт URL в формате postgres://, а SQLAlchemy нужен postgresql+asyncpg://
-            if database_url.startswith("postgres://"):
-                database_url = database_url.replace("postgres://", "postgresql+asyncpg://", 1)
-            elif database_url.startswith("postgresql://"):
-                database_url = database_url.replace("postgresql://", "postgresql+asyncpg://", 1)
-            return database_url
+            return _async_url(database_url)
         
         # Fallback для локальной разработки
         return "sqlite+aiosqlite:///./snake.db"
 
 
+def _async_url(database_url: str) -> str:
+    """URL с асинхронным драйвером."""
+    # Render даёт URL в формате postgres://, а SQLAlchemy нужен postgresql+asyncpg://
+    if database_url.startswith("postgres://"):
+        return database_url.replace("postgres://", "postgresql+asyncpg://", 1)
+    if database_url.startswith("postgresql://"):
+        return database_url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    return database_url
+
+
 class GameSettings(BaseSettings):
     """Настройки игры."""
     
@@ -47,6 +88,266 @@ class GameSettings(BaseSettings):
     )
 
 
+class CompressionSettings(BaseSettings):
+    """Настройки сжатия HTTP ответов."""
+
+    model_config = SettingsConfigDict(env_prefix="COMPRESSION_")
+
+    enabled: bool = Field(
+        default=True,
+        description="Сжимать ответы gzip/brotli"
+    )
+
+    minimum_size: int = Field(
+        default=500,
+        description="Минимальный размер ответа (байт) для сжатия"
+    )
+
+    gzip_level: int = Field(
+        default=6,
+        description="Уровень gzip для обычных ответов (1-9)"
+    )
+
+    brotli_quality: int = Field(
+        default=4,
+        description="Уровень brotli для обычных ответов (0-11)"
+    )
+
+    # Закэшированные ответы сжимаются один раз — можно сжимать сильнее
+    cached_gzip_level: int = Field(
+        default=9,
+        description="Уровень gzip для закэшированных ответов"
+    )
+
+    # 11 сжимает ещё на ~8%, но в 30 раз медленнее (см. scripts/bench_compression.py)
+    cached_brotli_quality: int = Field(
+        default=8,
+        description="Уровень brotli для закэшированных ответов"
+    )
+
+
+class CacheSettings(BaseSettings):
+    """Настройки кэша ответов."""
+
+    model_config = SettingsConfigDict(env_prefix="CACHE_")
+
+    enabled: bool = Field(
+        default=True,
+        description="Кэшировать ответы таблицы лидеров"
+    )
+
+    max_entries: int = Field(
+        default=256,
+        description="Максимальное количество записей в кэше"
+    )
+
+    ttl_seconds: float = Field(
+        default=30.0,
+        description="Время жизни записи (0 = без ограничения)"
+    )
+
+    progress_enabled: bool = Field(
+        default=True,
+        description="Кэшировать графики прогресса игроков (/api/game/progress)"
+    )
+
+    progress_max_entries: int = Field(
+        default=1024,
+        description="Максимум графиков прогресса в кэше"
+    )
+
+
+class ProfilingSettings(BaseSettings):
+    """Настройки профилирования (всё выключено по умолчанию)."""
+
+    model_config = SettingsConfigDict(env_prefix="PROFILING_")
+
+    enabled: bool = Field(
+        default=False,
+        description="Включить семплирующий профайлер запросов"
+    )
+
+    sample_rate: float = Field(
+        default=0.0,
+        description="Доля случайно профилируемых запросов (0.01 = 1%)"
+    )
+
+    header_name: str = Field(
+        default="X-Profile",
+        description="Заголовок, включающий профилирование запроса"
+    )
+
+    token: str = Field(
+        default="",
+        description="Если задан — заголовок должен совпадать с этим значением"
+    )
+
+    interval_ms: float = Field(
+        default=5.0,
+        description="Интервал семплирования стека (мс)"
+    )
+
+    output_dir: str = Field(
+        default="./profiles",
+        description="Куда писать профили (формат folded stacks)"
+    )
+
+    slow_query_ms: float = Field(
+        default=0.0,
+        description="Порог медленного SQL запроса в мс (0 = лог выключен)"
+    )
+
+    slow_query_explain: bool = Field(
+        default=True,
+        description="Добавлять EXPLAIN в лог медленных запросов"
+    )
+
+
+class RoomsSettings(BaseSettings):
+    """Настройки мультиплеерных комнат."""
+
+    model_config = SettingsConfigDict(env_prefix="ROOMS_")
+
+    # WebSocket без авторизации и фоновый планировщик тиков — только по явному
+    # ROOMS_ENABLED=true, как и остальные новые подсистемы
+    enabled: bool = Field(
+        default=False,
+        description="Включить мультиплеерные комнаты (WebSocket)"
+    )
+
+    grid_size: int = Field(
+        default=20,
+        description="Размер поля комнаты (клеток по стороне)"
+    )
+
+    max_players: int = Field(
+        default=4,
+        description="Максимум игроков в комнате (при заполнении игра стартует)"
+    )
+
+    food_count: int = Field(
+        default=2,
+        description="Сколько еды одновременно лежит на поле"
+    )
+
+    max_rooms: int = Field(
+        default=500,
+        description="Максимум комнат в одном процессе"
+    )
+
+    outbox_size: int = Field(
+        default=64,
+        description="Очередь исходящих сообщений игрока (при переполнении — пересинхронизация)"
+    )
+
+
+class CampaignSettings(BaseSettings):
+    """Настройки промо-кампаний (у каждой — своя таблица результатов)."""
+
+    model_config = SettingsConfigDict(env_prefix="CAMPAIGN_")
+
+    auto_create: bool = Field(
+        default=False,
+        description="Создавать кампанию при первом результате (иначе — scripts/campaigns.py create)"
+    )
+
+    refresh_seconds: float = Field(
+        default=5.0,
+        description="Как часто перечитывать список кампаний из базы при незнакомом id"
+    )
+
+    max_campaigns: int = Field(
+        default=50,
+        description="Максимум активных кампаний (защита от создания таблиц мусорными id)"
+    )
+
+
+class SpoolSettings(BaseSettings):
+    """Настройки локального журнала результатов (когда база недоступна)."""
+
+    model_config = SettingsConfigDict(env_prefix="SPOOL_")
+
+    enabled: bool = Field(
+        default=True,
+        description="Писать результат в локальный журнал, если база недоступна"
+    )
+
+    dir: str = Field(
+        default="./spool",
+        description="Каталог журнала (должен переживать перезапуск процесса)"
+    )
+
+    replay_interval_seconds: float = Field(
+        default=5.0,
+        description="Как часто пробовать перенести журнал в базу"
+    )
+
+    replay_batch: int = Field(
+        default=100,
+        description="Сколько записей журнала переносить за один проход"
+    )
+
+    max_attempts: int = Field(
+        default=5,
+        description="После стольких неудачных попыток запись журнала уходит в results.dead"
+    )
+
+
+class EventsSettings(BaseSettings):
+    """Настройки журнала событий (принятые результаты для аналитики, /api/events)."""
+
+    model_config = SettingsConfigDict(env_prefix="EVENTS_")
+
+    # Журнал отдаёт все результаты и даёт двигать смещения потребителей —
+    # включается только вместе с EVENTS_TOKEN
+    enabled: bool = Field(
+        default=False,
+        description="Дописывать принятые результаты в журнал событий (нужен EVENTS_TOKEN)"
+    )
+
+    dir: str = Field(
+        default="./events",
+        description="Каталог сегментов журнала"
+    )
+
+    segment_bytes: int = Field(
+        default=16 * 1024 * 1024,
+        description="Размер сегмента, после которого начинается новый"
+    )
+
+    retention_bytes: int = Field(
+        default=1024 * 1024 * 1024,
+        description="Удалять старые сегменты, когда журнал больше (0 = без ограничения)"
+    )
+
+    retention_hours: float = Field(
+        default=7 * 24,
+        description="Удалять сегменты старше (0 = без ограничения)"
+    )
+
+    fsync: bool = Field(
+        default=False,
+        description="fsync после каждого события (медленнее, но переживает сбой ОС)"
+    )
+
+    max_batch: int = Field(
+        default=1000,
+        description="Максимум событий в одном ответе /api/events"
+    )
+
+    token: str = Field(
+        default="",
+        description="/api/events требует заголовок X-Events-Token с этим значением"
+    )
+
+    @model_validator(mode="after")
+    def _token_required(self) -> "EventsSettings":
+        # Без токена журнал и смещения потребителей были бы открыты всем — не стартуем
+        if self.enabled and not self.token:
+            raise ValueError("EVENTS_ENABLED=true требует EVENTS_TOKEN")
+        return self
+
+
 class Settings(BaseSettings):
     """Главный класс настроек приложения."""
     
@@ -58,6 +359,13 @@ class Settings(BaseSettings):
     
     db: DatabaseSettings = DatabaseSettings()
     game: GameSettings = GameSettings()
+    compression: CompressionSettings = CompressionSettings()
+    cache: CacheSettings = CacheSettings()
+    profiling: ProfilingSettings = ProfilingSettings()
+    rooms: RoomsSettings = RoomsSettings()
+    campaigns: CampaignSettings = CampaignSettings()
+    spool: SpoolSettings = SpoolSettings()
+    events: EventsSettings = EventsSettings()
     
     debug: bool = Field(
         default=False,
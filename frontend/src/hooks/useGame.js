@@ -36,6 +36,27 @@ export const GAME_STATUS = {
   VICTORY: 'victory',
 };
 
+// Запись партии для проверки паритета с backend (backend/scripts/check_parity.py).
+// Включается так: localStorage.setItem('snakeTrace', '1'), затем играть в production сборке
+// (npm run build && npm run preview). После игры: copy(JSON.stringify(window.__snakeTrace))
+const TRACE_STORAGE_KEY = 'snakeTrace';
+
+function isTraceEnabled() {
+  try {
+    return localStorage.getItem(TRACE_STORAGE_KEY) === '1';
+  } catch {
+    return false;
+  }
+}
+
+/**
+ * Короткое имя направления для записи партии: UP -> 'U'.
+ */
+function directionKey(direction) {
+  const name = Object.keys(DIRECTIONS).find(key => DIRECTIONS[key] === direction);
+  return name ? name[0] : '?';
+}
+
 /**
  * Генерирует секретную фразу с именем игрока.
  */
@@ -115,6 +136,9 @@ export function useGame(playerName = 'Player') {
   // Ref для актуальных значений food и bonus (чтобы избежать stale closure)
   const gameStateRef = useRef({ food: null, bonus: null });
   
+  // Запись партии (null — запись выключена)
+  const traceRef = useRef(null);
+  
   // Синхронизируем phraseLength при смене имени
   useEffect(() => {
     phraseLengthRef.current = phraseLength;
@@ -156,6 +180,17 @@ export function useGame(playerName = 'Player') {
     const newSnake = createInitialSnake();
     const newFood = getRandomPosition(newSnake);
     
+    traceRef.current = isTraceEnabled() ? {
+      version: 1,
+      gridSize: GRID_SIZE,
+      phraseLength: phraseLengthRef.current,
+      ticks: [],
+      spawns: [{ tick: 0, kind: 'food', x: newFood.x, y: newFood.y }],
+      events: [],
+      result: null,
+    } : null;
+    window.__snakeTrace = traceRef.current;
+    
     clearBonusTimer();
     
     setSnake(newSnake);
@@ -225,6 +260,10 @@ export function useGame(playerName = 'Player') {
     clearBonusTimer();
     
     const bonusPosition = getRandomPosition(snakePos, foodPos);
+    if (traceRef.current) {
+      const trace = traceRef.current;
+      trace.spawns.push({ tick: trace.ticks.length, kind: 'bonus', x: bonusPosition.x, y: bonusPosition.y });
+    }
     const newBonus = {
       x: bonusPosition.x,
       y: bonusPosition.y,
@@ -241,10 +280,16 @@ export function useGame(playerName = 'Player') {
         if (prev && prev.id === newBonus.id) {
           const blinking = { ...prev, phase: BONUS_PHASE.BLINKING };
           gameStateRef.current.bonus = blinking;
+          if (traceRef.current) {
+            traceRef.current.events.push({ tick: traceRef.current.ticks.length, type: 'blink' });
+          }
           
           // Ещё через 5 сек удаляем
           bonusTimerRef.current = setTimeout(() => {
             gameStateRef.current.bonus = null;
+            if (traceRef.current) {
+              traceRef.current.events.push({ tick: traceRef.current.ticks.length, type: 'expire' });
+            }
             setBonus(null);
           }, BONUS_BLINKING_DURATION);
           
@@ -262,6 +307,9 @@ export function useGame(playerName = 'Player') {
     setSnake((currentSnake) => {
       const head = currentSnake[0];
       const dir = directionRef.current;
+      if (traceRef.current) {
+        traceRef.current.ticks.push(directionKey(dir));
+      }
       const newHead = {
         x: head.x + dir.x,
         y: head.y + dir.y,
@@ -319,6 +367,10 @@ export function useGame(playerName = 'Player') {
         
         const currentBonus = gameStateRef.current.bonus;
         const newFood = getRandomPosition(newSnake, null, currentBonus);
+        if (traceRef.current) {
+          const trace = traceRef.current;
+          trace.spawns.push({ tick: trace.ticks.length, kind: 'food', x: newFood.x, y: newFood.y });
+        }
         gameStateRef.current.food = newFood;
         setFood(newFood);
         
@@ -426,6 +478,15 @@ export function useGame(playerName = 'Player') {
     return () => window.removeEventListener('keydown', handleKeyDown);
   }, [status, changeDirection, togglePause, startGame]);
   
+  // === Итог записанной партии ===
+  useEffect(() => {
+    const trace = traceRef.current;
+    if (trace && !trace.result && (status === GAME_STATUS.GAME_OVER || status === GAME_STATUS.VICTORY)) {
+      trace.result = { status, score, snake, ...stats };
+      console.info('🐍 Партия записана: copy(JSON.stringify(window.__snakeTrace))');
+    }
+  }, [status, score, snake, stats]);
+  
   // === Обновление рекорда ===
   useEffect(() => {
     if (score > highScore) {
@@ -19,6 +19,19 @@
 // В production: используем переменную окружения VITE_API_URL
 const API_BASE_URL = import.meta.env.VITE_API_URL || '/api';
 
+// Промо-кампания: у каждой своя таблица лидеров на backend
+// Не задана — результаты идут в общую таблицу (кампания default)
+const CAMPAIGN = import.meta.env.VITE_CAMPAIGN || '';
+
+/**
+ * Параметр &campaign=... для запросов (пустая строка, если кампания не задана).
+ * 
+ * @returns {string}
+ */
+function campaignParam() {
+  return CAMPAIGN ? `&campaign=${encodeURIComponent(CAMPAIGN)}` : '';
+}
+
 /**
  * Базовая функция для HTTP запросов.
  * 
@@ -92,6 +105,7 @@ export async function saveGameResult(gameResult) {
       max_length: gameResult.maxLength,
       food_eaten: gameResult.foodEaten,
       bonuses_eaten: gameResult.bonusesEaten,
+      ...(CAMPAIGN && { campaign: CAMPAIGN }),
     }),
   });
 }
@@ -103,7 +117,7 @@ export async function saveGameResult(gameResult) {
  * @returns {Promise<Object>} - статистика игрока
  */
 export async function getPlayerStats(playerName = 'Player') {
-  return fetchApi(`/game/stats?player_name=${encodeURIComponent(playerName)}`);
+  return fetchApi(`/game/stats?player_name=${encodeURIComponent(playerName)}${campaignParam()}`);
 }
 
 /**
@@ -114,7 +128,7 @@ export async function getPlayerStats(playerName = 'Player') {
  * @returns {Promise<Array>} - список последних игр
  */
 export async function getGameHistory(playerName = 'Player', limit = 10) {
-  return fetchApi(`/game/history?player_name=${encodeURIComponent(playerName)}&limit=${limit}`);
+  return fetchApi(`/game/history?player_name=${encodeURIComponent(playerName)}&limit=${limit}${campaignParam()}`);
 }
 
 // ===================================
@@ -125,10 +139,11 @@ export async function getGameHistory(playerName = 'Player', limit = 10) {
  * Получить таблицу лидеров.
  * 
  * @param {number} limit - количество записей (по умолчанию 10)
+ * @param {string} mode - 'games' (лучшие игры) или 'players' (каждый игрок один раз)
  * @returns {Promise<Object>} - таблица лидеров
  */
-export async function getLeaderboard(limit = 10) {
-  return fetchApi(`/leaderboard?limit=${limit}`);
+export async function getLeaderboard(limit = 10, mode = 'games') {
+  return fetchApi(`/leaderboard?limit=${limit}&mode=${mode}${campaignParam()}`);
 }
 
 /**
@@ -138,7 +153,18 @@ export async function getLeaderboard(limit = 10) {
  * @returns {Promise<Object>} - позиция и лучший результат
  */
 export async function getPlayerPosition(playerName = 'Player') {
-  return fetchApi(`/leaderboard/position?player_name=${encodeURIComponent(playerName)}`);
+  return fetchApi(`/leaderboard/position?player_name=${encodeURIComponent(playerName)}${campaignParam()}`);
+}
+
+/**
+ * Соседи игрока в рейтинге: k игроков выше и k ниже.
+ * 
+ * @param {string} playerName - имя игрока
+ * @param {number} k - соседей с каждой стороны
+ * @returns {Promise<Object>} - место игрока и записи рейтинга вокруг него
+ */
+export async function getLeaderboardAround(playerName = 'Player', k = 5) {
+  return fetchApi(`/leaderboard/around?player_name=${encodeURIComponent(playerName)}&k=${k}${campaignParam()}`);
 }
 
 // ===================================
@@ -161,5 +187,6 @@ export default {
   getGameHistory,
   getLeaderboard,
   getPlayerPosition,
+  getLeaderboardAround,
   checkHealth,
 };